@@ -0,0 +1,217 @@
+"""
+Precomputed all-pairs distance matrix for a registered address set.
+
+Delivery addresses come from a fixed, known universe (``data/vadodara_addresses.csv``,
+``destination.json``), so their pairwise distances are computed once by a
+build step and stored on disk:
+
+    <dir>/index.json     format, size, tile size, dtype, detour factor,
+                         address ids and coordinates
+    <dir>/distances.f32  little-endian float32 km, stored in square tiles
+
+The matrix is padded to whole ``tile x tile`` tiles and each tile is stored
+contiguously, so a submatrix for nearby addresses reads few pages. At
+serve time the file is memory-mapped, and any subset is gathered with
+one vectorized index computation, with no distances recomputed.
+
+Build from the ``model`` directory with:
+
+    python address_matrix.py data/vadodara_addresses.csv address_matrix
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Sequence
+
+import numpy as np
+
+from distance_matrix import MATRIX_BLOCK_BYTES, block_rows
+from route_generator import CoordinateArray, GeoClustering
+
+ADDRESS_MATRIX_FORMAT_VERSION = 1
+ADDRESS_MATRIX_TILE = 256
+INDEX_FILE = "index.json"
+DATA_FILE = "distances.f32"
+# Coordinates are matched to addresses after rounding to this many decimals (~1 cm).
+COORDINATE_DECIMALS = 7
+
+
+def _coordinate_keys(coords: Any) -> np.ndarray | None:
+    """One uint64 per ``(lon, lat)`` row: both rounded to `COORDINATE_DECIMALS`, packed.
+
+    ``None`` if a coordinate is not finite or too large to pack (|value| > ~214).
+    """
+    scaled = np.rint(np.asarray(coords, dtype=np.float64).reshape(-1, 2) * 10**COORDINATE_DECIMALS)
+    if not (np.abs(scaled) < 2**31).all():
+        return None
+    shifted = (scaled.astype(np.int64) + 2**31).astype(np.uint64)
+    return (shifted[:, 0] << np.uint64(32)) | shifted[:, 1]
+
+
+def load_addresses_csv(path: str | Path) -> tuple[List[str], np.ndarray]:
+    """Return ``(ids, coords)`` from a CSV with ``latitude``/``longitude`` columns.
+
+    Ids are the row numbers as strings, the same keys ``destination.json`` uses.
+    """
+    ids: List[str] = []
+    coords: List[tuple[float, float]] = []
+    with Path(path).open("r", encoding="utf-8", newline="") as f:
+        for index, row in enumerate(csv.DictReader(f)):
+            ids.append(str(index))
+            coords.append((float(row["longitude"]), float(row["latitude"])))
+    return ids, np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+
+
+def build_address_matrix(
+    coords: CoordinateArray,
+    out_dir: str | Path,
+    ids: Sequence[str] | None = None,
+    *,
+    detour_factor: float = 1.0,
+    tile: int = ADDRESS_MATRIX_TILE,
+) -> Path:
+    """Compute the all-pairs matrix for *coords* and write it to *out_dir*.
+
+    One row of tiles is computed at a time, so peak memory is about
+    ``tile * n`` floats. The directory is written next to *out_dir* and
+    renamed into place, so readers never see a partial build.
+    """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    n = len(coords)
+    ids = [str(i) for i in (range(n) if ids is None else ids)]
+    if len(ids) != n or len(set(ids)) != n:
+        raise ValueError("ids must be unique and match the number of coordinates")
+    n_tiles = -(-n // tile)
+    padded = n_tiles * tile
+
+    out_dir = Path(out_dir)
+    tmp_dir = out_dir.with_name(out_dir.name + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    matrix = np.memmap(tmp_dir / DATA_FILE, dtype="<f4", mode="w+", shape=(max(n_tiles, 1) ** 2, tile, tile))
+    for bi in range(n_tiles):
+        rows = coords[bi * tile:(bi + 1) * tile]
+        block = np.zeros((tile, padded), dtype="<f4")
+        block[:len(rows), :n] = GeoClustering.haversine_many_to_many(rows, coords, dtype=np.float32)
+        if detour_factor != 1.0:
+            block *= detour_factor
+        # (tile, n_tiles, tile) -> (n_tiles, tile, tile): one contiguous tile per column block
+        matrix[bi * n_tiles:(bi + 1) * n_tiles] = block.reshape(tile, n_tiles, tile).transpose(1, 0, 2)
+    matrix.flush()
+    del matrix
+
+    index = {
+        "format": ADDRESS_MATRIX_FORMAT_VERSION,
+        "n": n,
+        "tile": tile,
+        "dtype": "<f4",
+        "units": "km",
+        "detour_factor": detour_factor,
+        "ids": ids,
+        "coordinates": coords.tolist(),
+    }
+    with (tmp_dir / INDEX_FILE).open("w", encoding="utf-8") as f:
+        json.dump(index, f, separators=(",", ":"))
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    return out_dir
+
+
+class AddressMatrix:
+    """Read-only, memory-mapped view of a matrix written by `build_address_matrix`."""
+
+    def __init__(self, directory: str | Path) -> None:
+        self.directory = Path(directory)
+        with (self.directory / INDEX_FILE).open("r", encoding="utf-8") as f:
+            index = json.load(f)
+        if index.get("format") != ADDRESS_MATRIX_FORMAT_VERSION:
+            raise ValueError(f"Unsupported address matrix format: {index.get('format')}")
+        self.n: int = index["n"]
+        self.tile: int = index["tile"]
+        self.detour_factor: float = index["detour_factor"]
+        self.ids: List[str] = index["ids"]
+        self.coordinates = np.asarray(index["coordinates"], dtype=np.float64).reshape(-1, 2)
+        self._n_tiles = max(-(-self.n // self.tile), 1)
+        self._data = np.memmap(self.directory / DATA_FILE, dtype=index["dtype"], mode="r")
+        self._position = {address_id: pos for pos, address_id in enumerate(self.ids)}
+        keys = _coordinate_keys(self.coordinates)
+        if keys is None:
+            raise ValueError("address coordinates must be finite lon/lat degrees")
+        self._key_order = np.argsort(keys, kind="stable")
+        self._sorted_keys = keys[self._key_order]
+
+    def __len__(self) -> int:
+        return self.n
+
+    # ------------------------------------------------------------------
+    def positions(self, ids: Sequence[Any]) -> np.ndarray:
+        """Matrix positions of address *ids*; raise ``KeyError`` for unknown ids."""
+        return np.fromiter((self._position[str(i)] for i in ids), dtype=np.intp, count=len(ids))
+
+    def match_coordinates(self, coords: CoordinateArray) -> np.ndarray | None:
+        """Positions of the addresses at *coords*, or ``None`` unless every one is known.
+
+        The whole batch is matched with one binary search over the sorted,
+        packed address coordinates. Addresses listed twice at the same spot
+        resolve to the first of them; their distances are identical.
+        """
+        keys = _coordinate_keys(coords)
+        if keys is None:
+            return None
+        if not len(self._sorted_keys):
+            return np.empty(0, dtype=np.intp) if not len(keys) else None
+        idx = np.searchsorted(self._sorted_keys, keys)
+        np.minimum(idx, len(self._sorted_keys) - 1, out=idx)
+        if not (self._sorted_keys[idx] == keys).all():
+            return None
+        return self._key_order[idx].astype(np.intp, copy=False)
+
+    def submatrix(self, rows: Any, cols: Any = None) -> np.ndarray:
+        """Gather ``D[rows][:, cols]`` (positions, not ids) as a new float32 array."""
+        rows = np.asarray(rows, dtype=np.intp).reshape(-1)
+        cols = rows if cols is None else np.asarray(cols, dtype=np.intp).reshape(-1)
+        t = self.tile
+        r_off = (rows // t) * (self._n_tiles * t * t) + (rows % t) * t
+        c_off = (cols // t) * (t * t) + cols % t
+        return np.asarray(self._data[r_off[:, None] + c_off[None, :]])
+
+    def iter_submatrix_blocks(
+        self, rows: Any, cols: Any = None, *, max_block_bytes: int = MATRIX_BLOCK_BYTES
+    ) -> Iterator[np.ndarray]:
+        """Yield `submatrix` in row blocks of at most *max_block_bytes*."""
+        rows = np.asarray(rows, dtype=np.intp).reshape(-1)
+        cols = rows if cols is None else np.asarray(cols, dtype=np.intp).reshape(-1)
+        step = block_rows(len(cols), np.float32, max_block_bytes)
+        for start in range(0, len(rows), step):
+            yield self.submatrix(rows[start:start + step], cols)
+
+    def distances(self, ids_a: Sequence[Any], ids_b: Sequence[Any] | None = None) -> np.ndarray:
+        """Distance matrix in km between address ids (``ids_b`` defaults to ``ids_a``)."""
+        rows = self.positions(ids_a)
+        return self.submatrix(rows, rows if ids_b is None else self.positions(ids_b))
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "directory": str(self.directory),
+            "addresses": self.n,
+            "tile": self.tile,
+            "detour_factor": self.detour_factor,
+            "bytes": int(self._data.nbytes),
+        }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (3, 4):
+        sys.exit("usage: python address_matrix.py ADDRESSES.csv OUTPUT_DIR [DETOUR_FACTOR]")
+    address_ids, address_coords = load_addresses_csv(sys.argv[1])
+    factor = float(sys.argv[3]) if len(sys.argv) == 4 else 1.0
+    out = build_address_matrix(address_coords, sys.argv[2], address_ids, detour_factor=factor)
+    print(f"Wrote {len(address_ids)} x {len(address_ids)} matrix to {out}")
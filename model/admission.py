@@ -0,0 +1,149 @@
+"""
+Admission control for CPU-bound request work.
+
+`AdmissionController` runs blocking NumPy work on a bounded thread pool so
+the event loop stays free, and sheds load instead of queueing without
+limit: once ``max_workers + max_queue`` calls are in flight, new calls are
+rejected straight away with `Overloaded`, and callers that wait longer
+than ``timeout`` get `ComputeTimeout`. `stream` admits a streamed response
+once and produces each of its chunks on the same pool.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, TypeVar
+
+T = TypeVar("T")
+_DONE = object()
+
+
+class Overloaded(Exception):
+    """Raised when the pool and its queue are full."""
+
+
+class ComputeTimeout(Exception):
+    """Raised when a call does not finish within the controller's timeout."""
+
+
+class AdmissionController:
+    """Bounded thread pool with queue-depth backpressure and per-call timeouts.
+
+    Parameters
+    ----------
+    max_workers : int
+        Calls executing at once.
+    max_queue : int
+        Calls allowed to wait for a worker before new ones are rejected.
+    timeout : float | None
+        Seconds a caller waits for its result. The work itself cannot be
+        interrupted, so a timed-out call keeps its slot until it finishes;
+        that keeps the admission count honest about real load.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, timeout: float | None = 30.0) -> None:
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue = max(0, int(max_queue))
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="compute")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._stats = {"completed": 0, "rejected": 0, "timed_out": 0}
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        """Build from ``GEOCLUSTER_MAX_WORKERS``, ``GEOCLUSTER_MAX_QUEUE`` and
+        ``GEOCLUSTER_REQUEST_TIMEOUT`` (seconds, ``0`` disables)."""
+        workers = int(os.environ.get("GEOCLUSTER_MAX_WORKERS", os.cpu_count() or 1))
+        queue_depth = int(os.environ.get("GEOCLUSTER_MAX_QUEUE", 2 * workers))
+        timeout = float(os.environ.get("GEOCLUSTER_REQUEST_TIMEOUT", 30.0))
+        return cls(workers, queue_depth, timeout or None)
+
+    # ------------------------------------------------------------------
+    def _release(self, _future: Any) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._stats["completed"] += 1
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self._stats["rejected"] += 1
+                raise Overloaded(f"{self._in_flight} requests in flight")
+            self._in_flight += 1
+
+    async def _wait(self, future: Any) -> Any:
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._stats["timed_out"] += 1
+            raise ComputeTimeout(f"Request exceeded {self.timeout:g}s") from None
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run ``fn(*args)`` on the pool, or raise `Overloaded`/`ComputeTimeout`."""
+        self._admit()
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(self._release)
+        return await self._wait(future)
+
+    async def stream(self, items: Iterator[T]) -> AsyncIterator[T]:
+        """Return an async iterator over *items*, producing each item on the pool.
+
+        The stream takes one admission slot for its whole lifetime and
+        produces the first item before returning, so `Overloaded` and
+        `ComputeTimeout` surface before any response starts. Each later item
+        must also arrive within the timeout.
+        """
+        self._admit()
+        chunks = self._stream(items)
+        try:
+            first = await chunks.__anext__()
+        except StopAsyncIteration:
+            first = _DONE
+        except BaseException:
+            await chunks.aclose()
+            raise
+        return self._prepend(first, chunks)
+
+    @staticmethod
+    async def _prepend(first: Any, chunks: AsyncIterator[T]) -> AsyncIterator[T]:
+        if first is _DONE:
+            return
+        try:
+            yield first
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await chunks.aclose()
+
+    async def _stream(self, items: Iterator[T]) -> AsyncIterator[T]:
+        future = None
+        try:
+            while True:
+                future = self._executor.submit(next, items, _DONE)
+                item = await self._wait(future)
+                if item is _DONE:
+                    return
+                yield item
+        finally:
+            # A chunk still running keeps the slot until it finishes
+            if future is not None and not future.done():
+                future.add_done_callback(self._release)
+            else:
+                self._release(None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return current limits, load and counters."""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "timeout_seconds": self.timeout,
+                "in_flight": self._in_flight,
+                "queued": max(0, self._in_flight - self.max_workers),
+                **self._stats,
+            }
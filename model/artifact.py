@@ -0,0 +1,174 @@
+"""
+Pickle-free model artifact for serving `GeoClustering` predictions.
+
+Prediction only needs the cluster centers and a little metadata, so the
+artifact stores exactly that, with no sklearn objects:
+
+    bytes 0-7    magic ``b"GEOCLUS1"``
+    bytes 8-11   header length, little-endian uint32
+    header       UTF-8 JSON: format version, cluster method, n_clusters,
+                 n_core, dtype and the model metadata; padded with spaces
+                 so the data block starts on a 64-byte boundary
+    data         ``n_clusters x 2`` little-endian float64 ``(lon, lat)``
+    core         format 2 only: ``n_core x 2`` float64 core points, then
+                 ``n_core`` little-endian int64 cluster labels
+
+Core points make density/radius models ("dbscan", "distance") servable:
+new points take the label of the nearest core point within ``eps_km``.
+Models without them are still written as format 1. Reading needs only
+NumPy, and every block can be memory-mapped.
+
+The bundled ``production_model.gcm`` is not checked in; it is derived from
+``production_model.pkl`` and must be rebuilt before every deploy (run from
+the ``model`` directory, ahead of ``vercel deploy``):
+
+    python -m artifact convert production_model.pkl production_model.gcm production_metadata.json
+
+Without it the service falls back to the pickle and pays for importing
+sklearn on cold start.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import struct
+import sys
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+ARTIFACT_SUFFIX = ".gcm"
+ARTIFACT_MAGIC = b"GEOCLUS1"
+ARTIFACT_FORMAT_VERSION = 2
+_READABLE_FORMATS = (1, 2)
+_PREAMBLE = struct.Struct("<8sI")
+_ALIGN = 64
+
+
+def write_artifact(
+    path: str | Path,
+    centers: Any,
+    metadata: Dict[str, Any],
+    core_points: Any = None,
+    core_labels: Any = None,
+) -> None:
+    """Write *centers*, *metadata* and optional core points to *path*, atomically replacing it."""
+    path = Path(path)
+    centers = np.ascontiguousarray(centers, dtype="<f8").reshape(-1, 2)
+    if core_points is not None:
+        core_points = np.ascontiguousarray(core_points, dtype="<f8").reshape(-1, 2)
+        core_labels = np.ascontiguousarray(core_labels, dtype="<i8").reshape(-1)
+        if len(core_points) != len(core_labels):
+            raise ValueError("core_points and core_labels must have the same length")
+    header = {
+        "format": ARTIFACT_FORMAT_VERSION if core_points is not None else 1,
+        "cluster_method": metadata.get("cluster_method", "kmeans"),
+        "n_clusters": len(centers),
+        "dtype": "<f8",
+        # Centers and core points live in the data blocks only
+        "metadata": {k: v for k, v in metadata.items() if k not in ("cluster_centers", "core_points", "core_labels")},
+    }
+    if core_points is not None:
+        header["n_core"] = len(core_points)
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    data_offset = -(-(_PREAMBLE.size + len(header_bytes)) // _ALIGN) * _ALIGN
+    header_bytes = header_bytes.ljust(data_offset - _PREAMBLE.size, b" ")
+
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as f:
+        f.write(_PREAMBLE.pack(ARTIFACT_MAGIC, len(header_bytes)))
+        f.write(header_bytes)
+        f.write(centers.tobytes())
+        if core_points is not None:
+            f.write(core_points.tobytes())
+            f.write(core_labels.tobytes())
+    os.replace(tmp, path)
+
+
+def read_artifact(path: str | Path, mmap: bool = True) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """Return ``(centers, header)`` from an artifact written by `write_artifact`.
+
+    With *mmap* the centers are a read-only memory map of the file instead
+    of a copy.
+    """
+    path = Path(path)
+    with path.open("rb") as f:
+        magic, header_len = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+        if magic != ARTIFACT_MAGIC:
+            raise ValueError(f"{path} is not a GeoClustering artifact")
+        header = json.loads(f.read(header_len))
+        if header.get("format") not in _READABLE_FORMATS:
+            raise ValueError(f"Unsupported artifact format: {header.get('format')}")
+        shape = (int(header["n_clusters"]), 2)
+        offset = _PREAMBLE.size + header_len
+        if mmap and shape[0]:
+            centers = np.memmap(path, dtype=header["dtype"], mode="r", offset=offset, shape=shape)
+        else:
+            centers = np.fromfile(f, dtype=header["dtype"], count=shape[0] * 2).reshape(shape)
+    # Where the core block starts, for `read_core_points`
+    header["core_offset"] = offset + shape[0] * 2 * np.dtype(header["dtype"]).itemsize
+    return centers, header
+
+
+def read_core_points(
+    path: str | Path, header: Dict[str, Any], mmap: bool = True
+) -> Tuple[np.ndarray, np.ndarray] | None:
+    """Return ``(core_points, core_labels)`` of an artifact, or ``None`` if it has none.
+
+    *header* is the one returned by `read_artifact` for the same file.
+    """
+    if "n_core" not in header:
+        return None
+    n_core = int(header["n_core"])
+    points_offset = header["core_offset"]
+    labels_offset = points_offset + n_core * 16
+    if mmap and n_core:
+        points = np.memmap(path, dtype="<f8", mode="r", offset=points_offset, shape=(n_core, 2))
+        labels = np.memmap(path, dtype="<i8", mode="r", offset=labels_offset, shape=(n_core,))
+    else:
+        with Path(path).open("rb") as f:
+            f.seek(points_offset)
+            points = np.fromfile(f, dtype="<f8", count=n_core * 2).reshape(n_core, 2)
+            labels = np.fromfile(f, dtype="<i8", count=n_core)
+    return points, labels
+
+
+def convert_pickle(
+    model_path: str | Path,
+    artifact_path: str | Path | None = None,
+    metadata_path: str | Path | None = None,
+) -> Path:
+    """Convert a `GeoClustering.save_model` pickle (+ JSON) into an artifact."""
+    from route_generator import GeoClustering
+
+    model_path = Path(model_path)
+    artifact_path = Path(artifact_path) if artifact_path else model_path.with_suffix(ARTIFACT_SUFFIX)
+    model = GeoClustering()
+    model.load_model(model_path, metadata_path)
+    model.cluster_method = model.model_metadata.get("cluster_method", model.cluster_method)
+    model.save_artifact(artifact_path)
+    return artifact_path
+
+
+def ensure_artifact(
+    model_path: str | Path,
+    artifact_path: str | Path | None = None,
+    metadata_path: str | Path | None = None,
+) -> Path:
+    """`convert_pickle` unless the artifact already exists and is newer than the pickle."""
+    model_path = Path(model_path)
+    artifact_path = Path(artifact_path) if artifact_path else model_path.with_suffix(ARTIFACT_SUFFIX)
+    if artifact_path.exists() and artifact_path.stat().st_mtime >= model_path.stat().st_mtime:
+        return artifact_path
+    return convert_pickle(model_path, artifact_path, metadata_path)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args[:1] == ["convert"]:
+        args = args[1:]
+    if len(args) not in (1, 2, 3):
+        sys.exit("usage: python -m artifact convert MODEL.pkl [OUTPUT.gcm] [METADATA.json]")
+    print(f"Wrote {convert_pickle(*args)}")
@@ -0,0 +1,89 @@
+"""
+Cold-start check for the predict-only service path.
+
+Each run starts a fresh interpreter, imports ``services.geoclustering`` the
+way ``api/index.py`` does, starts the app (model load + warm-up) and times
+the first and second ``/predict`` calls. It fails if sklearn, scipy or
+uvicorn were imported to serve predictions, or if the best run exceeds the
+budgets below, so regressions show up before a deploy does.
+
+Run from the ``model`` directory:  python benchmarks/bench_cold_start.py
+Budgets can be overridden, e.g. ``--import-ms 1500 --first-request-ms 100``.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+MODEL_DIR = Path(__file__).parent.parent
+
+CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+from services.geoclustering import app
+imported = time.perf_counter()
+
+from fastapi.testclient import TestClient
+with TestClient(app) as client:
+    started = time.perf_counter()
+    body = {"coordinates": [{"lon": 73.18, "lat": 22.30}, {"lon": 72.85, "lat": 21.17}]}
+    t0 = time.perf_counter()
+    assert client.post("/predict", json=body).status_code == 200
+    t1 = time.perf_counter()
+    assert client.post("/predict", json=body).status_code == 200
+    t2 = time.perf_counter()
+
+heavy = sorted({m.split(".")[0] for m in sys.modules} & {"sklearn", "scipy", "uvicorn"})
+print(json.dumps({
+    "import_ms": (imported - start) * 1e3,
+    "startup_ms": (started - imported) * 1e3,
+    "first_request_ms": (t1 - t0) * 1e3,
+    "second_request_ms": (t2 - t1) * 1e3,
+    "heavy_modules": heavy,
+}))
+"""
+
+
+def run_once():
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD], cwd=MODEL_DIR, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--import-ms", type=float, default=1000.0)
+    parser.add_argument("--first-request-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    # Time the deployed path: the bundled artifact, not the pickle fallback
+    sys.path.append(str(MODEL_DIR))
+    from artifact import ensure_artifact
+
+    ensure_artifact(
+        MODEL_DIR / "production_model.pkl",
+        MODEL_DIR / "production_model.gcm",
+        MODEL_DIR / "production_metadata.json",
+    )
+    runs = [run_once() for _ in range(args.runs)]
+    best = {key: min(r[key] for r in runs) for key in runs[0] if key.endswith("_ms")}
+    for key, value in best.items():
+        print(f"{key:>18}: {value:8.1f}")
+
+    failures = []
+    heavy = sorted({m for r in runs for m in r["heavy_modules"]})
+    if heavy:
+        failures.append(f"predict path imported {', '.join(heavy)}")
+    if best["import_ms"] > args.import_ms:
+        failures.append(f"import took {best['import_ms']:.0f} ms (budget {args.import_ms:.0f} ms)")
+    if best["first_request_ms"] > args.first_request_ms:
+        failures.append(
+            f"first request took {best['first_request_ms']:.0f} ms (budget {args.first_request_ms:.0f} ms)"
+        )
+    if failures:
+        sys.exit("FAIL: " + "; ".join(failures))
+    print("OK")
@@ -0,0 +1,73 @@
+"""
+Compare model load time: the pickled KMeans + JSON metadata written by
+`GeoClustering.save_model` versus the pickle-free ``.gcm`` artifact
+(see artifact.py).
+
+Cold numbers run each load in a fresh interpreter, as on a serverless cold
+start, so they include the imports the format drags in (sklearn for the
+pickle, only NumPy for the artifact). Warm numbers repeat the load in-process.
+
+Run from the ``model`` directory:  python benchmarks/bench_model_load.py
+"""
+
+import os
+import subprocess
+import sys
+import time
+import warnings
+from pathlib import Path
+
+MODEL_DIR = Path(__file__).parent.parent
+sys.path.append(str(MODEL_DIR))
+from artifact import ensure_artifact, read_artifact
+
+PICKLE_LOAD = (
+    "import pickle, json\n"
+    "with open('production_model.pkl', 'rb') as f: pickle.load(f)\n"
+    "with open('production_metadata.json') as f: json.load(f)\n"
+)
+ARTIFACT_LOAD = (
+    "from artifact import read_artifact\n"
+    "read_artifact('production_model.gcm')\n"
+)
+
+
+def cold_seconds(code, repeat=5):
+    """Best wall time of a fresh interpreter running *code* (minus a bare start-up)."""
+    def run(src):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", src], cwd=MODEL_DIR, check=True, capture_output=True)
+        return time.perf_counter() - start
+
+    baseline = min(run("pass") for _ in range(repeat))
+    return min(run(code) for _ in range(repeat)) - baseline
+
+
+def warm_seconds(code, repeat=50):
+    namespace = {}
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        exec(code, namespace)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+if __name__ == "__main__":
+    # sklearn warns about unpickling estimators across versions
+    warnings.simplefilter("ignore")
+    os.chdir(MODEL_DIR)
+    ensure_artifact("production_model.pkl", "production_model.gcm", "production_metadata.json")
+    centers, header = read_artifact("production_model.gcm")
+    pkl_size = Path("production_model.pkl").stat().st_size + Path("production_metadata.json").stat().st_size
+    gcm_size = Path("production_model.gcm").stat().st_size
+    print(f"k={header['n_clusters']}  pickle+json: {pkl_size} bytes  artifact: {gcm_size} bytes")
+
+    print(f"{'format':>10} {'cold (ms)':>10} {'warm (ms)':>10}")
+    results = {}
+    for name, code in (("pickle", PICKLE_LOAD), ("artifact", ARTIFACT_LOAD)):
+        results[name] = (cold_seconds(code), warm_seconds(code))
+        cold, warm = results[name]
+        print(f"{name:>10} {cold * 1e3:>10.1f} {warm * 1e3:>10.3f}")
+    saved = results["pickle"][0] - results["artifact"][0]
+    print(f"cold-start load time saved: {saved * 1e3:.1f} ms")
@@ -0,0 +1,79 @@
+"""
+Compare /predict response construction: Pydantic models + stdlib JSON
+versus the plain-dict + orjson fast path used by the service.
+
+Run from the ``model`` directory:  python benchmarks/bench_predict_response.py
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+sys.path.append(str(Path(__file__).parent.parent))
+from services.geoclustering import ClusterInfo, Coordinate, PredictionResponse
+
+
+def make_clusters(n_points, points_per_cluster=10, seed=42):
+    rng = np.random.default_rng(seed)
+    lon = 73.18 + rng.normal(0, 0.03, n_points)
+    lat = 22.30 + rng.normal(0, 0.03, n_points)
+    clusters = []
+    for start in range(0, n_points, points_per_cluster):
+        pts = [{"lon": float(x), "lat": float(y)}
+               for x, y in zip(lon[start:start + points_per_cluster], lat[start:start + points_per_cluster])]
+        clusters.append({
+            "cluster_id": len(clusters),
+            "cluster_center": {"lon": float(np.mean(lon[start:start + points_per_cluster])),
+                               "lat": float(np.mean(lat[start:start + points_per_cluster]))},
+            "coordinates": pts,
+        })
+    return clusters
+
+
+def pydantic_path(clusters, n_points):
+    models = [
+        ClusterInfo(
+            cluster_id=c["cluster_id"],
+            cluster_center=Coordinate(**c["cluster_center"]),
+            coordinates=c["coordinates"],
+        )
+        for c in clusters
+    ]
+    response = PredictionResponse(
+        success=True, timestamp="", total_points=n_points,
+        total_clusters=len(models), clusters=models, model_info={},
+    )
+    # What FastAPI does for a response_model return value
+    validated = PredictionResponse.model_validate(response.model_dump())
+    return json.dumps(jsonable_encoder(validated)).encode()
+
+
+def fast_path(clusters, n_points):
+    return orjson.dumps({
+        "success": True, "timestamp": "", "total_points": n_points,
+        "total_clusters": len(clusters), "clusters": clusters, "model_info": {},
+    })
+
+
+def best_of(fn, *args, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+if __name__ == "__main__":
+    print(f"{'points':>8} {'pydantic+json (ms)':>20} {'orjson (ms)':>12} {'speedup':>8}")
+    for n in (1_000, 10_000, 100_000):
+        clusters = make_clusters(n)
+        assert json.loads(pydantic_path(clusters, n)) == json.loads(fast_path(clusters, n))
+        slow = best_of(pydantic_path, clusters, n)
+        fast = best_of(fast_path, clusters, n)
+        print(f"{n:>8} {slow * 1e3:>20.2f} {fast * 1e3:>12.2f} {slow / fast:>7.1f}x")
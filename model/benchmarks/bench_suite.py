@@ -0,0 +1,337 @@
+"""
+Reproducible benchmark suite for clustering, prediction and the API.
+
+Orders are synthetic but Vadodara-like: seeded points spread around the
+residential area centers that ``data/dataset.py`` uses in
+`VadodaraAddressExtractor.generate_residential_addresses`, so every run and
+every commit times exactly the same inputs. Cases cover each `GeoClustering`
+method, the auto-k sweep, capacity splitting, prediction and formatting,
+and the FastAPI endpoints in-process via ``TestClient`` (result cache off).
+Each case runs at every requested size up to its own limit; larger sizes
+are recorded as skipped so result files stay comparable.
+
+Results are written as JSON, by default to
+``benchmarks/results/<commit>.json``. Compare two runs with ``--compare``;
+it exits non-zero if any case got slower than ``--threshold``.
+
+Run from the ``model`` directory:
+
+    python benchmarks/bench_suite.py
+    python benchmarks/bench_suite.py --sizes 1000 10000 --cases predict_cluster api_predict_batch
+    python benchmarks/bench_suite.py --baseline benchmarks/results/OLD.json
+    python benchmarks/bench_suite.py --compare benchmarks/results/OLD.json benchmarks/results/NEW.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import ExitStack
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+MODEL_DIR = Path(__file__).parent.parent
+RESULTS_DIR = Path(__file__).parent / "results"
+sys.path.append(str(MODEL_DIR))
+
+RESULTS_FORMAT = 1
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+
+# (name, lat, lon) of the residential areas in
+# VadodaraAddressExtractor.generate_residential_addresses (data/dataset.py,
+# which needs pymongo and geopy to import)
+RESIDENTIAL_AREAS = (
+    ("Alkapuri", 22.3072, 73.1812),
+    ("Akota", 22.3276, 73.2009),
+    ("Fatehgunj", 22.3193, 73.1900),
+    ("Sayajigunj", 22.3015, 73.1896),
+    ("Gotri", 22.3429, 73.2084),
+    ("Manjalpur", 22.2741, 73.2088),
+    ("Harni", 22.3158, 73.1650),
+    ("Nizampura", 22.3342, 73.1847),
+    ("Subhanpura", 22.2890, 73.1823),
+    ("Sama", 22.3547, 73.2329),
+)
+
+
+def vadodara_orders(n, seed=42, spread_deg=0.01):
+    """Return *n* seeded ``(lon, lat)`` orders around the residential areas.
+
+    Like ``generate_residential_addresses``, each order picks an area and is
+    offset uniformly by up to *spread_deg* (about 1 km) in each direction.
+    """
+    rng = np.random.default_rng(seed)
+    centers = np.array([(lon, lat) for _, lat, lon in RESIDENTIAL_AREAS])
+    area = rng.integers(len(centers), size=n)
+    return centers[area] + rng.uniform(-spread_deg, spread_deg, (n, 2))
+
+
+# ----------------------------------------------------------------------
+# Cases: each takes the orders and returns the callable to time
+# ----------------------------------------------------------------------
+CASES = {}
+
+
+def case(name, max_n):
+    def register(setup):
+        CASES[name] = (setup, max_n)
+        return setup
+    return register
+
+
+def _production_model():
+    from artifact import ensure_artifact
+    from route_generator import GeoClustering
+
+    model = GeoClustering()
+    model.load_artifact(ensure_artifact(
+        MODEL_DIR / "production_model.pkl",
+        MODEL_DIR / "production_model.gcm",
+        MODEL_DIR / "production_metadata.json",
+    ))
+    return model
+
+
+@case("cluster_kmeans", max_n=1_000_000)
+def _cluster_kmeans(coords):
+    from route_generator import GeoClustering
+
+    return lambda: GeoClustering("kmeans").cluster_coordinates(coords, n_clusters=10)
+
+
+@case("cluster_auto_kmeans", max_n=1_000_000)
+def _cluster_auto_kmeans(coords):
+    from route_generator import GeoClustering
+
+    return lambda: GeoClustering("kmeans").cluster_coordinates(coords, auto=True, max_k=8)
+
+
+@case("cluster_dbscan", max_n=100_000)
+def _cluster_dbscan(coords):
+    from route_generator import GeoClustering
+
+    return lambda: GeoClustering("dbscan").cluster_coordinates(coords, eps_km=0.1, min_samples=10)
+
+
+@case("cluster_distance", max_n=1_000_000)
+def _cluster_distance(coords):
+    from route_generator import GeoClustering
+
+    return lambda: GeoClustering("distance").cluster_coordinates(coords, max_distance_km=1.0)
+
+
+@case("capacity_split", max_n=1_000_000)
+def _capacity_split(coords):
+    from route_generator import GeoClustering
+
+    model = GeoClustering()
+    return lambda: model.capacity_constrained_clusters(coords, 100)
+
+
+@case("dbscan_sweep", max_n=10_000)
+def _dbscan_sweep(coords):
+    from dbscan_sweep import sweep_dbscan
+
+    return lambda: sweep_dbscan(coords, [0.1, 0.2, 0.3], [5, 10, 20])
+
+
+@case("predict_cluster", max_n=1_000_000)
+def _predict_cluster(coords):
+    model = _production_model()
+    return lambda: model.predict_cluster(coords)
+
+
+@case("predict_and_format", max_n=1_000_000)
+def _predict_and_format(coords):
+    model = _production_model()
+    return lambda: model.predict_and_format_for_backend(coords)
+
+
+_api = ExitStack()
+_client = None
+
+
+def _api_client():
+    """Start the service once, in-process, with the result cache disabled."""
+    global _client
+    if _client is None:
+        os.environ["GEOCLUSTER_CACHE_MAX_ENTRIES"] = "0"
+        os.environ.setdefault("GEOCLUSTER_REQUEST_TIMEOUT", "3600")
+        from fastapi.testclient import TestClient
+        from services.geoclustering import app
+
+        _client = _api.enter_context(TestClient(app))
+    return _client
+
+
+def _post(path, **kwargs):
+    client = _api_client()
+
+    def call():
+        response = client.post(path, **kwargs)
+        assert response.status_code == 200, response.text[:200]
+    return call
+
+
+@case("api_predict", max_n=1_000_000)
+def _api_predict(coords):
+    body = {"coordinates": [{"lon": lon, "lat": lat} for lon, lat in coords.tolist()]}
+    return _post("/predict", content=json.dumps(body), headers={"content-type": "application/json"})
+
+
+@case("api_predict_capped", max_n=100_000)
+def _api_predict_capped(coords):
+    body = {
+        "coordinates": [{"lon": lon, "lat": lat} for lon, lat in coords.tolist()],
+        "max_points_per_cluster": 100,
+    }
+    return _post("/predict", content=json.dumps(body), headers={"content-type": "application/json"})
+
+
+@case("api_predict_batch", max_n=1_000_000)
+def _api_predict_batch(coords):
+    body = json.dumps({"lon": coords[:, 0].tolist(), "lat": coords[:, 1].tolist()})
+    return _post("/predict-batch", content=body, headers={"content-type": "application/json"})
+
+
+@case("api_predict_batch_binary", max_n=1_000_000)
+def _api_predict_batch_binary(coords):
+    body = np.ascontiguousarray(coords, dtype="<f8").tobytes()
+    return _post("/predict-batch", content=body, headers={"content-type": "application/octet-stream"})
+
+
+# ----------------------------------------------------------------------
+# Running
+# ----------------------------------------------------------------------
+def measure(fn, repeat, budget):
+    """Time *fn* up to *repeat* times, stopping early once *budget* seconds are spent."""
+    timings = []
+    while len(timings) < repeat and sum(timings) < budget:
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def environment():
+    import sklearn
+
+    def git(*args):
+        try:
+            return subprocess.run(
+                ["git", *args], cwd=MODEL_DIR, check=True, capture_output=True, text=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "scikit-learn": sklearn.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run_suite(cases, sizes, seed, repeat, budget):
+    # Pay for the lazy sklearn imports before any timing starts
+    import sklearn.cluster, sklearn.metrics, sklearn.neighbors  # noqa: E401,F401
+
+    results = []
+    for name in cases:
+        setup, max_n = CASES[name]
+        for n in sizes:
+            entry = {"case": name, "n": n}
+            if n > max_n:
+                entry["skipped"] = f"above the case limit of {max_n}"
+            else:
+                fn = setup(vadodara_orders(n, seed))
+                timings = measure(fn, repeat, budget)
+                best = min(timings)
+                entry.update({
+                    "best_seconds": round(best, 6),
+                    "median_seconds": round(statistics.median(timings), 6),
+                    "runs": len(timings),
+                    "points_per_second": round(n / best, 1),
+                })
+                print(f"{name:>26} {n:>9} {best * 1e3:>12.2f} ms  ({len(timings)} runs)", flush=True)
+            results.append(entry)
+    return results
+
+
+def compare(old, new, threshold):
+    """Print best-time ratios of two result files; return the number of regressions."""
+    before = {(r["case"], r["n"]): r for r in old["results"] if "best_seconds" in r}
+    print(f"{old['environment']['commit'] or '?'} -> {new['environment']['commit'] or '?'}")
+    print(f"{'case':>26} {'n':>9} {'before (ms)':>12} {'after (ms)':>12} {'ratio':>7}")
+    regressions = 0
+    for r in new["results"]:
+        base = before.get((r["case"], r["n"]))
+        if base is None or "best_seconds" not in r:
+            continue
+        ratio = r["best_seconds"] / base["best_seconds"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(
+            f"{r['case']:>26} {r['n']:>9} {base['best_seconds'] * 1e3:>12.2f} "
+            f"{r['best_seconds'] * 1e3:>12.2f} {ratio:>6.2f}x{flag}"
+        )
+    return regressions
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=list(CASES))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per case and size (best is reported)")
+    parser.add_argument("--budget", type=float, default=10.0, help="Stop repeating a case after this many seconds")
+    parser.add_argument("--output", type=Path, help="Results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--baseline", type=Path, help="Compare this run against an earlier results file")
+    parser.add_argument("--compare", type=Path, nargs=2, metavar=("OLD", "NEW"), help="Only compare two results files")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Slowdown counted as a regression (0.1 = 10%%)")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*map(load_results, args.compare), args.threshold) else 0)
+
+    output = args.output.resolve() if args.output else None
+    baseline = load_results(args.baseline) if args.baseline else None
+    # The service loads its model from relative paths
+    os.chdir(MODEL_DIR)
+    env = environment()
+    print(f"{'case':>26} {'n':>9} {'best':>15}")
+    with _api:
+        results = run_suite(args.cases, sorted(args.sizes), args.seed, args.repeat, args.budget)
+    report = {
+        "format": RESULTS_FORMAT,
+        "created": datetime.now().isoformat(),
+        "environment": env,
+        "seed": args.seed,
+        "results": results,
+    }
+
+    if output is None:
+        name = (env["commit"] or "unversioned")[:12] + ("-dirty" if env["dirty"] else "")
+        output = RESULTS_DIR / f"{name}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Wrote {output}")
+
+    if baseline is not None:
+        sys.exit(1 if compare(baseline, report, args.threshold) else 0)
@@ -0,0 +1,310 @@
+"""
+DBSCAN parameter sweeps over one shared radius-neighbour graph.
+
+Tuning ``eps_km`` / ``min_samples`` for `GeoClustering._create_clusters_dbscan`
+used to mean one full haversine DBSCAN per combination. `RadiusGraph` runs
+the expensive part once: a haversine ``BallTree`` radius query at the
+largest eps, stored as flat edge arrays. Every (eps, min_samples) setting
+is then a prefix of those edges (they are sorted by distance) plus a
+vectorized connected-components pass, which gives the same labels as
+sklearn's DBSCAN: border points join the lowest-numbered cluster that
+reaches them, as in sklearn's expansion order.
+`sweep_dbscan` evaluates a grid of settings on a thread pool and reports
+cluster counts, noise ratios and silhouette scores. All settings are scored
+on one shared sample whose pairwise distances are computed once
+(`SilhouetteSample`).
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from route_generator import EARTH_RADIUS_KM, CoordinateArray, GeoClustering
+
+
+def _components(n: int, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """Connected components of an undirected edge list by hooking and pointer jumping.
+
+    Returns each node's root, which is the lowest node index in its
+    component. Every round hooks the larger root of each crossing edge onto
+    the smaller one and drops edges that became internal, so a few
+    vectorized rounds suffice.
+    """
+    parent = np.arange(n, dtype=np.int64)
+    while len(rows):
+        pr, pc = parent[rows], parent[cols]
+        crossing = pr != pc
+        rows, cols, pr, pc = rows[crossing], cols[crossing], pr[crossing], pc[crossing]
+        if not len(rows):
+            break
+        # Any of several writes to one root may win; each hooks it lower
+        parent[np.maximum(pr, pc)] = np.minimum(pr, pc)
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+    return parent
+
+
+class RadiusGraph:
+    """All point pairs within *max_eps_km* of each other, with their distances.
+
+    Each pair is stored once and edges are sorted by distance, so the
+    neighbourhood graph for any smaller eps is a prefix of the edge arrays.
+
+    Parameters
+    ----------
+    coordinates : array-like of ``(lon, lat)``
+        Points to cluster.
+    max_eps_km : float
+        Largest eps any setting will use; edges beyond it are not stored.
+    """
+
+    def __init__(self, coordinates: CoordinateArray, max_eps_km: float) -> None:
+        from sklearn.neighbors import BallTree
+
+        if max_eps_km <= 0:
+            raise ValueError("max_eps_km must be positive")
+        start = time.perf_counter()
+        self.coords = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+        self.max_eps_km = float(max_eps_km)
+        self.n = len(self.coords)
+        self._rad = np.radians(self.coords[:, ::-1])  # (lat, lon) for haversine
+
+        if self.n:
+            tree = BallTree(self._rad, metric="haversine")
+            neighbours, dist = tree.query_radius(
+                self._rad, r=self.max_eps_km / EARTH_RADIUS_KM, return_distance=True
+            )
+            counts = np.fromiter(map(len, neighbours), dtype=np.int64, count=self.n)
+            rows = np.repeat(np.arange(self.n), counts)
+            cols = np.concatenate(neighbours).astype(np.int64)
+            dist_km = np.concatenate(dist) * EARTH_RADIUS_KM
+        else:
+            rows = cols = np.empty(0, dtype=np.int64)
+            dist_km = np.empty(0)
+        # One edge per pair; self-pairs are implicit (every point is its own neighbour)
+        once = rows < cols
+        order = np.argsort(dist_km[once], kind="stable")
+        self.rows = rows[once][order]
+        self.cols = cols[once][order]
+        self.dist_km = dist_km[once][order]
+        self.build_seconds = time.perf_counter() - start
+        self._samples: Dict[Tuple[int | None, int], SilhouetteSample] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def n_edges(self) -> int:
+        return len(self.rows)
+
+    def _edges(self, eps_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        if eps_km > self.max_eps_km * (1 + 1e-12):
+            raise ValueError(f"eps_km {eps_km} exceeds the graph radius {self.max_eps_km}")
+        k = int(np.searchsorted(self.dist_km, eps_km, side="right"))
+        return self.rows[:k], self.cols[:k]
+
+    def neighbour_counts(self, eps_km: float) -> np.ndarray:
+        """Points within *eps_km* of each point, itself included."""
+        rows, cols = self._edges(eps_km)
+        return np.bincount(rows, minlength=self.n) + np.bincount(cols, minlength=self.n) + 1
+
+    def labels(self, eps_km: float, min_samples: int, counts: np.ndarray | None = None) -> np.ndarray:
+        """DBSCAN labels for one setting (``-1`` is noise).
+
+        *eps_km* must not exceed ``max_eps_km``. Pass *counts* from
+        `neighbour_counts` to share them across settings with the same eps.
+        """
+        rows, cols = self._edges(eps_km)
+        if counts is None:
+            counts = self.neighbour_counts(eps_km)
+        labels = np.full(self.n, -1, dtype=np.int64)
+        core = counts >= min_samples
+        if not core.any():
+            return labels
+
+        core_r, core_c = core[rows], core[cols]
+        both = core_r & core_c
+        root = _components(self.n, rows[both], cols[both])
+        # Roots are each component's lowest index, so ranking them numbers
+        # clusters by their lowest-index core point, as sklearn does
+        core_idx = np.flatnonzero(core)
+        labels[core_idx] = np.unique(root[core_idx], return_inverse=True)[1]
+
+        # Border points join the lowest-numbered neighbouring cluster
+        to_r = core_c & ~core_r
+        to_c = core_r & ~core_c
+        target = np.concatenate((rows[to_r], cols[to_c]))
+        if len(target):
+            source = labels[np.concatenate((cols[to_r], rows[to_c]))]
+            order = np.argsort(-source, kind="stable")
+            labels[target[order]] = source[order]  # the last (smallest) write wins
+        return labels
+
+    def silhouette_sample(self, sample_size: int | None = 2000, random_state: int = 42) -> "SilhouetteSample":
+        """The shared `SilhouetteSample` for these arguments, built on first use."""
+        key = (sample_size if sample_size and sample_size < self.n else None, random_state)
+        with self._lock:
+            sample = self._samples.get(key)
+            if sample is None:
+                if key[0] is None:
+                    idx = np.arange(self.n)
+                else:
+                    idx = np.sort(np.random.default_rng(random_state).choice(self.n, key[0], replace=False))
+                sample = self._samples[key] = SilhouetteSample(self.coords, idx)
+        return sample
+
+    def silhouette(self, labels: np.ndarray, sample_size: int | None = 2000, random_state: int = 42) -> float | None:
+        """Haversine silhouette of the non-noise points in the shared sample.
+
+        ``None`` if the sampled points hold fewer than two clusters.
+        """
+        return self.silhouette_sample(sample_size, random_state).score(labels)
+
+    def evaluate(
+        self,
+        eps_km: float,
+        min_samples: int,
+        sample_size: int | None = 2000,
+        random_state: int = 42,
+        counts: np.ndarray | None = None,
+    ) -> Dict[str, Any]:
+        """Cluster with one setting and summarise it."""
+        start = time.perf_counter()
+        labels = self.labels(eps_km, min_samples, counts)
+        labelled = time.perf_counter()
+        noise = int((labels < 0).sum())
+        result = {
+            "eps_km": float(eps_km),
+            "min_samples": int(min_samples),
+            "n_clusters": int(labels.max()) + 1 if len(labels) else 0,
+            "noise_points": noise,
+            "noise_ratio": noise / self.n if self.n else 0.0,
+            "silhouette": self.silhouette(labels, sample_size, random_state),
+        }
+        result["labels_seconds"] = round(labelled - start, 4)
+        result["silhouette_seconds"] = round(time.perf_counter() - labelled, 4)
+        return result
+
+
+class SilhouetteSample:
+    """Pairwise haversine distances of a fixed sample, for scoring many labelings.
+
+    Every setting of a sweep is scored on the same points, so the
+    ``len(idx) ** 2`` distance matrix is computed once (and memory grows
+    with its square); each score only gathers the clustered rows and sums
+    them per cluster.
+    """
+
+    def __init__(self, coords: np.ndarray, idx: np.ndarray) -> None:
+        start = time.perf_counter()
+        self.idx = idx
+        self.dist_km = GeoClustering.haversine_many_to_many(coords[idx])
+        self.build_seconds = time.perf_counter() - start
+
+    def __len__(self) -> int:
+        return len(self.idx)
+
+    def score(self, labels: np.ndarray) -> float | None:
+        """Mean silhouette of the sampled non-noise points, as sklearn computes it."""
+        sampled = labels[self.idx]
+        keep = np.flatnonzero(sampled >= 0)
+        # Group the kept points by cluster so per-cluster sums are contiguous
+        keep = keep[np.argsort(sampled[keep], kind="stable")]
+        uniq, starts, sizes = np.unique(sampled[keep], return_index=True, return_counts=True)
+        k = len(uniq)
+        if k < 2 or len(keep) <= k:
+            return None
+        own = np.repeat(np.arange(k), sizes)
+        sums = np.add.reduceat(self.dist_km[np.ix_(keep, keep)], starts, axis=1)
+
+        rows = np.arange(len(keep))
+        own_size = sizes[own]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            a = sums[rows, own] / (own_size - 1)
+            means = sums / sizes
+            means[rows, own] = np.inf
+            b = means.min(axis=1)
+            sil = (b - a) / np.maximum(a, b)
+        # Singleton clusters score 0; coincident points give 0/0
+        sil[own_size == 1] = 0.0
+        return float(np.nan_to_num(sil).mean())
+
+
+def sweep_dbscan(
+    coordinates: CoordinateArray,
+    eps_values: Sequence[float],
+    min_samples_values: Sequence[int],
+    *,
+    n_jobs: int | None = None,
+    silhouette_sample_size: int | None = 2000,
+    random_state: int = 42,
+    graph: RadiusGraph | None = None,
+) -> Dict[str, Any]:
+    """Evaluate every ``(eps_km, min_samples)`` pair on one shared `RadiusGraph`.
+
+    Each eps value (with all its min_samples settings) runs as one task on
+    a pool of *n_jobs* threads (default: all cores); results come back in
+    grid order. ``best`` is the setting with the highest
+    silhouette (``None`` if no setting yields two clusters). Pass *graph*
+    to reuse one built by an earlier sweep with a large enough radius.
+
+    ``timings`` breaks the cost down by stage: graph build, sample distance
+    matrix, and the label and silhouette passes summed over all settings.
+    """
+    eps_values = sorted({float(e) for e in eps_values})
+    min_samples_values = sorted({int(m) for m in min_samples_values})
+    if not eps_values or not min_samples_values:
+        raise ValueError("eps_values and min_samples_values must not be empty")
+    if eps_values[0] <= 0 or min_samples_values[0] < 1:
+        raise ValueError("eps_km must be positive and min_samples at least 1")
+    if graph is None or graph.max_eps_km < eps_values[-1]:
+        graph = RadiusGraph(coordinates, eps_values[-1])
+
+    def _evaluate_eps(eps: float) -> List[Dict[str, Any]]:
+        # Neighbour counts depend on eps only, so every min_samples shares them
+        counts = graph.neighbour_counts(eps)
+        return [
+            graph.evaluate(eps, m, silhouette_sample_size, random_state, counts)
+            for m in min_samples_values
+        ]
+
+    # Built once up front so the worker threads share it
+    sample = graph.silhouette_sample(silhouette_sample_size, random_state)
+
+    workers = max(1, min(n_jobs or os.cpu_count() or 1, len(eps_values)))
+    start = time.perf_counter()
+    if workers == 1:
+        per_eps = [_evaluate_eps(eps) for eps in eps_values]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            per_eps = list(pool.map(_evaluate_eps, eps_values))
+    results = [r for group in per_eps for r in group]
+
+    scored = [r for r in results if r["silhouette"] is not None]
+    best = max(scored, key=lambda r: r["silhouette"]) if scored else None
+    return {
+        "n_points": graph.n,
+        "graph": {
+            "max_eps_km": graph.max_eps_km,
+            "edges": graph.n_edges,
+            "build_seconds": round(graph.build_seconds, 4),
+        },
+        "silhouette_sample_size": len(sample),
+        "sweep_seconds": round(time.perf_counter() - start, 4),
+        "timings": {
+            "graph_build": round(graph.build_seconds, 4),
+            "sample_distances": round(sample.build_seconds, 4),
+            "labels": round(sum(r["labels_seconds"] for r in results), 4),
+            "silhouette": round(sum(r["silhouette_seconds"] for r in results), 4),
+        },
+        "workers": workers,
+        "results": results,
+        "best": best,
+    }
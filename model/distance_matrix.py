@@ -0,0 +1,93 @@
+"""
+Local N x M distance matrices: great-circle (haversine) distance, optionally
+scaled by a road-detour factor to approximate driving distance.
+
+Matrices are produced in row blocks sized to a memory budget, so callers
+can stream arbitrarily large results without holding them in memory. The
+detour factor can be calibrated from a sample of real road distances (for
+example a Directions Matrix response) with `calibrate_detour_factor`.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any, Iterator
+
+import numpy as np
+
+from route_generator import CoordinateArray, GeoClustering
+
+# Upper bound on one block of output, in bytes.
+MATRIX_BLOCK_BYTES = 8 * 1024 * 1024
+
+
+def default_detour_factor() -> float:
+    """Road-detour factor from ``GEOCLUSTER_DETOUR_FACTOR`` (default 1.0, pure haversine)."""
+    return float(os.environ.get("GEOCLUSTER_DETOUR_FACTOR", 1.0))
+
+
+def calibrate_detour_factor(straight_km: Any, road_km: Any) -> float:
+    """Least-squares factor ``f`` minimising ``sum((road - f * straight) ** 2)``.
+
+    Pairs with zero or non-finite distances are ignored.
+    """
+    straight = np.asarray(straight_km, dtype=np.float64).ravel()
+    road = np.asarray(road_km, dtype=np.float64).ravel()
+    if straight.shape != road.shape:
+        raise ValueError("straight_km and road_km must have the same number of values")
+    keep = np.isfinite(straight) & np.isfinite(road) & (straight > 0) & (road > 0)
+    if not keep.any():
+        raise ValueError("Need at least one pair with positive distances to calibrate")
+    straight, road = straight[keep], road[keep]
+    return float((straight * road).sum() / (straight * straight).sum())
+
+
+def block_rows(n_cols: int, dtype: Any = np.float32, max_bytes: int = MATRIX_BLOCK_BYTES) -> int:
+    """Rows per block so one ``(rows, n_cols)`` block stays within *max_bytes*."""
+    return max(1, int(max_bytes) // max(1, n_cols * np.dtype(dtype).itemsize))
+
+
+def iter_distance_blocks(
+    sources: CoordinateArray,
+    destinations: CoordinateArray | None = None,
+    *,
+    detour_factor: float = 1.0,
+    dtype: Any = np.float32,
+    max_block_bytes: int = MATRIX_BLOCK_BYTES,
+) -> Iterator[np.ndarray]:
+    """Yield consecutive row blocks of the ``(len(sources), len(destinations))`` matrix in km.
+
+    *destinations* defaults to *sources*. Every block is C-contiguous, so
+    ``block.tobytes()`` concatenates into the row-major matrix.
+    """
+    src = np.asarray(sources, dtype=np.float64).reshape(-1, 2)
+    dst = src if destinations is None else np.asarray(destinations, dtype=np.float64).reshape(-1, 2)
+    step = block_rows(len(dst), dtype, max_block_bytes)
+    for start in range(0, len(src), step):
+        block = GeoClustering.haversine_many_to_many(
+            src[start:start + step], dst, block_size=step, dtype=dtype
+        )
+        if detour_factor != 1.0:
+            block *= detour_factor
+        yield block
+
+
+def distance_matrix(
+    sources: CoordinateArray,
+    destinations: CoordinateArray | None = None,
+    *,
+    detour_factor: float = 1.0,
+    dtype: Any = np.float32,
+    max_block_bytes: int = MATRIX_BLOCK_BYTES,
+) -> np.ndarray:
+    """Return the full distance matrix in km, filled block by block."""
+    src = np.asarray(sources, dtype=np.float64).reshape(-1, 2)
+    n_cols = len(src) if destinations is None else len(np.asarray(destinations).reshape(-1, 2))
+    out = np.empty((len(src), n_cols), dtype=dtype)
+    row = 0
+    for block in iter_distance_blocks(
+        src, destinations, detour_factor=detour_factor, dtype=dtype, max_block_bytes=max_block_bytes
+    ):
+        out[row:row + len(block)] = block
+        row += len(block)
+    return out
@@ -0,0 +1,390 @@
+"""
+Incremental re-clustering of a changing order set.
+
+`GridIndex` buckets orders into fixed-size lon/lat cells and records which
+cells changed since it was last drained. `IncrementalClusterer` keeps one
+client's active orders for one model (and capacity cap) together with the capped
+sub-clusters of the last run. After orders are added or removed, only the
+sub-clusters with members in a dirty cell or the ring of cells around it
+are pooled with the new orders and re-split; every other sub-cluster is
+reused as it was. The cost of a new order is then its nearest-center
+lookup plus re-splitting a few neighbouring sub-clusters, not its whole
+model cluster or the city.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Sequence, Set, Tuple
+
+import numpy as np
+
+from route_generator import CoordinateArray, CoordinateTuple, GeoClustering
+
+Cell = Tuple[int, int]
+
+# Cell edge in degrees; 0.01 deg is about 1.1 km north-south.
+GRID_CELL_DEG = 0.01
+# Rings of cells around a dirty cell whose sub-clusters are re-split with it.
+REPAIR_RINGS = 1
+
+
+def default_cell_deg() -> float:
+    """Grid cell size from ``GEOCLUSTER_GRID_CELL_DEG`` (default `GRID_CELL_DEG`)."""
+    return float(os.environ.get("GEOCLUSTER_GRID_CELL_DEG", GRID_CELL_DEG))
+
+
+class GridIndex:
+    """Orders bucketed by grid cell, with per-cell change tracking.
+
+    Every `add` or `remove` marks the orders' cells dirty and attaches the
+    caller's *tags* (e.g. the cluster labels involved) to them;
+    `pop_dirty` hands those back and starts a new round.
+
+    Parameters
+    ----------
+    cell_deg : float
+        Cell edge in degrees of longitude and latitude.
+    """
+
+    def __init__(self, cell_deg: float = GRID_CELL_DEG) -> None:
+        if cell_deg <= 0:
+            raise ValueError("cell_deg must be positive")
+        self.cell_deg = float(cell_deg)
+        self._cells: Dict[Cell, Set[int]] = {}
+        self._cell_of: Dict[int, Cell] = {}
+        self._dirty: Dict[Cell, Set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._cell_of)
+
+    def __contains__(self, order_id: int) -> bool:
+        return order_id in self._cell_of
+
+    def cells_of(self, coords: CoordinateArray) -> List[Cell]:
+        """Cell key ``(ix, iy)`` of every ``(lon, lat)`` row of *coords*."""
+        xy = np.floor(np.asarray(coords, dtype=np.float64).reshape(-1, 2) / self.cell_deg)
+        return list(map(tuple, xy.astype(np.int64).tolist()))
+
+    def add(self, ids: Sequence[int], coords: CoordinateArray, tags: Sequence[int] | None = None) -> None:
+        """Index orders *ids* at *coords*; raise ``KeyError`` if one is already indexed."""
+        cells = self.cells_of(coords)
+        if len(cells) != len(ids):
+            raise ValueError("ids and coords must have the same length")
+        for k, (order_id, cell) in enumerate(zip(ids, cells)):
+            if order_id in self._cell_of:
+                raise KeyError(order_id)
+            self._cell_of[order_id] = cell
+            self._cells.setdefault(cell, set()).add(order_id)
+            self._mark(cell, None if tags is None else tags[k])
+
+    def remove(self, ids: Iterable[int], tags: Sequence[int] | None = None) -> None:
+        """Drop orders *ids*; raise ``KeyError`` for unknown ids."""
+        for k, order_id in enumerate(ids):
+            cell = self._cell_of.pop(order_id)
+            members = self._cells[cell]
+            members.discard(order_id)
+            if not members:
+                del self._cells[cell]
+            self._mark(cell, None if tags is None else tags[k])
+
+    def _mark(self, cell: Cell, tag: int | None) -> None:
+        tags = self._dirty.setdefault(cell, set())
+        if tag is not None:
+            tags.add(int(tag))
+
+    def nearby(self, cell: Cell, rings: int = 1) -> List[int]:
+        """Ids of orders in *cell* and the *rings* of cells around it."""
+        ix, iy = cell
+        out: List[int] = []
+        for dx in range(-rings, rings + 1):
+            for dy in range(-rings, rings + 1):
+                out.extend(self._cells.get((ix + dx, iy + dy), ()))
+        return out
+
+    def pop_dirty(self) -> Dict[Cell, Set[int]]:
+        """Return ``{cell: tags}`` for every cell changed since the last call and reset."""
+        dirty, self._dirty = self._dirty, {}
+        return dirty
+
+    def clear(self) -> None:
+        self._cells.clear()
+        self._cell_of.clear()
+        self._dirty.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cell_deg": self.cell_deg,
+            "orders": len(self._cell_of),
+            "cells": len(self._cells),
+            "dirty_cells": len(self._dirty),
+        }
+
+
+class IncrementalClusterer:
+    """Active orders of one model, re-clustered only where they changed.
+
+    Orders are assigned to the model's nearest center once, when added.
+    Each model cluster is held as sub-clusters ("parts") of at most the
+    cap. `clusters` pools, per model cluster, the new orders with the parts
+    that have members within `REPAIR_RINGS` cells of a dirty cell (or lost
+    a member), re-splits only that pool with
+    `GeoClustering.capacity_constrained_clusters`, and reuses every other
+    part. Without a cap, or for noise, a model cluster is a single part.
+    Not thread-safe on its own; callers serialise access with `lock`.
+
+    Parameters
+    ----------
+    model : GeoClustering
+        Loaded model whose centers define the clusters.
+    max_points_per_cluster : int | None
+        Split clusters larger than this, as ``/predict`` does; ``None``
+        keeps model clusters whole.
+    cell_deg : float
+        Grid cell size for change tracking.
+    """
+
+    def __init__(
+        self,
+        model: GeoClustering,
+        max_points_per_cluster: int | None = None,
+        cell_deg: float = GRID_CELL_DEG,
+    ) -> None:
+        self.model = model
+        self.max_points_per_cluster = max_points_per_cluster
+        self.grid = GridIndex(cell_deg)
+        self.lock = threading.Lock()
+        self._coords: Dict[int, CoordinateTuple] = {}
+        self._label: Dict[int, int] = {}
+        self._by_key: Dict[CoordinateTuple, List[int]] = {}
+        # Orders not yet placed in a part, by label (dicts as ordered sets)
+        self._pending: Dict[int, Dict[int, None]] = {}
+        # part id -> (label, member ids, formatted output cluster without cluster_id)
+        self._parts: Dict[int, Tuple[int, Dict[int, None], Dict[str, Any]]] = {}
+        self._part_of: Dict[int, int] = {}
+        # label -> its part ids in creation order
+        self._label_parts: Dict[int, Dict[int, None]] = {}
+        self._changed_parts: Set[int] = set()
+        self._next_id = 0
+        self._next_part = 0
+        self._stats = {
+            "runs": 0, "parts_recomputed": 0, "parts_reused": 0, "orders_resplit": 0,
+            "added": 0, "removed": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._coords)
+
+    def _whole(self, lbl: int) -> bool:
+        """Whether model cluster *lbl* is kept as one part (no cap, or noise)."""
+        return not self.max_points_per_cluster or lbl < 0
+
+    # ------------------------------------------------------------------
+    def add(self, coords: CoordinateArray) -> np.ndarray:
+        """Add orders at *coords* and return their new ids."""
+        pts = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        ids = np.arange(self._next_id, self._next_id + len(pts))
+        self._next_id += len(pts)
+        if not len(pts):
+            return ids
+        labels = self.model.predict_cluster(pts).tolist()
+        ids_list = ids.tolist()
+        for order_id, key, lbl in zip(ids_list, map(tuple, pts.tolist()), labels):
+            self._coords[order_id] = key
+            self._label[order_id] = lbl
+            self._pending.setdefault(lbl, {})[order_id] = None
+            self._by_key.setdefault(key, []).append(order_id)
+        self.grid.add(ids_list, pts, labels)
+        self._stats["added"] += len(ids_list)
+        return ids
+
+    def remove(self, ids: Iterable[int]) -> None:
+        """Remove orders *ids*; raise ``KeyError`` for unknown ids."""
+        ids = [int(i) for i in ids]
+        labels = []
+        for order_id in ids:
+            key = self._coords.pop(order_id)
+            lbl = self._label.pop(order_id)
+            labels.append(lbl)
+            part = self._part_of.pop(order_id, None)
+            if part is None:
+                del self._pending[lbl][order_id]
+            else:
+                del self._parts[part][1][order_id]
+                self._changed_parts.add(part)
+            same = self._by_key[key]
+            same.remove(order_id)
+            if not same:
+                del self._by_key[key]
+        self.grid.remove(ids, labels)
+        self._stats["removed"] += len(ids)
+
+    def sync(self, coords: CoordinateArray) -> Tuple[int, int]:
+        """Make the active set equal *coords* (a multiset of points).
+
+        Orders are matched by exact coordinate value, so only the
+        difference against the current set is added or removed. Returns
+        ``(added, removed)``.
+        """
+        pts = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        wanted = Counter(map(tuple, pts.tolist()))
+        drop: List[int] = []
+        for key, ids in self._by_key.items():
+            surplus = len(ids) - wanted.get(key, 0)
+            if surplus > 0:
+                drop.extend(ids[-surplus:])
+        new: List[CoordinateTuple] = []
+        for key, count in wanted.items():
+            missing = count - len(self._by_key.get(key, ()))
+            if missing > 0:
+                new.extend([key] * missing)
+        if drop:
+            self.remove(drop)
+        if new:
+            self.add(np.asarray(new, dtype=np.float64))
+        return len(new), len(drop)
+
+    # ------------------------------------------------------------------
+    def _touched_parts(self) -> Set[int]:
+        """Parts to re-split: those that lost members, or have members near a dirty cell."""
+        touched, self._changed_parts = self._changed_parts, set()
+        for cell, tags in self.grid.pop_dirty().items():
+            if all(self._whole(lbl) for lbl in tags):
+                # Whole clusters are re-split anyway; no need to look around
+                continue
+            for order_id in self.grid.nearby(cell, REPAIR_RINGS):
+                part = self._part_of.get(order_id)
+                if part is not None and self._label[order_id] in tags:
+                    touched.add(part)
+        return touched
+
+    def _split(self, lbl: int, ids: List[int]) -> List[Tuple[Tuple[float, float], List[int]]]:
+        """Split orders *ids* of model cluster *lbl* into ``(center, ids)`` parts."""
+        pts = np.array([self._coords[i] for i in ids], dtype=np.float64)
+        cap = self.max_points_per_cluster
+        if self._whole(lbl):
+            if 0 <= lbl < len(self.model.cluster_centers):
+                c_lon, c_lat = self.model.cluster_centers[lbl]
+            else:
+                c_lon, c_lat = 0.0, 0.0
+            return [((float(c_lon), float(c_lat)), ids)]
+        if len(pts) <= cap:
+            return [(tuple(pts.mean(axis=0).tolist()), ids)]
+        labels, centers = self.model.capacity_constrained_clusters(pts, cap)
+        order = np.argsort(labels, kind="stable")
+        bounds = np.cumsum(np.bincount(labels, minlength=len(centers)))[:-1]
+        ids_array = np.asarray(ids)
+        return [(center, sub.tolist()) for center, sub in zip(centers, np.split(ids_array[order], bounds))]
+
+    def clusters(self) -> List[Dict[str, Any]]:
+        """Return the formatted clusters of the active orders, re-splitting only dirty parts.
+
+        Clusters come in model-label order, then in the order their parts
+        were made, with members in arrival order. Without a cap the model
+        cluster ids are kept; with one, clusters are numbered sequentially
+        as in ``/predict``. Noise keeps id -1.
+        """
+        pools: Dict[int, List[int]] = {lbl: list(ids) for lbl, ids in self._pending.items() if ids}
+        self._pending = {}
+        stale: Dict[int, List[int]] = {}
+        for part in self._touched_parts():
+            stale.setdefault(self._parts[part][0], []).append(part)
+        for lbl in list(pools):
+            if self._whole(lbl):
+                # A whole cluster is a single part, so it is rebuilt in full
+                stale[lbl] = list(self._label_parts.get(lbl, ()))
+        for lbl, parts in stale.items():
+            pool = pools.setdefault(lbl, [])
+            for part in parts:
+                pool.extend(self._parts.pop(part)[1])
+                del self._label_parts[lbl][part]
+            if lbl in self._label_parts and not self._label_parts[lbl]:
+                del self._label_parts[lbl]
+
+        created = 0
+        for lbl, pool in pools.items():
+            if not pool:
+                continue
+            pool.sort()  # ids grow with arrival
+            self._stats["orders_resplit"] += len(pool)
+            for (c_lon, c_lat), ids in self._split(lbl, pool):
+                part = self._next_part
+                self._next_part += 1
+                self._parts[part] = (
+                    lbl,
+                    dict.fromkeys(ids),
+                    {
+                        "cluster_center": {"lon": c_lon, "lat": c_lat},
+                        "coordinates": [{"lon": self._coords[i][0], "lat": self._coords[i][1]} for i in ids],
+                    },
+                )
+                self._label_parts.setdefault(lbl, {})[part] = None
+                self._part_of.update(dict.fromkeys(ids, part))
+                created += 1
+        self._stats["runs"] += 1
+        self._stats["parts_recomputed"] += created
+        self._stats["parts_reused"] += len(self._parts) - created
+
+        result: List[Dict[str, Any]] = []
+        next_id = 0
+        for lbl in sorted(self._label_parts):
+            for part in self._label_parts[lbl]:
+                cluster = self._parts[part][2]
+                if self._whole(lbl):
+                    result.append({"cluster_id": lbl, **cluster})
+                else:
+                    result.append({"cluster_id": next_id, **cluster})
+                    next_id += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model_version": self.model.model_version,
+            "max_points_per_cluster": self.max_points_per_cluster,
+            "orders": len(self._coords),
+            "clusters": len(self._parts),
+            **self._stats,
+            "grid": self.grid.stats(),
+        }
+
+
+class IncrementalClusterers:
+    """`IncrementalClusterer` slots keyed by client state key, model version and cap.
+
+    Incremental state is per client: each caller diffs against the order
+    set it sent last, under its own *state_key*, so two clients never
+    re-split each other's orders or shuffle each other's sub-cluster ids.
+    The least recently used slot is dropped once more than *max_slots*
+    are in use, which also retires slots of replaced models and of clients
+    that went away; their next call then starts from a full split.
+    """
+
+    def __init__(self, max_slots: int = 64, cell_deg: float = GRID_CELL_DEG) -> None:
+        self.max_slots = max(1, int(max_slots))
+        self.cell_deg = cell_deg
+        self._slots: Dict[Tuple[str, str, int | None], IncrementalClusterer] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "IncrementalClusterers":
+        """Build from ``GEOCLUSTER_INCREMENTAL_SLOTS`` and ``GEOCLUSTER_GRID_CELL_DEG``."""
+        return cls(int(os.environ.get("GEOCLUSTER_INCREMENTAL_SLOTS", 64)), default_cell_deg())
+
+    def get(
+        self, state_key: str, model: GeoClustering, max_points_per_cluster: int | None = None
+    ) -> IncrementalClusterer:
+        key = (state_key, model.model_version, max_points_per_cluster or None)
+        with self._lock:
+            clusterer = self._slots.pop(key, None)
+            if clusterer is None:
+                clusterer = IncrementalClusterer(model, max_points_per_cluster, self.cell_deg)
+            self._slots[key] = clusterer
+            while len(self._slots) > self.max_slots:
+                del self._slots[next(iter(self._slots))]
+            return clusterer
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [{"state_key": key[0], **c.stats()} for key, c in self._slots.items()]
@@ -0,0 +1,137 @@
+"""
+Micro-batching of small concurrent prediction requests.
+
+`MicroBatcher` holds requests that arrive within a short window (or until
+the batch is full), concatenates their coordinates, runs one vectorized
+nearest-center assignment per model and hands each caller its own slice
+of the labels. Requests served by different model instances (e.g. across a
+retrain swap) are never mixed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+import numpy as np
+
+from route_generator import GeoClustering
+
+Runner = Callable[..., Awaitable[Any]]
+
+
+class MicroBatcher:
+    """Coalesce concurrent ``predict_cluster`` calls into batched ones.
+
+    Parameters
+    ----------
+    window : float
+        Seconds to wait for more requests after the first one arrives.
+    max_batch_size : int
+        Requests per batch; a full batch is flushed immediately.
+    max_points : int
+        Requests with more points than this gain nothing from batching and
+        should bypass it (see `accepts`).
+    runner : callable
+        ``await runner(fn, *args)`` executes the batched prediction, e.g. on
+        the service's bounded compute pool.
+    """
+
+    def __init__(self, window: float, max_batch_size: int, max_points: int, runner: Runner) -> None:
+        self.window = window
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_points = max_points
+        self._runner = runner
+        self._pending: List[Tuple[GeoClustering, np.ndarray, asyncio.Future, float]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set = set()
+        self._stats = {"batches": 0, "requests": 0, "points": 0, "max_batch_size": 0,
+                       "total_wait_ms": 0.0, "max_wait_ms": 0.0}
+
+    @classmethod
+    def from_env(cls, runner: Runner) -> "MicroBatcher | None":
+        """Build from ``GEOCLUSTER_MICROBATCH_WINDOW_MS`` (unset or ``0`` disables
+        batching), ``GEOCLUSTER_MICROBATCH_MAX_SIZE`` and
+        ``GEOCLUSTER_MICROBATCH_MAX_POINTS``."""
+        window_ms = float(os.environ.get("GEOCLUSTER_MICROBATCH_WINDOW_MS", 0))
+        if window_ms <= 0:
+            return None
+        return cls(
+            window_ms / 1000.0,
+            int(os.environ.get("GEOCLUSTER_MICROBATCH_MAX_SIZE", 64)),
+            int(os.environ.get("GEOCLUSTER_MICROBATCH_MAX_POINTS", 4096)),
+            runner,
+        )
+
+    # ------------------------------------------------------------------
+    def accepts(self, n_points: int) -> bool:
+        return n_points <= self.max_points
+
+    async def predict(self, model: GeoClustering, coords: np.ndarray) -> np.ndarray:
+        """Return ``model.predict_cluster(coords)``, computed as part of a batch."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((model, coords, future, time.perf_counter()))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[GeoClustering, np.ndarray, asyncio.Future, float]]) -> None:
+        started = time.perf_counter()
+        waits_ms = [(started - enqueued) * 1000.0 for _, _, _, enqueued in batch]
+        self._stats["batches"] += 1
+        self._stats["requests"] += len(batch)
+        self._stats["points"] += sum(len(coords) for _, coords, _, _ in batch)
+        self._stats["max_batch_size"] = max(self._stats["max_batch_size"], len(batch))
+        self._stats["total_wait_ms"] += sum(waits_ms)
+        self._stats["max_wait_ms"] = max(self._stats["max_wait_ms"], max(waits_ms))
+
+        by_model: Dict[int, List[Tuple[GeoClustering, np.ndarray, asyncio.Future, float]]] = {}
+        for item in batch:
+            by_model.setdefault(id(item[0]), []).append(item)
+
+        for items in by_model.values():
+            model = items[0][0]
+            coords = np.concatenate([c for _, c, _, _ in items]) if len(items) > 1 else items[0][1]
+            try:
+                labels = await self._runner(model.predict_cluster, coords)
+            except Exception as e:
+                for _, _, future, _ in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            bounds = np.cumsum([len(c) for _, c, _, _ in items])[:-1]
+            for (_, _, future, _), part in zip(items, np.split(labels, bounds)):
+                if not future.done():
+                    future.set_result(part)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return batch-size and wait-time metrics."""
+        batches = self._stats["batches"]
+        requests = self._stats["requests"]
+        return {
+            "window_ms": self.window * 1000.0,
+            "max_batch_size_limit": self.max_batch_size,
+            "max_points": self.max_points,
+            "batches": batches,
+            "requests": requests,
+            "points": self._stats["points"],
+            "avg_batch_size": requests / batches if batches else 0.0,
+            "max_batch_size": self._stats["max_batch_size"],
+            "avg_wait_ms": self._stats["total_wait_ms"] / requests if requests else 0.0,
+            "max_wait_ms": self._stats["max_wait_ms"],
+        }
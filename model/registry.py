@@ -0,0 +1,258 @@
+"""
+In-memory registry of immutable, versioned `GeoClustering` models.
+
+Every model is registered under its `GeoClustering.model_version` (a hash of
+its centers), kept loaded, and never mutated afterwards. One version is
+active at a time; switching it, or rolling back to the previously active
+one, is a single reference assignment, so requests that already resolved a
+model keep using it. A background thread watches the artifact directory
+for new ``.gcm`` artifacts (see artifact.py) or legacy ``<name>.pkl`` /
+``<name>.json`` pairs and loads them without a restart. The active version
+is written to an ``ACTIVE`` file so restarts come back on the same model.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from artifact import ARTIFACT_SUFFIX
+from route_generator import GeoClustering
+
+ACTIVE_POINTER = "ACTIVE"
+
+
+class ModelRegistry:
+    """Hold several loaded model versions and switch between them atomically.
+
+    Parameters
+    ----------
+    model_dir : str | Path
+        Directory of saved artifacts; trained models are written here and
+        new files dropped here are picked up by `scan`.
+    max_versions : int
+        Versions kept in memory. The oldest inactive ones are dropped first;
+        the active version and the rollback target are always kept.
+    auto_activate : bool
+        Activate artifacts that appear in *model_dir* after start-up.
+
+    Attributes
+    ----------
+    on_evict : callable | None
+        Called with each version dropped from memory, e.g. to release
+        results cached for it.
+    """
+
+    def __init__(self, model_dir: str | Path, max_versions: int = 5, auto_activate: bool = True) -> None:
+        self.model_dir = Path(model_dir)
+        self.max_versions = max(2, int(max_versions))
+        self.auto_activate = auto_activate
+        self._models: "OrderedDict[str, GeoClustering]" = OrderedDict()
+        self._info: Dict[str, Dict[str, Any]] = {}
+        self._active_version: str | None = None
+        self._active: GeoClustering | None = None
+        self._history: List[str] = []
+        self._seen: Dict[Path, float] = {}
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._watcher: threading.Thread | None = None
+        self.on_evict: Callable[[str], None] | None = None
+
+    @classmethod
+    def from_env(cls) -> "ModelRegistry":
+        """Build from ``GEOCLUSTER_MODEL_DIR``, ``GEOCLUSTER_MAX_MODEL_VERSIONS``
+        and ``GEOCLUSTER_MODEL_AUTO_ACTIVATE``."""
+        return cls(
+            os.environ.get("GEOCLUSTER_MODEL_DIR", "model_versions"),
+            int(os.environ.get("GEOCLUSTER_MAX_MODEL_VERSIONS", 5)),
+            os.environ.get("GEOCLUSTER_MODEL_AUTO_ACTIVATE", "1") not in ("0", "false", "False"),
+        )
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+    @property
+    def active(self) -> GeoClustering | None:
+        return self._active
+
+    @property
+    def active_version(self) -> str | None:
+        return self._active_version
+
+    def get(self, version: str) -> GeoClustering:
+        """Return the loaded model for *version*; raise ``KeyError`` if unknown."""
+        with self._lock:
+            return self._models[version]
+
+    def describe(self) -> List[Dict[str, Any]]:
+        """Return one summary dict per loaded version, oldest first."""
+        with self._lock:
+            return [
+                {
+                    "version": version,
+                    "active": version == self._active_version,
+                    "n_clusters": len(model.cluster_centers),
+                    "cluster_method": model.cluster_method,
+                    **self._info[version],
+                }
+                for version, model in self._models.items()
+            ]
+
+    # ------------------------------------------------------------------
+    # Registration & switching
+    # ------------------------------------------------------------------
+    def register(self, model: GeoClustering, *, source: str | None = None, activate: bool = False) -> str:
+        """Add a fully built *model* and return its version id."""
+        version = model.model_version
+        with self._lock:
+            if version not in self._models:
+                self._models[version] = model
+                self._info[version] = {
+                    "source": source,
+                    "registered": datetime.now().isoformat(),
+                }
+            if activate:
+                self.activate(version)
+            self._evict()
+        return version
+
+    def save(self, model: GeoClustering, *, activate: bool = True) -> str:
+        """Write *model* as a new immutable artifact in ``model_dir`` and register it."""
+        self.model_dir.mkdir(parents=True, exist_ok=True)
+        version = model.model_version
+        model_path = self.model_dir / f"{version}{ARTIFACT_SUFFIX}"
+        model.save_artifact(model_path)
+        with self._lock:
+            self._seen[model_path] = model_path.stat().st_mtime
+        return self.register(model, source=str(model_path), activate=activate)
+
+    def activate(self, version: str) -> None:
+        """Make *version* the model served by default."""
+        with self._lock:
+            model = self._models[version]
+            if version == self._active_version:
+                return
+            if self._active_version is not None:
+                self._history.append(self._active_version)
+            self._active_version, self._active = version, model
+            self._write_pointer(version)
+
+    def rollback(self) -> str:
+        """Re-activate the previously active version and return its id."""
+        with self._lock:
+            while self._history:
+                version = self._history.pop()
+                if version in self._models and version != self._active_version:
+                    self._active_version, self._active = version, self._models[version]
+                    self._write_pointer(version)
+                    return version
+            raise LookupError("No previous model version to roll back to")
+
+    def _evict(self) -> None:
+        protected = {self._active_version, self._history[-1] if self._history else None}
+        for version in list(self._models):
+            if len(self._models) <= self.max_versions:
+                break
+            if version not in protected:
+                del self._models[version]
+                del self._info[version]
+                if self.on_evict is not None:
+                    self.on_evict(version)
+
+    def _write_pointer(self, version: str) -> None:
+        try:
+            self.model_dir.mkdir(parents=True, exist_ok=True)
+            tmp = self.model_dir / (ACTIVE_POINTER + ".tmp")
+            tmp.write_text(version, encoding="utf-8")
+            os.replace(tmp, self.model_dir / ACTIVE_POINTER)
+        except OSError:
+            # Read-only deployments can still switch versions in memory
+            pass
+
+    # ------------------------------------------------------------------
+    # Artifact discovery
+    # ------------------------------------------------------------------
+    def load_artifact(
+        self, model_path: str | Path, metadata_path: str | Path | None = None, *, activate: bool = False
+    ) -> str:
+        """Load a ``.gcm`` artifact or a ``.pkl`` / ``.json`` pair and register it."""
+        model_path = Path(model_path)
+        model = GeoClustering()
+        if model_path.suffix == ARTIFACT_SUFFIX:
+            model.load_artifact(model_path)
+        else:
+            model.load_model(model_path, metadata_path)
+        return self.register(model, source=str(model_path), activate=activate)
+
+    def scan(self, *, activate_new: bool | None = None) -> List[str]:
+        """Load artifacts in ``model_dir`` not seen before; return their versions.
+
+        A legacy pickle counts once its ``.json`` exists (`save_model` renames
+        it into place last). New versions are activated when *activate_new* (by
+        default ``auto_activate``) is true, newest file last.
+        """
+        if activate_new is None:
+            activate_new = self.auto_activate
+        if not self.model_dir.is_dir():
+            return []
+        # Runs on the watcher thread while `save` records files from request
+        # threads; artifacts are loaded outside the lock
+        with self._lock:
+            seen = dict(self._seen)
+        candidates = []
+        for model_path in self.model_dir.iterdir():
+            is_pickle = model_path.suffix == ".pkl" and model_path.with_suffix(".json").exists()
+            if not (is_pickle or model_path.suffix == ARTIFACT_SUFFIX):
+                continue
+            mtime = model_path.stat().st_mtime
+            if seen.get(model_path) != mtime:
+                candidates.append((mtime, model_path))
+
+        loaded = []
+        for mtime, model_path in sorted(candidates):
+            with self._lock:
+                if self._seen.get(model_path) == mtime:
+                    # Recorded by `save` since the listing above
+                    continue
+            try:
+                loaded.append(self.load_artifact(model_path, activate=activate_new))
+            except Exception as e:
+                print(f"Skipping model artifact {model_path}: {e}")
+            with self._lock:
+                self._seen[model_path] = mtime
+        return loaded
+
+    def restore_active(self) -> bool:
+        """Activate the version named in the ``ACTIVE`` file, if it is loaded."""
+        pointer = self.model_dir / ACTIVE_POINTER
+        if not pointer.exists():
+            return False
+        version = pointer.read_text(encoding="utf-8").strip()
+        with self._lock:
+            if version not in self._models:
+                return False
+            self.activate(version)
+            return True
+
+    def start_watching(self, interval: float) -> None:
+        """Poll ``model_dir`` every *interval* seconds in a daemon thread."""
+        if interval <= 0 or (self._watcher is not None and self._watcher.is_alive()):
+            return
+        self._stop.clear()
+
+        def _watch() -> None:
+            while not self._stop.wait(interval):
+                try:
+                    self.scan()
+                except Exception as e:
+                    print(f"Model directory scan failed: {e}")
+
+        self._watcher = threading.Thread(target=_watch, name="model-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop.set()
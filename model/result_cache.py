@@ -0,0 +1,136 @@
+"""
+Bounded cache for encoded prediction results.
+
+Entries are keyed by the model version, the request options and a digest of
+the coordinates, and usually hold pre-encoded JSON (one bytes object per
+cluster, shared by streamed and plain responses). Eviction is LRU under
+both an entry-count and a byte-size cap, and entries also expire after a
+TTL. Because the model version is part of every key, installing a new
+model can never serve stale results; `discard` releases the entries of
+versions that are no longer loaded.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+import numpy as np
+
+
+def coordinates_digest(coords: np.ndarray) -> str:
+    """Return a digest of *coords* as contiguous little-endian float64 ``(lon, lat)`` rows.
+
+    The digest is order-sensitive on purpose: responses list clusters and
+    points in input order, so a permuted request is a different result.
+    """
+    arr = np.ascontiguousarray(coords, dtype="<f8")
+    return hashlib.blake2b(arr.tobytes(), digest_size=16).hexdigest()
+
+
+class ResultCache:
+    """Thread-safe LRU + TTL cache with a total size cap.
+
+    Values are sized with ``len(value)`` unless an explicit ``size`` is
+    given to `put`, which lets callers cache small wrappers around encoded
+    bytes.
+
+    Parameters
+    ----------
+    max_entries : int
+        Maximum number of cached results; ``0`` disables caching.
+    max_bytes : int
+        Maximum total size of cached values. Values larger than this are
+        never stored.
+    ttl : float | None
+        Seconds an entry stays valid, or ``None`` for no expiry.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float | None = None) -> None:
+        self.max_entries = max(0, int(max_entries))
+        self.max_bytes = max(0, int(max_bytes))
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        """Build from ``GEOCLUSTER_CACHE_MAX_ENTRIES``, ``GEOCLUSTER_CACHE_MAX_BYTES``
+        and ``GEOCLUSTER_CACHE_TTL`` (seconds, ``0`` for no expiry)."""
+        return cls(
+            int(os.environ.get("GEOCLUSTER_CACHE_MAX_ENTRIES", 256)),
+            int(os.environ.get("GEOCLUSTER_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+            float(os.environ.get("GEOCLUSTER_CACHE_TTL", 300)) or None,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    # ------------------------------------------------------------------
+    def get(self, key: Hashable) -> Any | None:
+        """Return the cached value for *key*, or ``None`` on a miss."""
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < now:
+                self._drop(key)
+                self._stats["expirations"] += 1
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any, size: int | None = None) -> None:
+        """Store *value* under *key*, evicting least recently used entries."""
+        size = len(value) if size is None else int(size)
+        if not self.enabled or size > self.max_bytes:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl else float("inf")
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (expires, value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def discard(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every entry whose key matches *predicate*; return how many were dropped."""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self._drop(key)
+            self._stats["invalidations"] += len(keys)
+            return len(keys)
+
+    def _drop(self, key: Hashable) -> None:
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size, limits and hit/miss counters."""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+                **self._stats,
+            }
@@ -6,18 +6,86 @@ This file exposes the `GeoClustering` class which is consumed by
 
 from __future__ import annotations
 
+import hashlib
 import json
+import os
 import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from math import atan2, cos, radians, sin, sqrt
+from math import atan2, ceil, cos, radians, sin, sqrt
 from pathlib import Path
-from typing import Any, Dict, List, Sequence, Tuple, Union
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Sequence, Tuple, Union
 
 import numpy as np
-from sklearn.cluster import DBSCAN, KMeans
-from sklearn.metrics import silhouette_score
+
+from artifact import read_artifact, read_core_points, write_artifact
+
+# sklearn and scipy.spatial take most of a cold start to import and are only
+# needed to train, or to predict with very many centers, so they are imported
+# where they are used. Serving a loaded model imports NumPy alone.
+if TYPE_CHECKING:
+    from scipy.spatial import cKDTree
+    from sklearn.cluster import KMeans
+    from sklearn.neighbors import BallTree
 
 CoordinateTuple = Tuple[float, float]  # (lon, lat)
+CoordinateArray = Union[np.ndarray, Sequence[CoordinateTuple]]
+ProgressCallback = Callable[[int, int], None]  # (steps done, total steps)
+
+EARTH_RADIUS_KM = 6371.0
+
+# Below this many points a process pool costs more than it saves.
+PARALLEL_MIN_POINTS = 2000
+# From this many centers nearest-center lookup goes through a KD-tree.
+KDTREE_MIN_CENTERS = 256
+# Rows per block for the brute-force nearest-center argmin.
+PREDICT_BLOCK_ROWS = 65536
+
+
+def nearest_rows(X: np.ndarray, centers: np.ndarray) -> np.ndarray:
+    """Index of the closest row of *centers* for every row of *X* (both ``(n, 2)``).
+
+    A blocked brute-force argmin of ``||x - c||^2`` without the per-row
+    ``||x||^2`` term, which cannot change the argmin; this is the same
+    expansion KMeans.predict evaluates.
+    """
+    labels = np.empty(len(X), dtype=np.int32)
+    neg_two_ct = -2.0 * centers.T
+    c_sq = (centers ** 2).sum(axis=1)
+    for start in range(0, len(X), PREDICT_BLOCK_ROWS):
+        d2 = X[start:start + PREDICT_BLOCK_ROWS] @ neg_two_ct
+        d2 += c_sq
+        labels[start:start + PREDICT_BLOCK_ROWS] = d2.argmin(axis=1)
+    return labels
+
+
+def _score_k(
+    coords_array: np.ndarray, k: int, sample_size: int | None, random_state: int
+) -> Tuple[int, float, float, KMeans]:
+    """Fit one KMeans candidate and return ``(k, silhouette, seconds, model)``.
+
+    Lives at module level so it can be shipped to ``ProcessPoolExecutor``
+    workers. BLAS/OpenMP threads are pinned to one per worker to avoid
+    oversubscribing the machine when several candidates run side by side.
+    """
+    from sklearn.cluster import KMeans
+    from sklearn.metrics import silhouette_score
+    from threadpoolctl import threadpool_limits
+
+    start = time.perf_counter()
+    with threadpool_limits(limits=1):
+        model = KMeans(n_clusters=k, random_state=random_state, n_init=10)
+        labels = model.fit_predict(coords_array)
+        try:
+            score = float(
+                silhouette_score(
+                    coords_array, labels, sample_size=sample_size, random_state=random_state
+                )
+            )
+        except Exception:
+            score = -1.0
+    return k, score, time.perf_counter() - start, model
 
 
 class GeoClustering:
@@ -26,7 +94,9 @@ class GeoClustering:
     Parameters
     ----------
     cluster_method : str, default="kmeans"
-        One of ``{"kmeans", "dbscan", "distance"}``.
+        One of ``{"kmeans", "dbscan", "distance"}``. KMeans models predict
+        by nearest center; the other two by nearest core point within
+        ``eps_km``, with ``-1`` for noise.
     """
 
     def __init__(self, cluster_method: str = "kmeans") -> None:
@@ -34,6 +104,52 @@ class GeoClustering:
         self.model: Any = None  # Trained model instance (e.g. KMeans, DBSCAN)
         self.cluster_centers: List[CoordinateTuple] = []
         self.model_metadata: Dict[str, Any] = {}
+        self.set_core_points(None, None, None)
+
+    @property
+    def cluster_centers(self) -> List[CoordinateTuple]:
+        return self._cluster_centers
+
+    @cluster_centers.setter
+    def cluster_centers(self, centers: List[CoordinateTuple]) -> None:
+        self._cluster_centers = centers
+        self._center_index: Tuple[np.ndarray, cKDTree | None] | None = None
+        self._model_version: str | None = None
+
+    def set_core_points(
+        self, points: CoordinateArray | None, labels: Sequence[int] | None, eps_km: float | None
+    ) -> None:
+        """Set what DBSCAN/distance models predict from: core ``(lon, lat)``
+        points, their cluster labels and the radius ``eps_km`` (``None`` clears)."""
+        if points is None:
+            self.core_points = self.core_labels = self.eps_km = None
+        else:
+            self.core_points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+            self.core_labels = np.asarray(labels, dtype=np.int64).reshape(-1)
+            if len(self.core_points) != len(self.core_labels):
+                raise ValueError("points and labels must have the same length")
+            self.eps_km = float(eps_km)
+        self._core_index: BallTree | None = None
+        self._model_version = None
+
+    @property
+    def model_version(self) -> str:
+        """Short content hash of what predictions depend on (method, centers
+        and any core points).
+
+        Changes whenever ``cluster_centers`` or the core points are
+        reassigned to different values, so it can key caches of prediction
+        results.
+        """
+        if self._model_version is None:
+            digest = hashlib.blake2b(self.cluster_method.encode(), digest_size=8)
+            digest.update(np.ascontiguousarray(self.cluster_centers, dtype="<f8").tobytes())
+            if self.core_points is not None:
+                digest.update(np.float64(self.eps_km).tobytes())
+                digest.update(np.ascontiguousarray(self.core_points, dtype="<f8").tobytes())
+                digest.update(np.ascontiguousarray(self.core_labels, dtype="<i8").tobytes())
+            self._model_version = digest.hexdigest()
+        return self._model_version
 
     # ---------------------------------------------------------------------
     # Helpers
@@ -41,7 +157,7 @@ class GeoClustering:
     @staticmethod
     def haversine_distance(pt1: CoordinateTuple, pt2: CoordinateTuple) -> float:
         """Return Haversine distance in kilometres between two points."""
-        R = 6371  # Earth radius in km
+        R = EARTH_RADIUS_KM
         lon1, lat1 = map(radians, pt1)
         lon2, lat2 = map(radians, pt2)
         dlon = lon2 - lon1
@@ -49,34 +165,102 @@ class GeoClustering:
         a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlon / 2) ** 2
         return R * (2 * atan2(sqrt(a), sqrt(1 - a)))
 
+    @staticmethod
+    def _as_radians(coords: CoordinateArray, dtype: Any = np.float64) -> np.ndarray:
+        """Return *coords* as an ``(n, 2)`` array of ``(lon, lat)`` in radians."""
+        arr = np.asarray(coords, dtype=dtype).reshape(-1, 2)
+        return np.radians(arr)
+
+    @staticmethod
+    def haversine_rowwise(a: CoordinateArray, b: CoordinateArray) -> np.ndarray:
+        """Return Haversine distances (km) between matching rows of *a* and *b*."""
+        a_rad = GeoClustering._as_radians(a)
+        b_rad = GeoClustering._as_radians(b)
+        dlon = b_rad[:, 0] - a_rad[:, 0]
+        dlat = b_rad[:, 1] - a_rad[:, 1]
+        h = np.sin(dlat / 2) ** 2 + np.cos(a_rad[:, 1]) * np.cos(b_rad[:, 1]) * np.sin(dlon / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+    @staticmethod
+    def haversine_one_to_many(point: CoordinateTuple, coords: CoordinateArray) -> np.ndarray:
+        """Return Haversine distances (km) from *point* to every row of *coords*."""
+        lon1, lat1 = GeoClustering._as_radians(point)[0]
+        coords_rad = GeoClustering._as_radians(coords)
+        dlon = coords_rad[:, 0] - lon1
+        dlat = coords_rad[:, 1] - lat1
+        h = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(coords_rad[:, 1]) * np.sin(dlon / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+    @staticmethod
+    def haversine_many_to_many(
+        a: CoordinateArray,
+        b: CoordinateArray | None = None,
+        *,
+        block_size: int = 2048,
+        dtype: Any = np.float64,
+    ) -> np.ndarray:
+        """Return the ``(len(a), len(b))`` Haversine distance matrix in km.
+
+        Rows are computed in blocks of *block_size* so the temporaries stay
+        bounded at ``block_size * len(b)`` elements. Pass ``dtype=np.float32``
+        to halve memory when metre-level precision is not needed.
+        """
+        a_rad = GeoClustering._as_radians(a, dtype)
+        b_rad = a_rad if b is None else GeoClustering._as_radians(b, dtype)
+        out = np.empty((len(a_rad), len(b_rad)), dtype=dtype)
+        if out.size == 0:
+            return out
+
+        b_lon = b_rad[:, 0][None, :]
+        b_lat = b_rad[:, 1][None, :]
+        b_cos = np.cos(b_lat)
+        step = max(int(block_size), 1)
+        for start in range(0, len(a_rad), step):
+            blk = a_rad[start:start + step]
+            a_lat = blk[:, 1][:, None]
+            h = (
+                np.sin((b_lat - a_lat) / 2) ** 2
+                + np.cos(a_lat) * b_cos * np.sin((b_lon - blk[:, 0][:, None]) / 2) ** 2
+            )
+            np.clip(h, 0.0, 1.0, out=h)
+            out[start:start + step] = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(h))
+        return out
+
     # ------------------------------------------------------------------
     # Clustering implementations
     # ------------------------------------------------------------------
     def _create_clusters_dbscan(
         self, coordinates: List[CoordinateTuple], eps_km: float = 5.0, min_samples: int = 6
     ) -> Tuple[np.ndarray, List[CoordinateTuple]]:
-        if len(coordinates) < min_samples:
-            return np.array([-1] * len(coordinates)), []
-
-        coords_rad = np.radians([[lat, lon] for lon, lat in coordinates])
-        eps_rad = eps_km / 6371.0
-
-        dbscan = DBSCAN(eps=eps_rad, min_samples=min_samples, metric="haversine")
-        cluster_labels = dbscan.fit_predict(coords_rad)
-
-        centers: List[CoordinateTuple] = []
-        for label in set(cluster_labels):
-            if label == -1:
-                continue
-            cluster_points = [coordinates[i] for i, l in enumerate(cluster_labels) if l == label]
-            center_lon = sum(p[0] for p in cluster_points) / len(cluster_points)
-            center_lat = sum(p[1] for p in cluster_points) / len(cluster_points)
-            centers.append((center_lon, center_lat))
-        return cluster_labels, centers
+        """Haversine DBSCAN. Core samples and their labels are kept so the
+        model can label new points (see `nearest_core`)."""
+        from sklearn.cluster import DBSCAN
+
+        coords_array = np.asarray(coordinates, dtype=float).reshape(-1, 2)
+        self.model_metadata.update({"eps_km": eps_km, "min_samples": min_samples})
+        if len(coords_array) < min_samples:
+            self.set_core_points(np.empty((0, 2)), [], eps_km)
+            return np.full(len(coords_array), -1, dtype=int), []
+
+        dbscan = DBSCAN(eps=eps_km / EARTH_RADIUS_KM, min_samples=min_samples, metric="haversine")
+        cluster_labels = dbscan.fit_predict(np.radians(coords_array[:, ::-1]))
+        self.model = dbscan
+
+        core = dbscan.core_sample_indices_
+        self.set_core_points(coords_array[core], cluster_labels[core], eps_km)
+        n_clusters = int(cluster_labels.max()) + 1
+        clustered = cluster_labels >= 0
+        centers = self._group_means(coords_array[clustered], cluster_labels[clustered], n_clusters)
+        self.model_metadata.update(
+            {"n_core_points": len(core), "noise_points": int((~clustered).sum())}
+        )
+        return cluster_labels, [(float(lon), float(lat)) for lon, lat in centers]
 
     def _create_clusters_kmeans(
         self, coordinates: List[CoordinateTuple], n_clusters: int = 3
     ) -> Tuple[np.ndarray, List[CoordinateTuple]]:
+        from sklearn.cluster import KMeans
+
         n_clusters = min(max(n_clusters, 1), len(coordinates))
         coords_array = np.array(coordinates)
         kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
@@ -88,30 +272,52 @@ class GeoClustering:
     def _create_distance_based_clusters(
         self, coordinates: List[CoordinateTuple], max_distance_km: float = 5.0
     ) -> Tuple[np.ndarray, List[CoordinateTuple]]:
-        clusters: List[List[int]] = []
-        cluster_labels = [-1] * len(coordinates)
+        """Greedy radius clustering backed by a haversine ``BallTree``.
+
+        Points are visited in input order; each still-unassigned point seeds a
+        new cluster that absorbs every unassigned point within
+        *max_distance_km*. Seeds are therefore pairwise further apart than the
+        radius, so each point is returned by only a handful of radius queries
+        and the whole pass is near-linear in ``len(coordinates)``. The seeds
+        are kept as core points with ``eps_km = max_distance_km``, so a new
+        point joins the nearest seed within the radius.
+        """
+        from sklearn.neighbors import BallTree
+
+        coords_array = np.asarray(coordinates, dtype=float).reshape(-1, 2)
+        cluster_labels = np.full(len(coords_array), -1, dtype=int)
+        self.model_metadata["eps_km"] = max_distance_km
+        if len(coords_array) == 0:
+            self.set_core_points(np.empty((0, 2)), [], max_distance_km)
+            return cluster_labels, []
+
+        tree = BallTree(np.radians(coords_array[:, ::-1]), metric="haversine")
+        radius = max_distance_km / EARTH_RADIUS_KM
         current_cluster = 0
-        for i, coord in enumerate(coordinates):
+        seeds: List[int] = []
+        for i in range(len(coords_array)):
             if cluster_labels[i] != -1:
                 continue
-            cluster_points = [i]
+            seeds.append(i)
+            neighbours = tree.query_radius(np.radians(coords_array[i, ::-1])[None, :], r=radius)[0]
+            neighbours = neighbours[cluster_labels[neighbours] == -1]
+            cluster_labels[neighbours] = current_cluster
             cluster_labels[i] = current_cluster
-            for j, other in enumerate(coordinates):
-                if i == j or cluster_labels[j] != -1:
-                    continue
-                if self.haversine_distance(coord, other) <= max_distance_km:
-                    cluster_points.append(j)
-                    cluster_labels[j] = current_cluster
-            clusters.append(cluster_points)
             current_cluster += 1
 
-        centers: List[CoordinateTuple] = []
-        for idxs in clusters:
-            cluster_coords = [coordinates[i] for i in idxs]
-            center_lon = sum(p[0] for p in cluster_coords) / len(cluster_coords)
-            center_lat = sum(p[1] for p in cluster_coords) / len(cluster_coords)
-            centers.append((center_lon, center_lat))
-        return np.array(cluster_labels), centers
+        counts = np.bincount(cluster_labels, minlength=current_cluster)
+        sums = np.stack(
+            [
+                np.bincount(cluster_labels, weights=coords_array[:, dim], minlength=current_cluster)
+                for dim in (0, 1)
+            ],
+            axis=1,
+        )
+        centers: List[CoordinateTuple] = [
+            (float(lon), float(lat)) for lon, lat in sums / counts[:, None]
+        ]
+        self.set_core_points(coords_array[seeds], np.arange(current_cluster), max_distance_km)
+        return cluster_labels, centers
 
     # ------------------------------------------------------------------
     # Public API
@@ -124,11 +330,14 @@ class GeoClustering:
         max_k: int = 10,
         **kwargs,
     ) -> Tuple[np.ndarray, List[CoordinateTuple]]:
+        # Implementations may record extra details (e.g. the auto-k sweep)
+        self.model_metadata = {}
+        self.set_core_points(None, None, None)
         if self.cluster_method == "dbscan":
             labels, centers = self._create_clusters_dbscan(coordinates, **kwargs)
         elif self.cluster_method == "kmeans":
             if auto:
-                labels, centers = self._auto_kmeans(coordinates, max_k=max_k)
+                labels, centers = self._auto_kmeans(coordinates, max_k=max_k, **kwargs)
             else:
                 labels, centers = self._create_clusters_kmeans(coordinates, **kwargs)
         elif self.cluster_method == "distance":
@@ -137,59 +346,331 @@ class GeoClustering:
             raise ValueError("Unknown clustering method")
 
         # Populate metadata for persistence & info endpoint
-        self.model_metadata = {
-            "cluster_method": self.cluster_method,
-            "n_clusters": len(centers),
-            "created": datetime.now().isoformat(),
-        }
+        labels_array = np.asarray(labels)
+        self.model_metadata.update(
+            {
+                "cluster_method": self.cluster_method,
+                "n_clusters": len(centers),
+                "cluster_sizes": np.bincount(
+                    labels_array[labels_array >= 0], minlength=len(centers)
+                ).tolist(),
+                "created": datetime.now().isoformat(),
+            }
+        )
         self.cluster_centers = centers
         return labels, centers
 
     # ------------------------------------------------------------------
     def _auto_kmeans(
-        self, coordinates: List[CoordinateTuple], *, max_k: int = 10
+        self,
+        coordinates: List[CoordinateTuple],
+        *,
+        max_k: int = 10,
+        n_jobs: int | None = None,
+        silhouette_sample_size: int | None = 5000,
+        patience: int | None = 3,
+        random_state: int = 42,
+        progress: ProgressCallback | None = None,
     ) -> Tuple[np.ndarray, List[CoordinateTuple]]:
-        coords_array = np.array(coordinates)
+        """Pick k in ``[2, max_k]`` by silhouette score.
+
+        Candidates are fitted in waves across a process pool of *n_jobs*
+        workers (default: all cores; ``1`` runs inline). The silhouette is
+        scored on a seeded subsample of *silhouette_sample_size* points, and
+        the sweep stops once *patience* consecutive k values fail to beat the
+        best score. Results are consumed in k order, so the chosen k does not
+        depend on the number of workers. The sweep is recorded under
+        ``model_metadata["auto_k"]``. *progress* is called with
+        ``(evaluated, total_candidates)`` after each k.
+        """
+        coords_array = np.array(coordinates, dtype=float)
+        n_points = len(coords_array)
+        sample_size = (
+            silhouette_sample_size
+            if silhouette_sample_size and silhouette_sample_size < n_points
+            else None
+        )
+        candidates = list(range(2, min(max_k, n_points) + 1))
+        workers = n_jobs if n_jobs is not None else (os.cpu_count() or 1)
+        workers = max(1, min(workers, len(candidates)))
+        if n_points < PARALLEL_MIN_POINTS:
+            workers = 1
+
         best_score = -1.0
         best_k = 2
-        best_labels: np.ndarray | None = None
-        best_centers: np.ndarray | None = None
         best_model: KMeans | None = None
+        evaluated: List[Dict[str, Any]] = []
+        early_stopped = False
+
+        def _consume(results) -> bool:
+            nonlocal best_score, best_k, best_model
+            for k, score, seconds, model in results:
+                evaluated.append({"k": k, "silhouette": score, "fit_seconds": round(seconds, 4)})
+                if progress is not None:
+                    progress(len(evaluated), len(candidates))
+                if score > best_score:
+                    best_k, best_score, best_model = k, score, model
+                elif patience is not None and k - best_k >= patience and best_model is not None:
+                    return True
+            return False
+
+        if workers == 1:
+            early_stopped = _consume(
+                _score_k(coords_array, k, sample_size, random_state) for k in candidates
+            )
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for start in range(0, len(candidates), workers):
+                    wave = candidates[start:start + workers]
+                    futures = [
+                        pool.submit(_score_k, coords_array, k, sample_size, random_state)
+                        for k in wave
+                    ]
+                    if _consume(f.result() for f in futures):
+                        early_stopped = True
+                        break
+
+        self.model_metadata["auto_k"] = {
+            "chosen_k": best_k,
+            "best_silhouette": best_score,
+            "silhouette_sample_size": sample_size or n_points,
+            "workers": workers,
+            "early_stopped": early_stopped,
+            "evaluated": evaluated,
+        }
 
-        for k in range(2, min(max_k, len(coordinates)) + 1):
-            model = KMeans(n_clusters=k, random_state=42, n_init=10)
-            labels = model.fit_predict(coords_array)
-            try:
-                score = silhouette_score(coords_array, labels)
-            except Exception:
-                score = -1
-            if score > best_score:
-                best_k = k
-                best_score = score
-                best_labels = labels
-                best_centers = model.cluster_centers_
-                best_model = model
-
-        if best_labels is None or best_centers is None or best_model is None:
+        if best_model is None:
             # Fallback – this should rarely happen
             return self._create_clusters_kmeans(coordinates, n_clusters=best_k)
 
         self.model = best_model
-        self.cluster_centers = [(float(c[0]), float(c[1])) for c in best_centers]
-        return best_labels, self.cluster_centers
+        self.cluster_centers = [(float(c[0]), float(c[1])) for c in best_model.cluster_centers_]
+        return best_model.labels_, self.cluster_centers
+
+    def partial_fit(
+        self,
+        coordinates: List[CoordinateTuple],
+        *,
+        batch_size: int = 1024,
+        prior_weight: float | None = None,
+        progress: ProgressCallback | None = None,
+    ) -> Tuple[np.ndarray, List[CoordinateTuple]]:
+        """Fold *coordinates* into the current KMeans model without refitting.
+
+        The existing centers seed a ``MiniBatchKMeans`` whose per-center
+        counts start at the stored ``cluster_sizes`` (or *prior_weight*, by
+        default *batch_size*, when those are unknown), so history is weighted
+        against the new points instead of being discarded. New points are
+        consumed in chunks of *batch_size*. Random center reassignment is
+        disabled to keep cluster ids stable for callers. The per-center drift
+        in km is recorded under ``model_metadata["incremental"]``. *progress*
+        is called with ``(batches_done, total_batches)``.
+        """
+        if not self.cluster_centers:
+            raise ValueError("No model to update – train or load a model first.")
+        if self.cluster_method != "kmeans":
+            raise NotImplementedError("partial_fit currently supports only KMeans models.")
+        from sklearn.cluster import MiniBatchKMeans
+
+        coords_array = np.asarray(coordinates, dtype=float).reshape(-1, 2)
+        old_centers = np.asarray(self.cluster_centers, dtype=float)
+        n_clusters = len(old_centers)
+
+        model = self.model
+        if not isinstance(model, MiniBatchKMeans):
+            sizes = self.model_metadata.get("cluster_sizes")
+            if sizes is not None and len(sizes) == n_clusters:
+                weights = np.maximum(np.asarray(sizes, dtype=float), 1.0)
+            else:
+                weights = np.full(n_clusters, float(prior_weight or batch_size))
+            model = MiniBatchKMeans(
+                n_clusters=n_clusters,
+                init=old_centers,
+                n_init=1,
+                batch_size=batch_size,
+                reassignment_ratio=0.0,
+                random_state=42,
+            )
+            # Each center is assigned to itself, so this only seeds the counts
+            model.partial_fit(old_centers, sample_weight=weights)
+
+        step = max(int(batch_size), 1)
+        n_batches = ceil(len(coords_array) / step)
+        for batch_no, start in enumerate(range(0, len(coords_array), step), start=1):
+            model.partial_fit(coords_array[start:start + step])
+            if progress is not None:
+                progress(batch_no, n_batches)
+
+        labels = model.predict(coords_array) if len(coords_array) else np.empty(0, dtype=int)
+        new_centers = np.asarray(model.cluster_centers_, dtype=float)
+        drift = self.haversine_rowwise(old_centers, new_centers)
+
+        sizes = self.model_metadata.get("cluster_sizes") or [0] * n_clusters
+        previous = self.model_metadata.get("incremental", {})
+        self.model = model
+        self.cluster_centers = [(float(c[0]), float(c[1])) for c in new_centers]
+        self.model_metadata.update(
+            {
+                "cluster_method": self.cluster_method,
+                "n_clusters": n_clusters,
+                "cluster_sizes": (
+                    np.asarray(sizes, dtype=int) + np.bincount(labels, minlength=n_clusters)
+                ).tolist(),
+                "incremental": {
+                    "updates": int(previous.get("updates", 0)) + 1,
+                    "points_seen": int(previous.get("points_seen", 0)) + len(coords_array),
+                    "last_batch_points": len(coords_array),
+                    "last_update": datetime.now().isoformat(),
+                    "center_drift_km": [round(float(d), 6) for d in drift],
+                    "max_center_drift_km": float(drift.max()) if len(drift) else 0.0,
+                },
+            }
+        )
+        return labels, self.cluster_centers
+
+    # ------------------------------------------------------------------
+    # Capacity-constrained clustering
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _balanced_bisection(coords_array: np.ndarray, n_parts: int) -> np.ndarray:
+        """Split points into *n_parts* near-equal groups by recursive median cuts."""
+        labels = np.empty(len(coords_array), dtype=int)
+        stack = [(np.arange(len(coords_array)), n_parts, 0)]
+        while stack:
+            idx, parts, first_label = stack.pop()
+            if parts == 1:
+                labels[idx] = first_label
+                continue
+            left_parts = parts // 2
+            n_left = int(round(len(idx) * left_parts / parts))
+            spread = np.ptp(coords_array[idx], axis=0)
+            order = np.argsort(coords_array[idx, int(np.argmax(spread))], kind="stable")
+            stack.append((idx[order[:n_left]], left_parts, first_label))
+            stack.append((idx[order[n_left:]], parts - left_parts, first_label + left_parts))
+        return labels
+
+    @staticmethod
+    def _group_means(coords_array: np.ndarray, labels: np.ndarray, n_groups: int) -> np.ndarray:
+        counts = np.bincount(labels, minlength=n_groups).astype(float)
+        sums = np.stack(
+            [np.bincount(labels, weights=coords_array[:, dim], minlength=n_groups) for dim in (0, 1)],
+            axis=1,
+        )
+        return sums / np.maximum(counts, 1.0)[:, None]
+
+    @staticmethod
+    def _refine_with_capacity(
+        coords_array: np.ndarray,
+        labels: np.ndarray,
+        centers: np.ndarray,
+        capacity: int,
+        n_candidates: int = 8,
+    ) -> int:
+        """One local-search sweep of moves and swaps that keeps sizes <= *capacity*.
+
+        Centers are held fixed during the sweep. A point that is closer to a
+        neighbouring center moves there if it has room, otherwise it swaps
+        with the member of that cluster whose move back gains the most, as
+        long as the combined squared distance drops. Candidate centers come
+        from a KD-tree and only points with a positive gain are visited, so a
+        sweep is close to ``O(n log k)``. *labels* is updated in place and the
+        number of changed points is returned.
+        """
+        from scipy.spatial import cKDTree
+
+        n_centers = len(centers)
+        m = min(n_candidates, n_centers)
+        cand_d2, cands = cKDTree(centers).query(coords_array, k=m)
+        cand_d2 = cand_d2.reshape(len(coords_array), m) ** 2
+        cands = cands.reshape(len(coords_array), m)
+        own = ((coords_array - centers[labels]) ** 2).sum(axis=1)
+
+        counts = np.bincount(labels, minlength=n_centers)
+        members: List[List[int]] = [[] for _ in range(n_centers)]
+        for i, lbl in enumerate(labels):
+            members[lbl].append(i)
+
+        changed = 0
+        for i in np.flatnonzero((own[:, None] - cand_d2).max(axis=1) > 0):
+            src = labels[i]
+            for j, d2 in zip(cands[i], cand_d2[i]):
+                gain = own[i] - d2
+                if gain <= 0:
+                    break
+                if j == src:
+                    continue
+                if counts[j] < capacity:
+                    members[src].remove(i)
+                    members[j].append(i)
+                    counts[src] -= 1
+                    counts[j] += 1
+                    labels[i], own[i] = j, d2
+                    changed += 1
+                    break
+                other = np.asarray(members[j])
+                back = ((coords_array[other] - centers[src]) ** 2).sum(axis=1)
+                best = int(np.argmax(own[other] - back))
+                if gain + own[other[best]] - back[best] > 0:
+                    k = int(other[best])
+                    members[src].remove(i)
+                    members[j].remove(k)
+                    members[j].append(i)
+                    members[src].append(k)
+                    labels[i], own[i] = j, d2
+                    labels[k], own[k] = src, back[best]
+                    changed += 2
+                    break
+        return changed
+
+    def capacity_constrained_clusters(
+        self,
+        coordinates: CoordinateArray,
+        max_points_per_cluster: int,
+        *,
+        max_iter: int = 10,
+    ) -> Tuple[np.ndarray, List[CoordinateTuple]]:
+        """Cluster *coordinates* into groups of at most *max_points_per_cluster*.
+
+        A size-balanced k-means: ``ceil(n / max_points_per_cluster)`` groups
+        are seeded by a balanced recursive bisection, then improved by
+        alternating center updates with capacity-respecting move/swap sweeps
+        until nothing changes or *max_iter* sweeps have run. Every sweep keeps
+        all groups within the cap, the result is deterministic, and the
+        instance's trained model is left untouched, so this is safe to call
+        on a shared serving instance.
+        """
+        if max_points_per_cluster <= 0:
+            raise ValueError("max_points_per_cluster must be positive")
+        coords_array = np.asarray(coordinates, dtype=float).reshape(-1, 2)
+        n_points = len(coords_array)
+        if n_points == 0:
+            return np.empty(0, dtype=int), []
+
+        n_clusters = ceil(n_points / max_points_per_cluster)
+        labels = self._balanced_bisection(coords_array, n_clusters)
+        if n_clusters > 1:
+            for _ in range(max_iter):
+                centers = self._group_means(coords_array, labels, n_clusters)
+                if not self._refine_with_capacity(coords_array, labels, centers, max_points_per_cluster):
+                    break
+
+        # Moves can empty a group; drop those and renumber densely
+        used, labels = np.unique(labels, return_inverse=True)
+        centers = self._group_means(coords_array, labels, len(used))
+        return labels, [(float(lon), float(lat)) for lon, lat in centers]
 
     # ------------------------------------------------------------------
     # Persistence helpers
     # ------------------------------------------------------------------
     def save_model(self, model_path: str | Path, metadata_path: str | Path | None = None) -> None:
-        """Persist trained model & metadata to disk."""
-        if self.model is None:
+        """Persist trained model & metadata to disk.
+
+        Core points of DBSCAN/distance models go into the metadata JSON.
+        """
+        if self.model is None and self.core_points is None:
             raise ValueError("No model to save – train or load a model first.")
 
         model_path = Path(model_path)
-        with model_path.open("wb") as f:
-            pickle.dump(self.model, f)
-
         if metadata_path is None:
             metadata_path = model_path.with_suffix(".json")
         metadata_path = Path(metadata_path)
@@ -201,8 +682,21 @@ class GeoClustering:
         self.model_metadata["cluster_centers"] = [
             {"lon": lon, "lat": lat} for lon, lat in self.cluster_centers
         ]
-        with metadata_path.open("w", encoding="utf-8") as f:
+        if self.core_points is not None:
+            self.model_metadata["eps_km"] = self.eps_km
+            self.model_metadata["core_points"] = self.core_points.tolist()
+            self.model_metadata["core_labels"] = self.core_labels.tolist()
+
+        # Write both files beside their targets, then rename over them, so
+        # readers never see a partially written artifact
+        model_tmp = model_path.with_name(model_path.name + ".tmp")
+        metadata_tmp = metadata_path.with_name(metadata_path.name + ".tmp")
+        with model_tmp.open("wb") as f:
+            pickle.dump(self.model, f)
+        with metadata_tmp.open("w", encoding="utf-8") as f:
             json.dump(self.model_metadata, f, indent=2)
+        os.replace(model_tmp, model_path)
+        os.replace(metadata_tmp, metadata_path)
 
     def load_model(self, model_path: str | Path, metadata_path: str | Path | None = None) -> None:
         """Load previously saved model & metadata from disk."""
@@ -216,40 +710,163 @@ class GeoClustering:
         if metadata_path.exists():
             with metadata_path.open("r", encoding="utf-8") as f:
                 self.model_metadata = json.load(f)
+            self.cluster_method = self.model_metadata.get("cluster_method", self.cluster_method)
             self.cluster_centers = [
                 (c["lon"], c["lat"]) for c in self.model_metadata.get("cluster_centers", [])
             ]
+            if "core_points" in self.model_metadata:
+                self.set_core_points(
+                    self.model_metadata["core_points"],
+                    self.model_metadata["core_labels"],
+                    self.model_metadata["eps_km"],
+                )
+            else:
+                self.set_core_points(None, None, None)
         else:
             # Fallback: derive from model if possible
             if hasattr(self.model, "cluster_centers_"):
                 self.cluster_centers = [
                     (float(c[0]), float(c[1])) for c in self.model.cluster_centers_
                 ]
+            self.set_core_points(None, None, None)
+            if hasattr(self.model, "core_sample_indices_") and hasattr(self.model, "components_"):
+                # Pickled DBSCAN: components_ are the core samples as radians (lat, lon)
+                core = self.model.core_sample_indices_
+                self.cluster_method = "dbscan"
+                self.set_core_points(
+                    np.degrees(self.model.components_)[:, ::-1],
+                    self.model.labels_[core],
+                    self.model.eps * EARTH_RADIUS_KM,
+                )
             self.model_metadata = {
                 "cluster_method": self.cluster_method,
                 "n_clusters": len(self.cluster_centers),
                 "loaded": datetime.now().isoformat(),
             }
 
+    def save_artifact(self, artifact_path: str | Path) -> None:
+        """Persist centers, core points & metadata in the pickle-free format of `artifact.py`.
+
+        The artifact holds everything prediction needs and loads without
+        sklearn; the fitted estimator itself is not stored.
+        """
+        if not self.cluster_centers and self.core_points is None:
+            raise ValueError("No model to save – train or load a model first.")
+        self.model_metadata.setdefault("n_clusters", len(self.cluster_centers))
+        self.model_metadata["cluster_method"] = self.cluster_method
+        self.model_metadata["saved"] = datetime.now().isoformat()
+        if self.core_points is not None:
+            self.model_metadata["eps_km"] = self.eps_km
+        write_artifact(
+            artifact_path, self.cluster_centers, self.model_metadata, self.core_points, self.core_labels
+        )
+
+    def load_artifact(self, artifact_path: str | Path, mmap: bool = True) -> None:
+        """Load a model written by `save_artifact`, memory-mapping its centers.
+
+        ``self.model`` stays ``None``: prediction runs on the centers alone,
+        and `partial_fit` rebuilds an estimator from them when needed.
+        """
+        centers, header = read_artifact(artifact_path, mmap=mmap)
+        self.model = None
+        self.cluster_method = header["cluster_method"]
+        self.cluster_centers = [(lon, lat) for lon, lat in centers.tolist()]
+        self.model_metadata = header["metadata"]
+        self.model_metadata["cluster_centers"] = [
+            {"lon": lon, "lat": lat} for lon, lat in self.cluster_centers
+        ]
+        # Serve nearest-center lookups straight from the mapped block
+        self._center_index = self._build_center_index(np.asarray(centers).reshape(-1, 2))
+        core = read_core_points(artifact_path, header, mmap=mmap)
+        if core is None:
+            self.set_core_points(None, None, None)
+        else:
+            self.set_core_points(core[0], core[1], self.model_metadata["eps_km"])
+
     # ------------------------------------------------------------------
     # Prediction + formatting helpers
     # ------------------------------------------------------------------
-    def predict_cluster(self, new_coords: List[CoordinateTuple]) -> np.ndarray:
-        """Return cluster label for each coordinate in *new_coords*."""
-        if self.model is None:
-            raise ValueError("Model not loaded – call `load_model()` or train first.")
-        if self.cluster_method != "kmeans":
-            raise NotImplementedError(
-                "predict_cluster currently supports only KMeans models.")
-        X = np.array(new_coords)
-        return self.model.predict(X)
+    def _get_center_index(self) -> Tuple[np.ndarray, cKDTree | None]:
+        """Return the contiguous centers array and, for large k, a KD-tree over it.
+
+        Built lazily and dropped whenever ``cluster_centers`` is reassigned.
+        The tree is built on the raw ``(lon, lat)`` values, the same space
+        KMeans was fitted in, so nearest neighbours agree with its labels.
+        """
+        if self._center_index is None:
+            centers = np.ascontiguousarray(self.cluster_centers, dtype=np.float64).reshape(-1, 2)
+            self._center_index = self._build_center_index(centers)
+        return self._center_index
+
+    @staticmethod
+    def _build_center_index(centers: np.ndarray) -> Tuple[np.ndarray, cKDTree | None]:
+        if len(centers) < KDTREE_MIN_CENTERS:
+            return centers, None
+        from scipy.spatial import cKDTree
+
+        return centers, cKDTree(centers)
+
+    def nearest_center(self, coords: CoordinateArray) -> np.ndarray:
+        """Return the index of the closest stored center for every row of *coords*.
+
+        Uses a blocked brute-force argmin for small k and a KD-tree query for
+        ``k >= KDTREE_MIN_CENTERS``; no sklearn code is involved.
+        """
+        X = np.ascontiguousarray(coords, dtype=np.float64).reshape(-1, 2)
+        centers, tree = self._get_center_index()
+        if tree is not None:
+            return tree.query(X, k=1)[1].astype(np.int32)
+        return nearest_rows(X, centers)
+
+    def _get_core_index(self) -> BallTree:
+        """Haversine ``BallTree`` over the core points, built on first use."""
+        if self._core_index is None:
+            from sklearn.neighbors import BallTree
+
+            self._core_index = BallTree(np.radians(self.core_points[:, ::-1]), metric="haversine")
+        return self._core_index
+
+    def nearest_core(self, coords: CoordinateArray) -> np.ndarray:
+        """Label of the nearest core point within ``eps_km`` for every row of
+        *coords*, or ``-1`` (noise) when none is that close."""
+        X = np.ascontiguousarray(coords, dtype=np.float64).reshape(-1, 2)
+        labels = np.full(len(X), -1, dtype=np.int32)
+        if not len(self.core_points) or not len(X):
+            return labels
+        tree = self._get_core_index()
+        radius = self.eps_km / EARTH_RADIUS_KM
+        for start in range(0, len(X), PREDICT_BLOCK_ROWS):
+            block = np.radians(X[start:start + PREDICT_BLOCK_ROWS, ::-1])
+            dist, idx = tree.query(block, k=1)
+            within = dist[:, 0] <= radius
+            labels[start:start + PREDICT_BLOCK_ROWS][within] = self.core_labels[idx[within, 0]]
+        return labels
+
+    def predict_cluster(self, new_coords: CoordinateArray) -> np.ndarray:
+        """Return cluster label for each coordinate in *new_coords*.
+
+        KMeans models use the nearest center. DBSCAN and distance models use
+        the nearest core point within ``eps_km`` and return ``-1`` for noise.
+        """
+        if self.cluster_method == "kmeans":
+            if not self.cluster_centers:
+                raise ValueError("Model not loaded – call `load_model()` or train first.")
+            return self.nearest_center(new_coords)
+        if self.core_points is None:
+            raise ValueError(
+                f"No core points for this {self.cluster_method} model – retrain or load a model saved with them.")
+        return self.nearest_core(new_coords)
+
+    @staticmethod
+    def _coerce_coordinates(
+        coordinates: Union[np.ndarray, Sequence[Union[Dict[str, float], CoordinateTuple]]]
+    ) -> np.ndarray:
+        """Return *coordinates* as a float64 ``(n, 2)`` array of ``(lon, lat)``."""
+        if isinstance(coordinates, np.ndarray):
+            if coordinates.ndim != 2 or coordinates.shape[1] != 2:
+                raise ValueError("Invalid coordinate array: expected shape (n, 2)")
+            return np.ascontiguousarray(coordinates, dtype=np.float64)
 
-    # Key method used by FastAPI service
-    def predict_and_format_for_backend(
-        self, coordinates: Sequence[Union[Dict[str, float], CoordinateTuple]]
-    ) -> Dict[str, Any]:
-        """Predict clusters and format the output expected by FastAPI layer."""
-        # Normalise input -> list[CoordinateTuple]
         coords_list: List[CoordinateTuple] = []
         for c in coordinates:
             if isinstance(c, (list, tuple)) and len(c) == 2:
@@ -258,33 +875,68 @@ class GeoClustering:
                 coords_list.append((float(c["lon"]), float(c["lat"])) )
             else:
                 raise ValueError("Invalid coordinate format: expected {'lon','lat'} or (lon,lat)")
-
-        labels = self.predict_cluster(coords_list)
-
-        clusters: Dict[int, List[Dict[str, float]]] = {}
-        for (lon, lat), lbl in zip(coords_list, labels):
-            lbl_int = int(lbl) if hasattr(lbl, "item") else int(lbl)
-            clusters.setdefault(lbl_int, []).append({"lon": lon, "lat": lat})
-
-        cluster_info: List[Dict[str, Any]] = []
-        for lbl, pts in clusters.items():
+        return np.array(coords_list, dtype=np.float64).reshape(-1, 2)
+
+    def predict_grouped(
+        self, coords_array: np.ndarray, labels: np.ndarray | None = None
+    ) -> List[Tuple[int, np.ndarray]]:
+        """Predict *coords_array* and return ``(label, member_indices)`` per cluster.
+
+        Clusters are ordered by the first point assigned to them and members
+        keep their input order, matching the grouping of
+        ``predict_and_format_for_backend``. Pass *labels* when they were
+        already predicted (e.g. as part of a larger batch).
+        """
+        if labels is None:
+            labels = self.predict_cluster(coords_array)
+        if len(labels) == 0:
+            return []
+        order = np.argsort(labels, kind="stable")
+        uniq, starts = np.unique(labels[order], return_index=True)
+        groups = np.split(order, starts[1:])
+        first_seen = np.argsort([g[0] for g in groups], kind="stable")
+        return [(int(uniq[i]), groups[i]) for i in first_seen]
+
+    def iter_clusters(
+        self, coords_array: np.ndarray, groups: List[Tuple[int, np.ndarray]] | None = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield one backend-formatted cluster dict at a time.
+
+        *groups* defaults to ``predict_grouped(coords_array)``; pass it in to
+        run the prediction eagerly and only defer the formatting.
+        """
+        if groups is None:
+            groups = self.predict_grouped(coords_array)
+        for lbl, idx in groups:
             center_dict: Dict[str, float] | None = None
             if 0 <= lbl < len(self.cluster_centers):
                 center_lon, center_lat = self.cluster_centers[lbl]
                 center_dict = {"lon": center_lon, "lat": center_lat}
-            cluster_info.append(
-                {
-                    "cluster_id": lbl,
-                    "cluster_center": center_dict if center_dict else {},
-                    "coordinates": pts,
-                }
-            )
+            yield {
+                "cluster_id": lbl,
+                "cluster_center": center_dict if center_dict else {},
+                "coordinates": [
+                    {"lon": lon, "lat": lat} for lon, lat in coords_array[idx].tolist()
+                ],
+            }
+
+    # Key method used by FastAPI service
+    def predict_and_format_for_backend(
+        self, coordinates: Union[np.ndarray, Sequence[Union[Dict[str, float], CoordinateTuple]]]
+    ) -> Dict[str, Any]:
+        """Predict clusters and format the output expected by FastAPI layer.
+
+        *coordinates* may be ``{'lon','lat'}`` dicts, ``(lon, lat)`` pairs or
+        an ``(n, 2)`` array, which is used as-is.
+        """
+        coords_array = self._coerce_coordinates(coordinates)
+        cluster_info = list(self.iter_clusters(coords_array))
 
         response = {
             "success": True,
             "timestamp": datetime.now().isoformat(),
-            "total_points": len(coords_list),
-            "total_clusters": len(clusters),
+            "total_points": len(coords_array),
+            "total_clusters": len(cluster_info),
             "clusters": cluster_info,
             "model_info": self.model_metadata,
         }
@@ -295,19 +947,21 @@ class GeoClustering:
     # ------------------------------------------------------------------
     def analyze_clusters(self, coordinates: List[CoordinateTuple], labels: Sequence[int]) -> Dict[str, Any]:
         """Return dict describing clusters (counts, radii etc.)."""
+        coords_array = np.asarray(coordinates, dtype=float).reshape(-1, 2)
+        labels_array = np.asarray(labels)
         cluster_info: Dict[str, Any] = {}
         for lbl in set(labels):
+            mask = labels_array == lbl
             if lbl == -1:
                 cluster_info["noise"] = {
-                    "count": int(sum(l == -1 for l in labels)),
-                    "points": [coordinates[i] for i, l in enumerate(labels) if l == -1],
+                    "count": int(mask.sum()),
+                    "points": [coordinates[i] for i in np.flatnonzero(mask)],
                 }
                 continue
-            cluster_points = [coordinates[i] for i, l in enumerate(labels) if l == lbl]
-            center_lon = sum(p[0] for p in cluster_points) / len(cluster_points)
-            center_lat = sum(p[1] for p in cluster_points) / len(cluster_points)
-            max_dist = max(
-                self.haversine_distance((center_lon, center_lat), pt) for pt in cluster_points
+            cluster_points = coords_array[mask]
+            center_lon, center_lat = (float(v) for v in cluster_points.mean(axis=0))
+            max_dist = float(
+                self.haversine_one_to_many((center_lon, center_lat), cluster_points).max()
             )
             cluster_info[f"cluster_{lbl}"] = {
                 "count": len(cluster_points),
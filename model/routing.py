@@ -0,0 +1,251 @@
+"""
+Stop sequencing for delivery clusters.
+
+Every cluster becomes a closed tour that starts and ends at the depot. A
+nearest-neighbour pass builds the tour, then 2-opt and Or-opt moves improve
+it until no move helps or the time budget runs out. Both moves evaluate
+every candidate position for a given edge or segment in one NumPy
+expression, so the Python loop is ``O(n)`` per pass rather than ``O(n^2)``.
+`RoutePlanner` sequences many clusters at once on a pool of worker
+processes.
+"""
+
+from __future__ import annotations
+
+import json
+import multiprocessing as mp
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from route_generator import CoordinateArray, CoordinateTuple, GeoClustering
+
+DEPOT_PATH = Path(__file__).parent / "source.json"
+
+# Below this many stops in total a process pool costs more than it saves.
+ROUTE_PARALLEL_MIN_POINTS = 500
+# Longest segment Or-opt tries to relocate.
+OR_OPT_MAX_SEGMENT = 3
+# Moves must shorten the tour by more than this (km) to count.
+IMPROVEMENT_EPS = 1e-9
+
+
+def load_depot(path: str | Path = DEPOT_PATH) -> CoordinateTuple:
+    """Return the depot ``(lon, lat)`` from a ``source.json`` style file.
+
+    The file holds pandas-style columns, ``{"lat": {"0": ...}, "lon": {"0": ...}}``;
+    the first row is the depot.
+    """
+    with Path(path).open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    key = next(iter(data["lon"]))
+    return float(data["lon"][key]), float(data["lat"][key])
+
+
+# ----------------------------------------------------------------------
+# Tour construction & improvement
+# ----------------------------------------------------------------------
+def tour_length(dist: np.ndarray, tour: np.ndarray) -> float:
+    """Length of the closed *tour* (it returns to ``tour[0]``)."""
+    if len(tour) < 2:
+        return 0.0
+    return float(dist[tour, np.roll(tour, -1)].sum())
+
+
+def nearest_neighbour_tour(dist: np.ndarray, start: int = 0, deadline: float | None = None) -> np.ndarray:
+    """Greedy tour from *start* that always visits the closest unvisited node.
+
+    Once ``time.time()`` passes *deadline*, the unvisited nodes are appended
+    in index order, so a complete tour is still returned.
+    """
+    n = len(dist)
+    tour = np.empty(n, dtype=np.intp)
+    remaining = np.ones(n, dtype=bool)
+    current = start
+    for pos in range(n):
+        tour[pos] = current
+        remaining[current] = False
+        if pos + 1 < n:
+            if deadline is not None and time.time() > deadline:
+                tour[pos + 1:] = np.flatnonzero(remaining)
+                break
+            current = int(np.where(remaining, dist[current], np.inf).argmin())
+    return tour
+
+
+def two_opt(dist: np.ndarray, tour: np.ndarray, deadline: float | None = None) -> Tuple[np.ndarray, bool]:
+    """Apply improving 2-opt moves to the closed *tour*; ``tour[0]`` stays first.
+
+    For each edge ``(a, b)`` the gain of reconnecting it with every later
+    edge ``(c, d)`` is computed at once and the best move is applied. Stops
+    at a local optimum or once ``time.time()`` passes *deadline*. Returns the
+    tour and whether it changed.
+    """
+    tour = tour.copy()
+    n = len(tour)
+    changed = False
+    improved = n >= 4
+    while improved:
+        improved = False
+        for i in range(n - 2):
+            if deadline is not None and time.time() > deadline:
+                return tour, changed
+            a, b = tour[i], tour[i + 1]
+            c = tour[i + 2:]
+            d = np.append(tour[i + 3:], tour[0])
+            delta = dist[a, c] + dist[b, d] - dist[a, b] - dist[c, d]
+            j = int(delta.argmin())
+            if delta[j] < -IMPROVEMENT_EPS:
+                end = i + 3 + j
+                tour[i + 1:end] = tour[i + 1:end][::-1]
+                improved = changed = True
+    return tour, changed
+
+
+def or_opt(dist: np.ndarray, tour: np.ndarray, deadline: float | None = None) -> Tuple[np.ndarray, bool]:
+    """Relocate segments of up to `OR_OPT_MAX_SEGMENT` stops, possibly reversed.
+
+    ``tour[0]`` (the depot) is never moved. For each segment every insertion
+    edge of the remaining tour is scored at once, in both orientations.
+    Returns the tour and whether it changed.
+    """
+    tour = tour.copy()
+    n = len(tour)
+    changed = False
+    improved = n >= 4
+    while improved:
+        improved = False
+        for length in range(1, OR_OPT_MAX_SEGMENT + 1):
+            i = 1
+            while i + length <= n:
+                if deadline is not None and time.time() > deadline:
+                    return tour, changed
+                p, q = tour[i - 1], tour[(i + length) % n]
+                s0, s1 = tour[i], tour[i + length - 1]
+                removal_gain = dist[p, s0] + dist[s1, q] - dist[p, q]
+
+                rest = np.concatenate((tour[:i], tour[i + length:]))
+                nxt = np.concatenate((rest[1:], rest[:1]))
+                base = dist[rest, nxt]
+                forward = dist[rest, s0] + dist[s1, nxt] - base
+                backward = dist[rest, s1] + dist[s0, nxt] - base
+                # Re-inserting where it came from is not a move
+                forward[i - 1] = backward[i - 1] = np.inf
+
+                k_f, k_b = int(forward.argmin()), int(backward.argmin())
+                reverse = backward[k_b] < forward[k_f]
+                k = k_b if reverse else k_f
+                if min(forward[k_f], backward[k_b]) - removal_gain < -IMPROVEMENT_EPS:
+                    segment = tour[i:i + length]
+                    if reverse:
+                        segment = segment[::-1]
+                    tour = np.concatenate((rest[:k + 1], segment, rest[k + 1:]))
+                    improved = changed = True
+                i += 1
+    return tour, changed
+
+
+def solve_tour(
+    points: CoordinateArray,
+    depot: CoordinateTuple,
+    deadline: float | None = None,
+    initial_order: Sequence[int] | None = None,
+) -> Dict[str, Any]:
+    """Sequence *points* into a depot-to-depot tour.
+
+    Returns ``order`` (indices into *points* in visiting order),
+    ``distance_km`` and the starting tour's ``initial_distance_km``. The
+    starting tour is *initial_order* if given, else a nearest-neighbour
+    tour. Construction and improvement stop at *deadline* (a ``time.time()``
+    value), but a complete tour is always returned.
+    """
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    nodes = np.vstack((np.asarray(depot, dtype=np.float64).reshape(1, 2), pts))
+    dist = GeoClustering.haversine_many_to_many(nodes)
+
+    if initial_order is None:
+        tour = nearest_neighbour_tour(dist, deadline=deadline)
+    else:
+        tour = np.concatenate(([0], np.asarray(initial_order, dtype=np.intp) + 1))
+    initial = tour_length(dist, tour)
+    changed = True
+    while changed and (deadline is None or time.time() <= deadline):
+        tour, moved_2opt = two_opt(dist, tour, deadline)
+        tour, moved_or = or_opt(dist, tour, deadline)
+        changed = moved_2opt or moved_or
+    return {
+        "order": (tour[1:] - 1).tolist(),
+        "distance_km": tour_length(dist, tour),
+        "initial_distance_km": initial,
+    }
+
+
+def _solve_task(args: Tuple[np.ndarray, CoordinateTuple, float, Sequence[int] | None]) -> Dict[str, Any]:
+    return solve_tour(*args)
+
+
+# ----------------------------------------------------------------------
+# Many clusters at once
+# ----------------------------------------------------------------------
+class RoutePlanner:
+    """Sequence many clusters in parallel under one shared time budget.
+
+    Parameters
+    ----------
+    max_workers : int
+        Worker processes; ``1`` solves in the calling thread. The pool is
+        started on first use and reused across calls.
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        self.max_workers = max(1, int(max_workers))
+        self._pool: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "RoutePlanner":
+        """Build from ``GEOCLUSTER_ROUTE_WORKERS`` (defaults to the CPU count)."""
+        return cls(int(os.environ.get("GEOCLUSTER_ROUTE_WORKERS", os.cpu_count() or 1)))
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn rather than fork: the API process runs threads and an event loop
+                self._pool = ProcessPoolExecutor(self.max_workers, mp_context=mp.get_context("spawn"))
+            return self._pool
+
+    def solve(
+        self,
+        clusters: Sequence[CoordinateArray],
+        depot: CoordinateTuple,
+        time_limit: float,
+        initial_orders: Sequence[Sequence[int] | None] | None = None,
+    ) -> List[Dict[str, Any]]:
+        """Return one `solve_tour` result per cluster, all within *time_limit* seconds.
+
+        *initial_orders* optionally gives a starting tour per cluster to
+        improve instead of building one.
+        """
+        deadline = time.time() + time_limit
+        if initial_orders is None:
+            initial_orders = [None] * len(clusters)
+        tasks = [
+            (np.asarray(c, dtype=np.float64).reshape(-1, 2), depot, deadline, order)
+            for c, order in zip(clusters, initial_orders)
+        ]
+        n_points = sum(len(t[0]) for t in tasks)
+        if self.max_workers == 1 or len(tasks) < 2 or n_points < ROUTE_PARALLEL_MIN_POINTS:
+            return [_solve_task(t) for t in tasks]
+        chunksize = max(1, len(tasks) // (4 * self.max_workers))
+        return list(self._get_pool().map(_solve_task, tasks, chunksize=chunksize))
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
@@ -1,19 +1,32 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse, Response
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
-import json
-import pickle
+from typing import List, Optional, Dict, Any, AsyncIterator, Iterator, Literal, Tuple
+import asyncio
+import os
+import time
 import numpy as np
+import orjson
 from datetime import datetime
-import uvicorn
 import sys
 from pathlib import Path
 
 # Add parent directory to path to allow importing route_generator
 sys.path.append(str(Path(__file__).parent.parent))
 from route_generator import GeoClustering
+from training import TrainingJobManager
+from admission import AdmissionController, ComputeTimeout, Overloaded
+from microbatch import MicroBatcher
+from result_cache import ResultCache, coordinates_digest
+from registry import ModelRegistry
+from routing import RoutePlanner, load_depot
+from vrp import solve_cvrp
+from distance_matrix import default_detour_factor, iter_distance_blocks
+from address_matrix import AddressMatrix
+from incremental import IncrementalClusterers
+from session import SessionStore
+from dbscan_sweep import sweep_dbscan
 
 # Pydantic models for request/response validation
 class Coordinate(BaseModel):
@@ -24,9 +37,21 @@ class PredictionRequest(BaseModel):
     coordinates: List[Coordinate] = Field(..., description="List of coordinates to cluster")
     max_points_per_cluster: Optional[int] = Field(None, gt=0, description="If set, split clusters so none exceed this size")
 
+class ColumnarCoordinates(BaseModel):
+    lon: List[float] = Field(..., description="Longitudes")
+    lat: List[float] = Field(..., description="Latitudes, same length as lon")
+
 class TrainingRequest(BaseModel):
     training_coordinates: List[List[float]] = Field(..., description="Training coordinates as [lon, lat] pairs")
     max_k: Optional[int] = Field(15, description="Maximum number of clusters to test")
+    mode: Literal["full", "incremental"] = Field("full", description="'full' refits from scratch, 'incremental' folds the coordinates into the current model")
+    batch_size: int = Field(1024, gt=0, description="Mini-batch size used in incremental mode")
+
+class DbscanSweepRequest(BaseModel):
+    coordinates: List[List[float]] = Field(..., description="Coordinates to tune on, as [lon, lat] pairs")
+    eps_km: List[float] = Field(..., min_length=1, description="Neighbourhood radii to try, in km")
+    min_samples: List[int] = Field(..., min_length=1, description="Core point thresholds to try")
+    silhouette_sample_size: int = Field(2000, gt=1, le=10000, description="Points in the sample every setting is scored on")
 
 class ClusterInfo(BaseModel):
     cluster_id: int
@@ -52,12 +77,122 @@ class HealthResponse(BaseModel):
 
 class ModelInfoResponse(BaseModel):
     success: bool
+    model_version: Optional[str] = None
     model_info: Dict[str, Any]
     cluster_centers: List[List[float]]
     timestamp: str
 
     model_config = {'protected_namespaces': ()}
 
+class ModelVersionsResponse(BaseModel):
+    success: bool
+    active_version: Optional[str]
+    versions: List[Dict[str, Any]]
+    timestamp: str
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    mode: str
+    status: str = Field(..., description="queued, running, saving, succeeded or failed")
+    progress: float = Field(..., description="Fraction of training steps completed (0-1)")
+    n_points: int
+    created: str
+    started: Optional[str] = None
+    finished: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+class RouteRequest(BaseModel):
+    clusters: Optional[List[List[Coordinate]]] = Field(None, description="Stops already grouped, one list per cluster")
+    coordinates: Optional[List[Coordinate]] = Field(None, description="Ungrouped stops, clustered with the model first")
+    max_points_per_cluster: Optional[int] = Field(None, gt=0, description="With coordinates, split clusters so none exceed this size")
+    depot: Optional[Coordinate] = Field(None, description="Start and end of every tour (defaults to source.json)")
+    time_limit: float = Field(2.0, gt=0, le=30, description="Seconds allowed for improving the tours (capped below the request timeout)")
+
+class RouteInfo(BaseModel):
+    cluster_id: int
+    distance_km: float
+    initial_distance_km: float = Field(..., description="Length of the nearest-neighbour tour before improvement")
+    order: List[int] = Field(..., description="Indices into the cluster's input stops, in visiting order")
+    stops: List[Coordinate]
+
+class RouteResponse(BaseModel):
+    success: bool
+    timestamp: str
+    depot: Coordinate
+    total_clusters: int
+    total_distance_km: float
+    routes: List[RouteInfo]
+
+class DispatchRequest(BaseModel):
+    orders: List[Coordinate] = Field(..., description="Delivery stops for the day")
+    demands: Optional[List[float]] = Field(None, description="Demand per order, same length as orders (default 1 each)")
+    capacity: float = Field(..., gt=0, description="Capacity of each vehicle, in demand units")
+    n_vehicles: Optional[int] = Field(None, gt=0, description="Fleet size (unlimited if omitted)")
+    depot: Optional[Coordinate] = Field(None, description="Start and end of every route (defaults to source.json)")
+    time_limit: float = Field(10.0, gt=0, le=30, description="Seconds allowed for the whole solve (capped below the request timeout)")
+
+class VehicleRoute(BaseModel):
+    vehicle: int
+    load: float
+    distance_km: float
+    order: List[int] = Field(..., description="Indices into orders, in visiting order")
+    stops: List[Coordinate]
+
+class DispatchResponse(BaseModel):
+    success: bool
+    timestamp: str
+    depot: Coordinate
+    total_vehicles: int
+    total_distance_km: float
+    initial_distance_km: float = Field(..., description="Plan length after savings construction, before local search")
+    routes: List[VehicleRoute]
+    unassigned: List[int] = Field(..., description="Orders the fleet cannot serve")
+    stats: Dict[str, Any]
+
+class MatrixRequest(BaseModel):
+    sources: Optional[List[List[float]]] = Field(None, description="Row coordinates as [lon, lat] pairs")
+    source_ids: Optional[List[str]] = Field(None, description="Rows as registered address ids, instead of sources")
+    destinations: Optional[List[List[float]]] = Field(None, description="Column coordinates as [lon, lat] pairs (defaults to the rows)")
+    destination_ids: Optional[List[str]] = Field(None, description="Columns as registered address ids, instead of destinations")
+    detour_factor: Optional[float] = Field(None, gt=0, description="Scale applied to haversine km to approximate road distance (defaults to GEOCLUSTER_DETOUR_FACTOR)")
+    dtype: Literal["float32", "float64"] = Field("float32", description="Precision of the returned distances")
+
+class MatrixResponse(BaseModel):
+    success: bool
+    timestamp: str
+    units: str
+    rows: int
+    cols: int
+    dtype: str
+    detour_factor: float
+    precomputed: bool = Field(..., description="True if gathered from the precomputed address matrix")
+    distances: List[List[float]]
+
+class SessionRequest(BaseModel):
+    max_points_per_cluster: Optional[int] = Field(None, gt=0, description="Rebalance clusters that grow beyond this size")
+    coordinates: Optional[List[Coordinate]] = Field(None, description="Initial orders")
+
+class SessionOrdersRequest(BaseModel):
+    coordinates: List[Coordinate] = Field(..., description="Orders to add")
+
+class SessionRemoveRequest(BaseModel):
+    order_ids: List[int] = Field(..., description="Ids returned when the orders were added")
+
+class SessionSummary(BaseModel):
+    success: bool
+    session_id: str
+    model_version: str
+    timestamp: str
+    total_orders: int
+    total_clusters: int
+    max_cluster_size: int
+    max_points_per_cluster: Optional[int]
+    order_ids: Optional[List[int]] = Field(None, description="Ids of the orders just added")
+    stats: Dict[str, int]
+
+    model_config = {'protected_namespaces': ()}
+
 class ErrorResponse(BaseModel):
     success: bool = False
     error: str
@@ -81,37 +216,178 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global clusterer instance
-clusterer = None
+# Loaded model versions (see registry.py for env settings). The active model
+# is only ever replaced by switching to a fully built one, so handlers that
+# resolve it once see a consistent model.
+registry = ModelRegistry.from_env()
+
+# Bundled production model, imported into the registry at startup. The
+# pickle-free artifact (see artifact.py) is preferred; the pickle is the fallback.
+MODEL_ARTIFACT_PATH = 'production_model.gcm'
+MODEL_PATH = 'production_model.pkl'
+METADATA_PATH = 'production_metadata.json'
+
+def resolve_model(version: Optional[str] = None) -> GeoClustering:
+    """Return the pinned model *version*, or the active one, or raise 404/503."""
+    if version is not None:
+        try:
+            return registry.get(version)
+        except KeyError:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Unknown model version: {version}"
+            )
+    model = registry.active
+    if model is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Model not loaded. Please check service health."
+        )
+    return model
+
+def install_trained_model(model: GeoClustering, spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Persist a finished training job's model as a new version and activate it."""
+    version = registry.save(model, activate=True)
+    result = {
+        "model_version": version,
+        "n_clusters": len(model.cluster_centers),
+        "cluster_centers": model.cluster_centers,
+    }
+    if spec["mode"] == "incremental":
+        result["center_drift_km"] = model.model_metadata["incremental"]["center_drift_km"]
+    return result
+
+# Encoded prediction results keyed by model version + request (see result_cache.py)
+result_cache = ResultCache.from_env()
+# Keys are (endpoint, model_version, ...); drop a version's results with it
+registry.on_evict = lambda version: result_cache.discard(lambda key: key[1] == version)
+
+job_manager = TrainingJobManager(on_success=install_trained_model, current_model=lambda: registry.active)
+
+# Bounded pool for CPU-bound request work (see admission.py for env settings)
+compute = AdmissionController.from_env()
+
+async def run_compute(fn, *args):
+    """Run blocking work off the event loop, mapping overload to 429 and timeouts to 504."""
+    try:
+        return await compute.run(fn, *args)
+    except Overloaded:
+        raise HTTPException(
+            status_code=429,
+            detail="Server busy: too many prediction requests in flight, retry shortly",
+            headers={"Retry-After": "1"}
+        )
+    except ComputeTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+async def stream_compute(items: Iterator[Any]) -> AsyncIterator[Any]:
+    """Admit a streamed response once and produce each chunk on the compute
+    pool; overload and a slow first chunk map to 429/504 as in `run_compute`."""
+    try:
+        return await compute.stream(items)
+    except Overloaded:
+        raise HTTPException(
+            status_code=429,
+            detail="Server busy: too many prediction requests in flight, retry shortly",
+            headers={"Retry-After": "1"}
+        )
+    except ComputeTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+# Opt-in coalescing of small concurrent /predict calls (see microbatch.py)
+batcher = MicroBatcher.from_env(run_compute)
+
+# Last order set per (state key, model version, cap) for /predict?incremental=true (see incremental.py)
+incremental_clusterers = IncrementalClusterers.from_env()
+
+# Live order sets clustered online (see session.py)
+sessions = SessionStore.from_env()
+
+# Worker processes for /route (see routing.py)
+route_planner = RoutePlanner.from_env()
+
+# Seconds of the request timeout kept back from /route and /dispatch solves
+# for clustering, distance matrices and encoding the response
+SOLVE_TIME_MARGIN = 2.0
+
+def solve_deadline(time_limit: float) -> float:
+    """Return the ``time.time()`` by which a solve must stop.
+    
+    *time_limit* is capped so the solve ends inside the request timeout,
+    leaving `SOLVE_TIME_MARGIN` (or half of a shorter timeout) for the rest
+    of the request, so a long limit yields a route rather than a 504.
+    """
+    if compute.timeout is not None:
+        time_limit = min(time_limit, max(compute.timeout - SOLVE_TIME_MARGIN, compute.timeout / 2))
+    return time.time() + time_limit
+
+try:
+    DEFAULT_DEPOT = load_depot()
+except (FileNotFoundError, KeyError, ValueError):
+    DEFAULT_DEPOT = None
+
+# Precomputed distances for the registered address set (see address_matrix.py)
+try:
+    address_matrix = AddressMatrix(os.environ.get("GEOCLUSTER_ADDRESS_MATRIX_DIR", "address_matrix"))
+except FileNotFoundError:
+    address_matrix = None
+
+def fast_json_response(content: Any, status_code: int = 200) -> Response:
+    """Encode an already-shaped payload straight to JSON bytes.
+
+    Returning a ``Response`` makes FastAPI skip ``response_model``
+    validation and its stdlib encoder, while the declared model still
+    documents the endpoint in the OpenAPI schema.
+    """
+    return Response(
+        content=orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY),
+        media_type="application/json",
+        status_code=status_code
+    )
 
 def load_model_on_startup():
-    """Load the trained model when the API starts, or initialize a new one if not found"""
-    global clusterer
+    """Load saved model versions when the API starts, or initialize a new one if none are found"""
     try:
-        # Try to load existing model first
-        try:
-            clusterer = GeoClustering()
-            clusterer.load_model('production_model.pkl', 'production_metadata.json')
-            print("Model loaded successfully from disk")
+        # Bundled model first, so versions saved later take precedence
+        for args in ((MODEL_ARTIFACT_PATH,), (MODEL_PATH, METADATA_PATH)):
+            try:
+                registry.load_artifact(*args, activate=True)
+                print(f"Model loaded successfully from {args[0]}")
+                break
+            except FileNotFoundError:
+                continue
+        if registry.scan(activate_new=True):
+            print(f"Loaded model versions from {registry.model_dir}")
+        registry.restore_active()
+        if registry.active is not None:
             return True
-        except FileNotFoundError:
-            print("No existing model found. Initializing with default model.")
+        print("No existing model found. Initializing with default model.")
         
         # Initialize with some default coordinates if no model exists
         default_coords = [
             [73.17, 22.30], [73.18, 22.30], [73.17, 22.31],  # Cluster 1
             [72.85, 21.17], [72.86, 21.17], [72.85, 21.18]   # Cluster 2
         ]
-        clusterer = GeoClustering(cluster_method='kmeans')
-        clusterer.cluster_coordinates(default_coords, auto=True, max_k=2)
-        clusterer.save_model('production_model.pkl', 'production_metadata.json')
+        initial = GeoClustering(cluster_method='kmeans')
+        initial.cluster_coordinates(default_coords, auto=True, max_k=2)
+        registry.save(initial, activate=True)
         print("Initialized new model with default data")
         return True
         
     except Exception as e:
         print(f"Error initializing model: {e}")
-        clusterer = None
         return False
+
+def warm_up_model(model: GeoClustering) -> None:
+    """Run one tiny prediction through the /predict path.
+
+    Builds the model's center index and touches the NumPy and orjson code
+    the first real request would otherwise pay for.
+    """
+    coords = np.asarray(model.cluster_centers[:8], dtype=np.float64).reshape(-1, 2)
+    groups = model.predict_grouped(coords)
+    fast_json_response({"clusters": list(iter_prediction_clusters(model, coords, groups))})
+
 @app.get("/")          # This registers the root path
 def read_root():
     return {"message": "GeoClustering API is alive"}
@@ -120,6 +396,16 @@ def read_root():
 async def startup_event():
     """Load model on startup"""
     load_model_on_startup()
+    if registry.active is not None:
+        # Also starts a compute worker thread ahead of the first request
+        await run_compute(warm_up_model, registry.active)
+    # Pick up artifacts dropped into the model directory without a restart
+    registry.start_watching(float(os.environ.get("GEOCLUSTER_MODEL_POLL_SECONDS", 5)))
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    registry.stop_watching()
+    route_planner.shutdown()
 
 @app.get("/", tags=["Root"])
 async def root():
@@ -135,119 +421,204 @@ async def root():
 async def health_check():
     """Health check endpoint"""
     return HealthResponse(
-        status="healthy" if clusterer is not None else "unhealthy",
-        model_loaded=clusterer is not None,
+        status="healthy" if registry.active is not None else "unhealthy",
+        model_loaded=registry.active is not None,
         timestamp=datetime.now().isoformat()
     )
 
+def split_prediction_clusters(
+    model: GeoClustering,
+    coords: np.ndarray,
+    groups: List[Any],
+    max_size: Optional[int] = None
+) -> List[Tuple[int, Tuple[float, float], np.ndarray]]:
+    """Return /predict clusters as ``(cluster_id, (lon, lat) center, points)``.
+
+    When *max_size* is set every predicted cluster is split with the
+    capacity-constrained engine so none exceeds it, and clusters are
+    renumbered sequentially; otherwise model cluster ids and centers are
+    kept. Noise (label -1 from DBSCAN/distance models) is never split and
+    keeps id -1, centered at (0, 0).
+    """
+    parts = []
+    if not max_size:
+        centers = model.cluster_centers
+        for lbl, idx in groups:
+            center = centers[lbl] if 0 <= lbl < len(centers) else (0.0, 0.0)
+            parts.append((lbl, center, coords[idx]))
+        return parts
+
+    next_id = 0
+    for lbl, idx in groups:
+        pts = coords[idx]
+        if lbl < 0:
+            parts.append((-1, (0.0, 0.0), pts))
+            continue
+        if len(pts) <= max_size:
+            subsets = [(pts.mean(axis=0).tolist(), pts)]
+        else:
+            labels, centers = model.capacity_constrained_clusters(pts, max_size)
+            order = np.argsort(labels, kind="stable")
+            bounds = np.cumsum(np.bincount(labels, minlength=len(centers)))[:-1]
+            subsets = zip(centers, np.split(pts[order], bounds))
+        for center, sub in subsets:
+            parts.append((next_id, center, sub))
+            next_id += 1
+    return parts
+
+def iter_prediction_clusters(
+    model: GeoClustering,
+    coords: np.ndarray,
+    groups: List[Any],
+    max_size: Optional[int] = None
+) -> Iterator[Dict[str, Any]]:
+    """Split clusters now (see `split_prediction_clusters`) and return an
+    iterator that formats them one at a time.
+
+    Call this on a compute worker: only the formatting is left for whoever
+    consumes the iterator, such as a streamed response.
+    """
+    parts = split_prediction_clusters(model, coords, groups, max_size)
+    return (
+        {
+            "cluster_id": cluster_id,
+            "cluster_center": {"lon": c_lon, "lat": c_lat},
+            "coordinates": [{"lon": lon, "lat": lat} for lon, lat in pts.tolist()]
+        }
+        for cluster_id, (c_lon, c_lat), pts in parts
+    )
+
+def encode_clusters(clusters: Iterator[Dict[str, Any]]) -> Iterator[bytes]:
+    """JSON-encode clusters one at a time."""
+    return (orjson.dumps(cluster, option=orjson.OPT_SERIALIZE_NUMPY) for cluster in clusters)
+
+def cache_encoded(cache_key: Any, lines: Iterator[bytes]) -> Iterator[bytes]:
+    """Pass encoded clusters through, caching them once all have been produced.
+
+    Collection stops once the lines outgrow the cache, so a large stream
+    is never held in memory just to be rejected by `ResultCache.put`.
+    """
+    kept, size = [], 0
+    for line in lines:
+        if kept is not None:
+            size += len(line)
+            kept.append(line)
+            if size > result_cache.max_bytes:
+                kept = None
+        yield line
+    if kept is not None:
+        result_cache.put(cache_key, tuple(kept), size=size)
+
+def json_array(lines: Tuple[bytes, ...]) -> orjson.Fragment:
+    """Embed already encoded items as a JSON array."""
+    return orjson.Fragment(b"[" + b",".join(lines) + b"]")
+
+def ndjson_response(lines: Iterator[bytes]) -> StreamingResponse:
+    """Stream one JSON-encoded cluster per line (application/x-ndjson)."""
+    return StreamingResponse(
+        (line + b"\n" for line in lines),
+        media_type="application/x-ndjson"
+    )
+
 @app.post("/predict", response_model=PredictionResponse, tags=["Prediction"]) 
-async def predict_clusters(request: PredictionRequest):
+async def predict_clusters(
+    request: PredictionRequest,
+    stream: bool = False,
+    model_version: Optional[str] = None,
+    incremental: bool = False,
+    state_key: Optional[str] = None
+):
     """
     Predict clusters for given coordinates
     
     - **coordinates**: List of coordinate objects with lon/lat
+    - **stream**: If true, respond with NDJSON, one cluster object per line
+    - **model_version**: Serve this loaded version instead of the active one
+    - **incremental**: Diff against the previous order set sent with the same
+      **state_key**, model and cap, and re-split only clusters that changed.
+      Clusters are then listed in model-label order and points in arrival order.
+    - **state_key**: Required with incremental; identifies the caller's order set.
+      The mode is per client, so each client should use its own key.
     - Returns clustered coordinates grouped by cluster ID
     """
     try:
-        if clusterer is None:
-            raise HTTPException(
-                status_code=503,
-                detail="Model not loaded. Please check service health."
-            )
+        model = resolve_model(model_version)
+        if incremental and not state_key:
+            raise HTTPException(status_code=400, detail="incremental=true requires a state_key")
         
-        # Convert Pydantic models to list of tuples
-        coordinates = [(coord.lon, coord.lat) for coord in request.coordinates]
+        def _to_array():
+            # Convert Pydantic models to a (n, 2) array
+            return np.array([(coord.lon, coord.lat) for coord in request.coordinates], dtype=np.float64).reshape(-1, 2)
         
-        # Predict and format response
-        result = clusterer.predict_and_format_for_backend(coordinates)
+        if incremental:
+            def _predict_incremental():
+                coords = _to_array()
+                clusterer = incremental_clusterers.get(state_key, model, request.max_points_per_cluster)
+                with clusterer.lock:
+                    clusterer.sync(coords)
+                    clusters = clusterer.clusters()
+                if stream:
+                    return encode_clusters(clusters)
+                return fast_json_response({
+                    "success": True,
+                    "timestamp": datetime.now().isoformat(),
+                    "total_points": len(coords),
+                    "total_clusters": len(clusters),
+                    "clusters": clusters,
+                    "model_info": model.model_metadata
+                })
+            
+            result = await run_compute(_predict_incremental)
+            return ndjson_response(result) if stream else result
         
-        if not result.get("success", False):
-            raise HTTPException(
-                status_code=500,
-                detail=f"Prediction failed: {result.get('error', 'Unknown error')}"
-            )
+        def _lookup(coords):
+            # Both modes share one cache entry: the encoded clusters
+            if not result_cache.enabled:
+                return None, None
+            cache_key = ("predict", model.model_version, request.max_points_per_cluster, coordinates_digest(coords))
+            return cache_key, result_cache.get(cache_key)
         
-        # Optional: enforce maximum cluster size by splitting large clusters
-        def _split_large_cluster(coords_list: List[Dict[str, float]], max_size: int) -> List[Dict[str, Any]]:
-            """Recursively split coords_list into subclusters of size <= max_size using k-means."""
-            if len(coords_list) <= max_size:
-                # Compute center for the small cluster
-                center_lon = sum(p["lon"] for p in coords_list) / len(coords_list)
-                center_lat = sum(p["lat"] for p in coords_list) / len(coords_list)
-                return [{
-                    "cluster_center": {"lon": center_lon, "lat": center_lat},
-                    "coordinates": coords_list,
-                }]
-
-            # Decide number of subclusters
-            from math import ceil
-            k = max(2, ceil(len(coords_list) / max_size))
-            # Prepare data for clustering
-            coord_pairs = [(p["lon"], p["lat"]) for p in coords_list]
-
-            sub_clusterer = GeoClustering(cluster_method='kmeans')
-            labels, centers = sub_clusterer.cluster_coordinates(coord_pairs, auto=False, n_clusters=k)
-
-            # Group points by label
-            grouped: Dict[int, List[Dict[str, float]]] = {}
-            for pt, lbl in zip(coords_list, labels):
-                idx = int(lbl) if hasattr(lbl, "item") else int(lbl)
-                grouped.setdefault(idx, []).append(pt)
-
-            # Build subclusters and recurse if needed
-            subclusters: List[Dict[str, Any]] = []
-            for idx, pts in grouped.items():
-                if len(pts) <= max_size:
-                    c_lon, c_lat = centers[idx]
-                    subclusters.append({
-                        "cluster_center": {"lon": c_lon, "lat": c_lat},
-                        "coordinates": pts,
-                    })
-                else:
-                    subclusters.extend(_split_large_cluster(pts, max_size))
-            return subclusters
-
-        clusters_data = result["clusters"]
-        max_size = request.max_points_per_cluster
-        normalized_clusters: List[Dict[str, Any]] = []
-        if max_size and max_size > 0:
-            # Split clusters exceeding max_size
-            for c in clusters_data:
-                pts: List[Dict[str, float]] = c["coordinates"]
-                split_subs = _split_large_cluster(pts, max_size)
-                for sub in split_subs:
-                    normalized_clusters.append({
-                        "cluster_id": len(normalized_clusters),
-                        "cluster_center": sub["cluster_center"],
-                        "coordinates": sub["coordinates"],
-                    })
-        else:
-            # Keep original clusters
-            for c in clusters_data:
-                normalized_clusters.append(c)
-
-        # Convert to Pydantic response model
-        clusters = []
-        for cluster_data in normalized_clusters:
-            center = cluster_data.get("cluster_center") or {"lon": 0.0, "lat": 0.0}
-            cluster_info = ClusterInfo(
-                cluster_id=cluster_data["cluster_id"],
-                cluster_center=Coordinate(
-                    lon=center["lon"],
-                    lat=center["lat"]
-                ),
-                coordinates=cluster_data["coordinates"]
-            )
-            clusters.append(cluster_info)
+        # Small requests may share one nearest-center pass with concurrent ones;
+        # a cache hit needs no labels, so only misses join a batch
+        coords, cache_key, cached, batched_labels = None, None, None, None
+        if batcher is not None and batcher.accepts(len(request.coordinates)):
+            coords = _to_array()
+            cache_key, cached = _lookup(coords)
+            if cached is None:
+                batched_labels = await batcher.predict(model, coords)
         
-        return PredictionResponse(
-            success=True,
-            timestamp=result["timestamp"],
-            total_points=result["total_points"],
-            total_clusters=len(clusters),
-            clusters=clusters,
-            model_info=result["model_info"]
-        )
+        def _predict():
+            nonlocal coords, cache_key, cached
+            if coords is None:
+                coords = _to_array()
+                cache_key, cached = _lookup(coords)
+            
+            if cached is None:
+                # Predict and split here, on the compute worker, so failures surface
+                # as errors rather than truncated streams; streaming only serializes
+                groups = model.predict_grouped(coords, batched_labels)
+                lines = encode_clusters(iter_prediction_clusters(model, coords, groups, request.max_points_per_cluster))
+                if stream:
+                    return cache_encoded(cache_key, lines) if cache_key is not None else lines
+                cached = tuple(lines)
+                if cache_key is not None:
+                    result_cache.put(cache_key, cached, size=sum(map(len, cached)))
+            elif stream:
+                return iter(cached)
+            
+            # Shape the PredictionResponse payload directly; the values are
+            # already plain floats/ints so per-cluster Pydantic models are skipped
+            return fast_json_response({
+                "success": True,
+                "timestamp": datetime.now().isoformat(),
+                "total_points": len(coords),
+                "total_clusters": len(cached),
+                "clusters": json_array(cached),
+                "model_info": model.model_metadata
+            })
+        
+        result = await run_compute(_predict)
+        return ndjson_response(result) if stream else result
         
     except HTTPException:
         raise
@@ -257,17 +628,22 @@ async def predict_clusters(request: PredictionRequest):
             detail=f"Internal server error: {str(e)}"
         )
 
-@app.post("/retrain", tags=["Model Management"])
-async def retrain_model(request: TrainingRequest):
+@app.post("/retrain", status_code=202, tags=["Model Management"])
+async def retrain_model(request: TrainingRequest, wait: bool = False):
     """
-    Retrain the model with new data
+    Retrain the model with new data in a background worker process
     
     - **training_coordinates**: List of [lon, lat] coordinate pairs
     - **max_k**: Maximum number of clusters to test (optional, default: 15)
+    - **mode**: "full" (default) or "incremental" to update the current model in place of a refit
+    - **batch_size**: Mini-batch size for incremental mode (optional, default: 1024)
+    - **wait**: If true, wait for the job and return the trained model summary
+    
+    Returns a job id immediately; poll `GET /jobs/{job_id}` for progress.
+    The new model replaces the serving one only once training has finished.
     """
     try:
         training_coords = request.training_coordinates
-        max_k = request.max_k
         
         # Validate coordinate format
         for coord in training_coords:
@@ -276,26 +652,43 @@ async def retrain_model(request: TrainingRequest):
                     status_code=400,
                     detail="Each training coordinate must be [lon, lat] pair"
                 )
+        if request.mode == "incremental" and registry.active is None:
+            raise HTTPException(
+                status_code=409,
+                detail="Incremental training needs a loaded model; run a full retrain first"
+            )
         
-        # Retrain model
-        global clusterer
-        clusterer = GeoClustering(cluster_method='kmeans')
-        cluster_labels, centers = clusterer.cluster_coordinates(
-            training_coords,
-            auto=True,
-            max_k=max_k
-        )
+        job = job_manager.submit({
+            "mode": request.mode,
+            "coordinates": np.asarray(training_coords, dtype=np.float64).reshape(-1, 2),
+            "max_k": request.max_k,
+            "batch_size": request.batch_size,
+        })
         
-        # Save the new model
-        clusterer.save_model('production_model.pkl', 'production_metadata.json')
+        if not wait:
+            return {
+                "success": True,
+                "message": "Training job queued",
+                "job_id": job["job_id"],
+                "status": job["status"],
+                "status_url": f"/jobs/{job['job_id']}",
+                "timestamp": datetime.now().isoformat()
+            }
         
-        return {
+        job = await asyncio.wrap_future(job_manager.future(job["job_id"]))
+        if job["status"] != "succeeded":
+            raise HTTPException(
+                status_code=500,
+                detail=f"Retraining failed: {job['error']}"
+            )
+        return JSONResponse(content={
             "success": True,
-            "message": "Model retrained successfully",
-            "n_clusters": len(centers),
-            "cluster_centers": centers,
+            "message": "Model updated incrementally" if request.mode == "incremental" else "Model retrained successfully",
+            "mode": request.mode,
+            "job_id": job["job_id"],
+            **job["result"],
             "timestamp": datetime.now().isoformat()
-        }
+        })
         
     except HTTPException:
         raise
@@ -305,20 +698,28 @@ async def retrain_model(request: TrainingRequest):
             detail=f"Retraining failed: {str(e)}"
         )
 
+@app.get("/jobs/{job_id}", response_model=JobStatusResponse, tags=["Model Management"])
+async def get_job_status(job_id: str):
+    """Report status and progress of a training job"""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unknown job id: {job_id}"
+        )
+    return job
+
 @app.get("/model-info", response_model=ModelInfoResponse, tags=["Model Management"])
-async def get_model_info():
-    """Get information about the current model"""
+async def get_model_info(model_version: Optional[str] = None):
+    """Get information about the current model, or a loaded `model_version`"""
     try:
-        if clusterer is None:
-            raise HTTPException(
-                status_code=503,
-                detail="Model not loaded"
-            )
+        model = resolve_model(model_version)
         
         return ModelInfoResponse(
             success=True,
-            model_info=clusterer.model_metadata,
-            cluster_centers=clusterer.cluster_centers,
+            model_version=model.model_version,
+            model_info=model.model_metadata,
+            cluster_centers=model.cluster_centers,
             timestamp=datetime.now().isoformat()
         )
         
@@ -330,58 +731,621 @@ async def get_model_info():
             detail=f"Failed to get model info: {str(e)}"
         )
 
-@app.post("/predict-batch", tags=["Prediction"])
-async def predict_clusters_batch(coordinates: List[List[float]]):
+def model_versions_response() -> ModelVersionsResponse:
+    return ModelVersionsResponse(
+        success=True,
+        active_version=registry.active_version,
+        versions=registry.describe(),
+        timestamp=datetime.now().isoformat()
+    )
+
+@app.get("/models", response_model=ModelVersionsResponse, tags=["Model Management"])
+async def list_models():
+    """List loaded model versions and which one is active"""
+    return model_versions_response()
+
+@app.post("/models/rollback", response_model=ModelVersionsResponse, tags=["Model Management"])
+async def rollback_model():
+    """Switch back to the previously active model version"""
+    try:
+        registry.rollback()
+    except LookupError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return model_versions_response()
+
+@app.post("/models/{version}/activate", response_model=ModelVersionsResponse, tags=["Model Management"])
+async def activate_model(version: str):
+    """Make a loaded model version the one served by default"""
+    try:
+        registry.activate(version)
+    except KeyError:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unknown model version: {version}"
+        )
+    return model_versions_response()
+
+@app.post("/tune/dbscan", tags=["Model Management"])
+async def tune_dbscan(request: DbscanSweepRequest):
     """
-    Batch prediction endpoint for simple coordinate arrays
+    Score a grid of DBSCAN settings on one set of coordinates
     
     - **coordinates**: List of [lon, lat] coordinate pairs
-    - Simplified endpoint for direct coordinate arrays
+    - **eps_km**: Radii to try; the neighbour graph is built once at the largest
+    - **min_samples**: Core point thresholds to try
+    - **silhouette_sample_size**: Points in the shared silhouette sample (optional, default: 2000, at most 10000)
+    
+    Returns cluster count, noise ratio and silhouette for every (eps_km, min_samples)
+    pair, the best-scoring setting, and timings per stage.
     """
     try:
-        if clusterer is None:
+        coords = np.asarray(request.coordinates, dtype=np.float64)
+        if coords.ndim != 2 or coords.shape[1] != 2:
             raise HTTPException(
-                status_code=503,
-                detail="Model not loaded"
+                status_code=400,
+                detail="Each coordinate must be [lon, lat] pair"
+            )
+        if min(request.eps_km) <= 0 or min(request.min_samples) < 1:
+            raise HTTPException(
+                status_code=400,
+                detail="eps_km values must be positive and min_samples at least 1"
             )
         
-        # Validate coordinate format
-        for coord in coordinates:
-            if len(coord) != 2:
-                raise HTTPException(
-                    status_code=400,
-                    detail="Each coordinate must be [lon, lat] pair"
+        def _sweep():
+            return sweep_dbscan(
+                coords, request.eps_km, request.min_samples,
+                silhouette_sample_size=request.silhouette_sample_size,
+            )
+        
+        sweep = await run_compute(_sweep)
+        return fast_json_response({
+            "success": True,
+            **sweep,
+            "timestamp": datetime.now().isoformat()
+        })
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"DBSCAN sweep failed: {str(e)}"
+        )
+
+PREDICT_BATCH_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {
+                "schema": {
+                    "oneOf": [
+                        {
+                            "type": "array",
+                            "items": {"type": "array", "items": {"type": "number"}, "minItems": 2, "maxItems": 2},
+                            "description": "List of [lon, lat] pairs"
+                        },
+                        ColumnarCoordinates.model_json_schema()
+                    ]
+                }
+            },
+            "application/octet-stream": {
+                "schema": {
+                    "type": "string",
+                    "format": "binary",
+                    "description": "Packed little-endian float64 values lon0, lat0, lon1, lat1, ..."
+                }
+            }
+        }
+    }
+}
+
+def parse_coordinate_body(body: bytes, content_type: str) -> np.ndarray:
+    """Decode a /predict-batch body into a float64 (n, 2) array of (lon, lat).
+
+    Accepts packed little-endian float64 pairs (application/octet-stream,
+    loaded without copying), columnar JSON ({"lon": [...], "lat": [...]})
+    or the original JSON list of [lon, lat] pairs. Validation is done on
+    whole arrays rather than per point.
+    """
+    if content_type.split(";")[0].strip() == "application/octet-stream":
+        if len(body) % 16:
+            raise HTTPException(
+                status_code=400,
+                detail="Binary body must hold float64 (lon, lat) pairs (16 bytes per point)"
+            )
+        coords = np.frombuffer(body, dtype="<f8").reshape(-1, 2)
+    else:
+        try:
+            payload = orjson.loads(body)
+        except orjson.JSONDecodeError:
+            raise HTTPException(status_code=400, detail="Request body is not valid JSON")
+
+        if isinstance(payload, dict):
+            if not {"lon", "lat"}.issubset(payload):
+                raise HTTPException(status_code=400, detail="Columnar body needs 'lon' and 'lat' arrays")
+            try:
+                lon = np.asarray(payload["lon"], dtype=np.float64)
+                lat = np.asarray(payload["lat"], dtype=np.float64)
+            except (TypeError, ValueError):
+                raise HTTPException(status_code=400, detail="'lon' and 'lat' must be arrays of numbers")
+            if lon.ndim != 1 or lon.shape != lat.shape:
+                raise HTTPException(status_code=400, detail="'lon' and 'lat' must be flat arrays of equal length")
+            coords = np.column_stack((lon, lat))
+        elif isinstance(payload, list):
+            try:
+                coords = np.asarray(payload, dtype=np.float64)
+            except (TypeError, ValueError):
+                raise HTTPException(status_code=400, detail="Each coordinate must be [lon, lat] pair")
+            if not payload:
+                coords = coords.reshape(0, 2)
+            elif coords.ndim != 2 or coords.shape[1] != 2:
+                raise HTTPException(status_code=400, detail="Each coordinate must be [lon, lat] pair")
+        else:
+            raise HTTPException(status_code=400, detail="Expected a list of [lon, lat] pairs or {'lon': [...], 'lat': [...]}")
+
+    if not np.isfinite(coords).all():
+        raise HTTPException(status_code=400, detail="Coordinates must be finite numbers")
+    return coords
+
+@app.post("/predict-batch", tags=["Prediction"], openapi_extra=PREDICT_BATCH_BODY)
+async def predict_clusters_batch(request: Request, stream: bool = False, model_version: Optional[str] = None):
+    """
+    Batch prediction endpoint for simple coordinate arrays
+    
+    - **coordinates**: List of [lon, lat] coordinate pairs, columnar JSON
+      `{"lon": [...], "lat": [...]}`, or an `application/octet-stream` body of
+      packed little-endian float64 lon/lat pairs
+    - **stream**: If true, respond with NDJSON, one cluster object per line
+    - **model_version**: Serve this loaded version instead of the active one
+    - Simplified endpoint for direct coordinate arrays
+    """
+    try:
+        model = resolve_model(model_version)
+        
+        body = await request.body()
+        content_type = request.headers.get("content-type", "")
+        
+        def _predict():
+            coords = parse_coordinate_body(body, content_type)
+            
+            # Both modes share one cache entry: the encoded clusters
+            cache_key = None
+            cached = None
+            if result_cache.enabled:
+                cache_key = ("predict-batch", model.model_version, coordinates_digest(coords))
+                cached = result_cache.get(cache_key)
+            
+            if cached is None:
+                # Transform to minimal format: list of clusters with coordinate arrays
+                groups = model.predict_grouped(coords)
+                lines = encode_clusters(
+                    {"cluster_id": lbl, "coordinates": coords[idx].tolist()} for lbl, idx in groups
                 )
+                if stream:
+                    return cache_encoded(cache_key, lines) if cache_key is not None else lines
+                cached = tuple(lines)
+                if cache_key is not None:
+                    result_cache.put(cache_key, cached, size=sum(map(len, cached)))
+            elif stream:
+                return iter(cached)
+            
+            # Return minified JSON so arrays stay inline
+            return fast_json_response({"clusters": json_array(cached)})
         
-        # Convert to coordinate objects for internal processing
-        coord_objects = [{"lon": coord[0], "lat": coord[1]} for coord in coordinates]
+        result = await run_compute(_predict)
+        return ndjson_response(result) if stream else result
         
-        # Predict using internal helper
-        result = clusterer.predict_and_format_for_backend(coord_objects)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Batch prediction failed: {str(e)}"
+        )
+
+def resolve_session(session_id: str):
+    """Return the live session or raise 404."""
+    try:
+        return sessions.get(session_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown session: {session_id}")
+
+def session_summary(session_id: str, session, order_ids: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    summary = session.summary()
+    return {
+        "success": True,
+        "session_id": session_id,
+        "model_version": session.model.model_version,
+        "timestamp": datetime.now().isoformat(),
+        **{key: summary.pop(key) for key in ("total_orders", "total_clusters", "max_cluster_size", "max_points_per_cluster")},
+        "order_ids": order_ids,
+        "stats": summary
+    }
+
+@app.post("/sessions", response_model=SessionSummary, status_code=201, tags=["Sessions"])
+async def create_session(request: SessionRequest, model_version: Optional[str] = None):
+    """
+    Start a live order set clustered online from the model's centers
+    
+    - **max_points_per_cluster**: Cap; a cluster pushed over it is rebalanced with its neighbours
+    - **coordinates**: Optional initial orders
+    - **model_version**: Seed from this loaded version instead of the active one
+    """
+    try:
+        model = resolve_model(model_version)
+        session_id, session = sessions.create(model, request.max_points_per_cluster)
+        
+        def _seed():
+            ids = None
+            if request.coordinates:
+                with session.lock:
+                    ids = session.add_orders([(c.lon, c.lat) for c in request.coordinates])
+            return fast_json_response(session_summary(session_id, session, ids), status_code=201)
+        
+        return await run_compute(_seed)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to create session: {str(e)}"
+        )
+
+@app.get("/sessions/{session_id}", tags=["Sessions"])
+async def get_session(session_id: str):
+    """Snapshot every cluster of the session with its center, order ids and coordinates"""
+    session = resolve_session(session_id)
+    
+    def _snapshot():
+        with session.lock:
+            snapshot = session.snapshot()
+        return fast_json_response({
+            "success": True,
+            "session_id": session_id,
+            "model_version": session.model.model_version,
+            "timestamp": datetime.now().isoformat(),
+            **snapshot
+        })
+    
+    try:
+        return await run_compute(_snapshot)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to snapshot session: {str(e)}"
+        )
+
+@app.post("/sessions/{session_id}/orders", response_model=SessionSummary, tags=["Sessions"])
+async def add_session_orders(session_id: str, request: SessionOrdersRequest):
+    """Add orders to the nearest clusters and return their ids"""
+    session = resolve_session(session_id)
+    
+    def _add():
+        with session.lock:
+            ids = session.add_orders([(c.lon, c.lat) for c in request.coordinates])
+            return fast_json_response(session_summary(session_id, session, ids))
+    
+    try:
+        return await run_compute(_add)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to add orders: {str(e)}"
+        )
+
+@app.post("/sessions/{session_id}/orders/remove", response_model=SessionSummary, tags=["Sessions"])
+async def remove_session_orders(session_id: str, request: SessionRemoveRequest):
+    """Remove orders by id"""
+    session = resolve_session(session_id)
+    
+    def _remove():
+        with session.lock:
+            session.remove_orders(request.order_ids)
+            return fast_json_response(session_summary(session_id, session))
+    
+    try:
+        return await run_compute(_remove)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Unknown order id: {e.args[0]}")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to remove orders: {str(e)}"
+        )
+
+@app.delete("/sessions/{session_id}", tags=["Sessions"])
+async def delete_session(session_id: str):
+    """End a session and release its orders"""
+    try:
+        sessions.delete(session_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown session: {session_id}")
+    return {"success": True, "session_id": session_id, "timestamp": datetime.now().isoformat()}
 
-        # Transform to minimal format: list of clusters with coordinate arrays
-        simplified_clusters = []
-        for cluster in result["clusters"]:
-            coord_pairs = [ [pt["lon"], pt["lat"]] for pt in cluster["coordinates"] ]
-            simplified_clusters.append({
-                "cluster_id": cluster["cluster_id"],
-                "coordinates": coord_pairs
+def resolve_depot(depot: Optional[Coordinate]) -> Tuple[float, float]:
+    """Return the requested depot, or the default one from source.json, or raise 400."""
+    if depot is not None:
+        return depot.lon, depot.lat
+    if DEFAULT_DEPOT is None:
+        raise HTTPException(
+            status_code=400,
+            detail="No depot given and no default depot configured"
+        )
+    return DEFAULT_DEPOT
+
+@app.post("/route", response_model=RouteResponse, tags=["Routing"])
+async def route_clusters(request: RouteRequest, model_version: Optional[str] = None):
+    """
+    Sequence stops into depot-to-depot tours, one per cluster
+    
+    - **clusters**: Stops already grouped into clusters, or
+    - **coordinates**: Ungrouped stops, clustered with the model first
+      (optionally capped by **max_points_per_cluster**)
+    - **depot**: Start and end of every tour; defaults to the depot in source.json
+    - **time_limit**: Seconds allowed for improving the tours (default 2), capped
+      below the request timeout
+    - **model_version**: With coordinates, cluster with this loaded version
+    
+    Tours are built nearest-neighbour first and then improved with 2-opt and
+    Or-opt moves on worker processes until the time limit.
+    """
+    try:
+        if (request.clusters is None) == (request.coordinates is None):
+            raise HTTPException(
+                status_code=400,
+                detail="Provide exactly one of 'clusters' or 'coordinates'"
+            )
+        depot = resolve_depot(request.depot)
+        model = resolve_model(model_version) if request.coordinates is not None else None
+        # Counted from here so time spent queued for a worker comes out of the limit
+        deadline = solve_deadline(request.time_limit)
+        
+        def _route():
+            if request.clusters is not None:
+                cluster_ids = list(range(len(request.clusters)))
+                groups = [
+                    np.array([(c.lon, c.lat) for c in cluster], dtype=np.float64).reshape(-1, 2)
+                    for cluster in request.clusters
+                ]
+            else:
+                # Same clusters and ids as /predict returns
+                coords = np.array([(c.lon, c.lat) for c in request.coordinates], dtype=np.float64).reshape(-1, 2)
+                clusters = list(iter_prediction_clusters(
+                    model, coords, model.predict_grouped(coords), request.max_points_per_cluster
+                ))
+                cluster_ids = [cluster["cluster_id"] for cluster in clusters]
+                groups = [
+                    np.array([(p["lon"], p["lat"]) for p in cluster["coordinates"]], dtype=np.float64).reshape(-1, 2)
+                    for cluster in clusters
+                ]
+            
+            tours = route_planner.solve(groups, depot, max(deadline - time.time(), 0.0))
+            routes = [
+                {
+                    "cluster_id": cluster_id,
+                    "distance_km": tour["distance_km"],
+                    "initial_distance_km": tour["initial_distance_km"],
+                    "order": tour["order"],
+                    "stops": [{"lon": lon, "lat": lat} for lon, lat in pts[tour["order"]].tolist()]
+                }
+                for cluster_id, pts, tour in zip(cluster_ids, groups, tours)
+            ]
+            return fast_json_response({
+                "success": True,
+                "timestamp": datetime.now().isoformat(),
+                "depot": {"lon": depot[0], "lat": depot[1]},
+                "total_clusters": len(routes),
+                "total_distance_km": sum(r["distance_km"] for r in routes),
+                "routes": routes
             })
+        
+        return await run_compute(_route)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Routing failed: {str(e)}"
+        )
 
-        # Return minified JSON so arrays stay inline
-        import json as _json
-        from fastapi.responses import Response
-        return Response(
-            content=_json.dumps({"clusters": simplified_clusters}, separators=(',', ':')),
-            media_type="application/json"
+@app.post("/dispatch", response_model=DispatchResponse, tags=["Routing"])
+async def dispatch_vehicles(request: DispatchRequest):
+    """
+    Plan complete vehicle routes for a day's orders (capacitated VRP)
+    
+    - **orders**: Delivery stops as lon/lat objects
+    - **demands**: Demand per order (optional, default 1 each)
+    - **capacity**: Capacity of each vehicle
+    - **n_vehicles**: Fleet size (optional); orders it cannot serve are listed in `unassigned`
+    - **depot**: Start and end of every route; defaults to the depot in source.json
+    - **time_limit**: Seconds for the whole solve (default 10), capped below the
+      request timeout
+    
+    Routes are built with Clarke-Wright savings and improved with
+    inter-route relocate/swap and intra-route 2-opt/Or-opt until the limit.
+    """
+    try:
+        depot = resolve_depot(request.depot)
+        if request.demands is not None and len(request.demands) != len(request.orders):
+            raise HTTPException(
+                status_code=400,
+                detail="demands must have one value per order"
+            )
+        # Counted from here so time spent queued for a worker comes out of the limit
+        deadline = solve_deadline(request.time_limit)
+        
+        def _dispatch():
+            coords = np.array([(c.lon, c.lat) for c in request.orders], dtype=np.float64).reshape(-1, 2)
+            try:
+                plan = solve_cvrp(
+                    coords, depot, request.capacity,
+                    n_vehicles=request.n_vehicles,
+                    demands=request.demands,
+                    time_limit=max(deadline - time.time(), 0.0),
+                    planner=route_planner
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            
+            routes = [
+                {
+                    "vehicle": route["vehicle"],
+                    "load": route["load"],
+                    "distance_km": route["distance_km"],
+                    "order": route["stops"],
+                    "stops": [{"lon": lon, "lat": lat} for lon, lat in coords[route["stops"]].tolist()]
+                }
+                for route in plan["routes"]
+            ]
+            return fast_json_response({
+                "success": True,
+                "timestamp": datetime.now().isoformat(),
+                "depot": {"lon": depot[0], "lat": depot[1]},
+                "total_vehicles": len(routes),
+                "total_distance_km": plan["total_distance_km"],
+                "initial_distance_km": plan["initial_distance_km"],
+                "routes": routes,
+                "unassigned": plan["unassigned"],
+                "stats": plan["stats"]
+            })
+        
+        return await run_compute(_dispatch)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Dispatch planning failed: {str(e)}"
         )
+
+# Largest matrix returned as JSON; bigger ones must use format=binary
+MATRIX_JSON_MAX_CELLS = 1_000_000
+
+def coordinate_pairs(pairs: List[List[float]], name: str) -> np.ndarray:
+    """Return [lon, lat] *pairs* as a float64 (n, 2) array, or raise 400."""
+    arr = np.asarray(pairs, dtype=np.float64) if pairs else np.empty((0, 2))
+    if arr.ndim != 2 or arr.shape[1] != 2:
+        raise HTTPException(status_code=400, detail=f"Each {name} coordinate must be [lon, lat] pair")
+    if not np.isfinite(arr).all():
+        raise HTTPException(status_code=400, detail="Coordinates must be finite numbers")
+    return arr
+
+def resolve_matrix_side(
+    pairs: Optional[List[List[float]]], ids: Optional[List[str]], name: str
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Return one side of a /matrix request as coordinates plus address-matrix
+    positions (``None`` unless every point is a registered address)."""
+    if ids is None:
+        coords = coordinate_pairs(pairs, name)
+        return coords, address_matrix.match_coordinates(coords) if address_matrix is not None else None
+    if address_matrix is None:
+        raise HTTPException(status_code=400, detail="No precomputed address matrix is loaded")
+    try:
+        positions = address_matrix.positions(ids)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Unknown address id: {e.args[0]}")
+    return address_matrix.coordinates[positions], positions
+
+@app.post(
+    "/matrix",
+    response_model=MatrixResponse,
+    tags=["Routing"],
+    responses={200: {"content": {"application/octet-stream": {}}}}
+)
+async def get_distance_matrix(request: MatrixRequest, format: Literal["json", "binary"] = "json"):
+    """
+    Distance matrix in km between sources (rows) and destinations (columns)
+    
+    - **sources** / **destinations**: Lists of [lon, lat] pairs; destinations default to sources
+    - **source_ids** / **destination_ids**: Registered address ids instead of coordinates
+    - **detour_factor**: Road-detour scale on top of haversine (see distance_matrix.py to calibrate it)
+    - **dtype**: "float32" (default) or "float64"
+    - **format**: "json" (up to 1,000,000 cells) or "binary", a row-major stream of
+      little-endian floats described by the X-Matrix-Rows, X-Matrix-Cols and
+      X-Matrix-Dtype headers
+    
+    When every row and column is a registered address, distances are gathered
+    from the precomputed address matrix; otherwise they are computed locally
+    in memory-bounded row blocks. Either way there are no external calls.
+    """
+    try:
+        if (request.sources is None) == (request.source_ids is None):
+            raise HTTPException(status_code=400, detail="Provide exactly one of 'sources' or 'source_ids'")
+        if request.destinations is not None and request.destination_ids is not None:
+            raise HTTPException(status_code=400, detail="Provide at most one of 'destinations' or 'destination_ids'")
+        
+        src, src_pos = resolve_matrix_side(request.sources, request.source_ids, "source")
+        if request.destinations is None and request.destination_ids is None:
+            dst, dst_pos = src, src_pos
+        else:
+            dst, dst_pos = resolve_matrix_side(request.destinations, request.destination_ids, "destination")
+        
+        factor = request.detour_factor or default_detour_factor()
+        dtype = np.dtype(request.dtype).newbyteorder("<")
+        rows, cols = len(src), len(dst)
+        precomputed = src_pos is not None and dst_pos is not None
+        
+        def _blocks():
+            if not precomputed:
+                yield from iter_distance_blocks(src, dst, detour_factor=factor, dtype=dtype)
+                return
+            scale = factor / address_matrix.detour_factor
+            for block in address_matrix.iter_submatrix_blocks(src_pos, dst_pos):
+                yield (block * scale if scale != 1.0 else block).astype(dtype, copy=False)
+        
+        if format == "binary":
+            # Blocks are produced on the compute pool as the client reads them,
+            # under one admission slot for the whole stream
+            chunks = await stream_compute(block.tobytes() for block in _blocks())
+            return StreamingResponse(
+                chunks,
+                media_type="application/octet-stream",
+                headers={
+                    "Content-Length": str(rows * cols * dtype.itemsize),
+                    "X-Matrix-Rows": str(rows),
+                    "X-Matrix-Cols": str(cols),
+                    "X-Matrix-Dtype": dtype.str,
+                    "X-Detour-Factor": repr(factor),
+                    "X-Matrix-Precomputed": str(precomputed).lower()
+                }
+            )
+        
+        if rows * cols > MATRIX_JSON_MAX_CELLS:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Matrix has {rows * cols} cells; request format=binary above {MATRIX_JSON_MAX_CELLS}"
+            )
+        
+        def _matrix():
+            return fast_json_response({
+                "success": True,
+                "timestamp": datetime.now().isoformat(),
+                "units": "km",
+                "rows": rows,
+                "cols": cols,
+                "dtype": request.dtype,
+                "detour_factor": factor,
+                "precomputed": precomputed,
+                "distances": np.concatenate(list(_blocks()) or [np.empty((0, cols), dtype=dtype)])
+            })
+        
+        return await run_compute(_matrix)
         
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
-            detail=f"Batch prediction failed: {str(e)}"
+            detail=f"Distance matrix failed: {str(e)}"
         )
 
 # Custom exception handler for better error responses
@@ -393,10 +1357,13 @@ async def http_exception_handler(request, exc):
             "success": False,
             "error": exc.detail,
             "timestamp": datetime.now().isoformat()
-        }
+        },
+        headers=getattr(exc, "headers", None)
     )
 
 if __name__ == "__main__":
+    import uvicorn
+
     # Run with uvicorn
     uvicorn.run(
         "main:app",  # Replace "main" with your filename
@@ -412,13 +1379,27 @@ async def get_metrics():
     """Get basic API metrics"""
     return {
         "uptime": datetime.now().isoformat(),
-        "model_loaded": clusterer is not None,
+        "model_loaded": registry.active is not None,
+        "model_version": registry.active_version,
         "api_version": "1.0.0",
+        "compute": compute.stats(),
+        "microbatch": batcher.stats() if batcher is not None else None,
+        "cache": result_cache.stats(),
+        "address_matrix": address_matrix.describe() if address_matrix is not None else None,
+        "incremental": incremental_clusterers.stats(),
+        "sessions": sessions.stats(),
         "endpoints": {
             "health": "/health",
             "predict": "/predict",
             "predict_batch": "/predict-batch",
             "retrain": "/retrain",
-            "model_info": "/model-info"
+            "jobs": "/jobs/{job_id}",
+            "model_info": "/model-info",
+            "models": "/models",
+            "tune_dbscan": "/tune/dbscan",
+            "sessions": "/sessions",
+            "route": "/route",
+            "dispatch": "/dispatch",
+            "matrix": "/matrix"
         }
     }
\ No newline at end of file
@@ -59,7 +59,7 @@ def test_retrain():
         "max_k": 10
     }
     
-    response = requests.post(f"{BASE_URL}/retrain", json=training_data)
+    response = requests.post(f"{BASE_URL}/retrain", params={"wait": "true"}, json=training_data)
     print("\nRetrain Result:")
     print(json.dumps(response.json(), indent=2))
     return response.json()
@@ -0,0 +1,277 @@
+"""
+Live cluster sessions: a changing order set clustered online.
+
+A `ClusterSession` starts from a model's centers and keeps every order's
+label plus per-cluster coordinate sums and counts in NumPy arrays. Adding
+or removing an order updates its cluster's sum, count and center in O(1).
+New orders join the nearest current center. Only a cluster pushed over
+the capacity cap is rebalanced, together with its nearest neighbouring
+clusters, using the capacity-constrained engine. `SessionStore` holds
+the sessions the API serves.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Tuple
+
+import numpy as np
+
+from route_generator import CoordinateArray, GeoClustering, nearest_rows
+
+# Clusters (besides the overflowing one) pooled for a local rebalance.
+REBALANCE_NEIGHBOURS = 3
+# A rebalance fills clusters to at most this share of the cap, leaving room
+# for new orders before the next one is needed.
+REBALANCE_FILL = 0.9
+
+
+class ClusterSession:
+    """Online clustering of one live order set.
+
+    Order ids are assigned by `add_orders` and never reused. Not
+    thread-safe on its own; callers serialise access with `lock`.
+
+    Parameters
+    ----------
+    model : GeoClustering
+        Model whose centers seed the session's clusters. The model itself
+        is never modified.
+    max_points_per_cluster : int | None
+        Capacity cap; ``None`` never rebalances.
+    """
+
+    def __init__(self, model: GeoClustering, max_points_per_cluster: int | None = None) -> None:
+        if max_points_per_cluster is not None and max_points_per_cluster <= 0:
+            raise ValueError("max_points_per_cluster must be positive")
+        self.model = model
+        self.max_points_per_cluster = max_points_per_cluster
+        self.lock = threading.Lock()
+        self.created = time.time()
+
+        seeds = np.array(model.cluster_centers, dtype=np.float64).reshape(-1, 2)
+        if not len(seeds):
+            raise ValueError("Model has no cluster centers")
+        self._centers = seeds.copy()
+        self._sums = np.zeros_like(seeds)
+        self._counts = np.zeros(len(seeds), dtype=np.int64)
+
+        self._coords = np.empty((0, 2), dtype=np.float64)
+        self._labels = np.empty(0, dtype=np.int64)  # -1 once removed
+        self._n = 0
+        self._stats = {"added": 0, "removed": 0, "rebalances": 0, "rebalanced_orders": 0}
+
+    def __len__(self) -> int:
+        return int(self._counts.sum())
+
+    # ------------------------------------------------------------------
+    # Array bookkeeping
+    # ------------------------------------------------------------------
+    def _reserve(self, extra: int) -> None:
+        need = self._n + extra
+        if need <= len(self._labels):
+            return
+        size = max(need, 2 * len(self._labels), 1024)
+        coords = np.empty((size, 2), dtype=np.float64)
+        labels = np.full(size, -1, dtype=np.int64)
+        coords[:self._n] = self._coords[:self._n]
+        labels[:self._n] = self._labels[:self._n]
+        self._coords, self._labels = coords, labels
+
+    def _new_clusters(self, count: int, centers: np.ndarray) -> np.ndarray:
+        first = len(self._counts)
+        self._centers = np.vstack((self._centers, centers))
+        self._sums = np.vstack((self._sums, np.zeros((count, 2))))
+        self._counts = np.concatenate((self._counts, np.zeros(count, dtype=np.int64)))
+        return np.arange(first, first + count)
+
+    def _update_centers(self, labels: np.ndarray) -> None:
+        # Empty clusters keep their last center so they can attract new orders
+        live = labels[self._counts[labels] > 0]
+        self._centers[live] = self._sums[live] / self._counts[live, None]
+
+    # ------------------------------------------------------------------
+    # Order set changes
+    # ------------------------------------------------------------------
+    def add_orders(self, coords: CoordinateArray) -> np.ndarray:
+        """Add orders at *coords* (``(lon, lat)`` rows) and return their ids."""
+        pts = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        self._reserve(len(pts))
+        ids = np.arange(self._n, self._n + len(pts))
+        labels = nearest_rows(pts, self._centers).astype(np.int64)
+        self._coords[ids] = pts
+        self._labels[ids] = labels
+        self._n += len(pts)
+
+        np.add.at(self._sums, labels, pts)
+        np.add.at(self._counts, labels, 1)
+        touched = np.unique(labels)
+        self._update_centers(touched)
+        self._stats["added"] += len(pts)
+
+        cap = self.max_points_per_cluster
+        if cap:
+            for lbl in touched[self._counts[touched] > cap]:
+                # An earlier rebalance may already have absorbed this overflow
+                if self._counts[lbl] > cap:
+                    self._rebalance(int(lbl))
+        return ids
+
+    def remove_orders(self, ids: Iterable[int]) -> None:
+        """Remove orders *ids*; raise ``KeyError`` for unknown or already removed ids."""
+        ids = np.unique(np.asarray(list(ids), dtype=np.int64))
+        bad = (ids < 0) | (ids >= self._n)
+        if bad.any() or (self._labels[ids[~bad]] < 0).any():
+            unknown = ids[bad] if bad.any() else ids[self._labels[ids] < 0]
+            raise KeyError(int(unknown[0]))
+        labels = self._labels[ids]
+        np.subtract.at(self._sums, labels, self._coords[ids])
+        np.subtract.at(self._counts, labels, 1)
+        self._labels[ids] = -1
+        self._update_centers(np.unique(labels))
+        self._stats["removed"] += len(ids)
+
+    def _rebalance(self, lbl: int) -> None:
+        """Re-split cluster *lbl* and its nearest neighbours so all fit the cap.
+
+        Parts are filled to at most `REBALANCE_FILL` of the cap and take over
+        the pooled cluster ids closest to them; new clusters are opened only
+        when the pool needs more parts than it has clusters.
+        """
+        cap = self.max_points_per_cluster
+        d2 = ((self._centers - self._centers[lbl]) ** 2).sum(axis=1)
+        group = np.argsort(d2, kind="stable")[:REBALANCE_NEIGHBOURS + 1]
+        members = np.flatnonzero(np.isin(self._labels[:self._n], group))
+        pts = self._coords[members]
+
+        target_size = max(1, int(cap * REBALANCE_FILL))
+        part_labels, part_centers = self.model.capacity_constrained_clusters(pts, target_size)
+        part_centers = np.asarray(part_centers, dtype=np.float64).reshape(-1, 2)
+        if len(part_centers) > len(group):
+            group = np.concatenate((group, self._new_clusters(len(part_centers) - len(group), part_centers[len(group):])))
+
+        # Greedily give each part the closest free pooled id, closest pairs first
+        cost = ((part_centers[:, None, :] - self._centers[group][None, :, :]) ** 2).sum(axis=2)
+        target = np.full(len(part_centers), -1, dtype=np.int64)
+        used = np.zeros(len(group), dtype=bool)
+        for flat in np.argsort(cost, axis=None, kind="stable"):
+            part, slot = divmod(int(flat), len(group))
+            if target[part] < 0 and not used[slot]:
+                target[part], used[slot] = group[slot], True
+
+        new_labels = target[part_labels]
+        self._labels[members] = new_labels
+        self._sums[group] = 0.0
+        self._counts[group] = 0
+        np.add.at(self._sums, new_labels, pts)
+        np.add.at(self._counts, new_labels, 1)
+        self._update_centers(group)
+        self._stats["rebalances"] += 1
+        self._stats["rebalanced_orders"] += len(members)
+
+    # ------------------------------------------------------------------
+    # Views
+    # ------------------------------------------------------------------
+    @property
+    def centers(self) -> np.ndarray:
+        """Current center of every cluster id (empty clusters keep their last one)."""
+        return self._centers.copy()
+
+    def labels_of(self, ids: Iterable[int]) -> np.ndarray:
+        """Cluster label of each order id (``-1`` for removed orders)."""
+        return self._labels[np.asarray(list(ids), dtype=np.int64)]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "total_orders": len(self),
+            "total_clusters": int((self._counts > 0).sum()),
+            "max_cluster_size": int(self._counts.max()) if len(self._counts) else 0,
+            "max_points_per_cluster": self.max_points_per_cluster,
+            **self._stats,
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return every non-empty cluster with its center, order ids and coordinates."""
+        alive = np.flatnonzero(self._labels[:self._n] >= 0)
+        labels = self._labels[alive]
+        order = np.argsort(labels, kind="stable")
+        uniq, starts = np.unique(labels[order], return_index=True)
+        clusters = []
+        for lbl, idx in zip(uniq.tolist(), np.split(alive[order], starts[1:])):
+            c_lon, c_lat = self._centers[lbl].tolist()
+            clusters.append({
+                "cluster_id": lbl,
+                "cluster_center": {"lon": c_lon, "lat": c_lat},
+                "order_ids": idx.tolist(),
+                "coordinates": [{"lon": lon, "lat": lat} for lon, lat in self._coords[idx].tolist()],
+            })
+        return {**self.summary(), "clusters": clusters}
+
+
+class SessionStore:
+    """Thread-safe registry of live sessions, evicting the least recently used.
+
+    Parameters
+    ----------
+    max_sessions : int
+        Sessions kept at once.
+    ttl : float | None
+        Seconds a session may sit unused before it is dropped, or ``None``.
+    """
+
+    def __init__(self, max_sessions: int = 64, ttl: float | None = 3600.0) -> None:
+        self.max_sessions = max(1, int(max_sessions))
+        self.ttl = ttl
+        self._sessions: "OrderedDict[str, Tuple[float, ClusterSession]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "SessionStore":
+        """Build from ``GEOCLUSTER_MAX_SESSIONS`` and ``GEOCLUSTER_SESSION_TTL``
+        (seconds, ``0`` for no expiry)."""
+        return cls(
+            int(os.environ.get("GEOCLUSTER_MAX_SESSIONS", 64)),
+            float(os.environ.get("GEOCLUSTER_SESSION_TTL", 3600)) or None,
+        )
+
+    def _expire(self, now: float) -> None:
+        if self.ttl is None:
+            return
+        for session_id in [sid for sid, (seen, _) in self._sessions.items() if now - seen > self.ttl]:
+            del self._sessions[session_id]
+
+    def create(self, model: GeoClustering, max_points_per_cluster: int | None = None) -> Tuple[str, ClusterSession]:
+        session = ClusterSession(model, max_points_per_cluster)
+        session_id = uuid.uuid4().hex
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            self._sessions[session_id] = (now, session)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session_id, session
+
+    def get(self, session_id: str) -> ClusterSession:
+        """Return the session, refreshing its last use; raise ``KeyError`` if unknown."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            _, session = self._sessions.pop(session_id)
+            self._sessions[session_id] = (now, session)
+            return session
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            del self._sessions[session_id]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "orders": sum(len(s) for _, s in self._sessions.values()),
+            }
@@ -0,0 +1,35 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+MODEL_DIR = Path(__file__).parent.parent
+
+# Modules in the model directory are imported by bare name, as the service does
+sys.path.insert(0, str(MODEL_DIR))
+
+
+@pytest.fixture(scope="session", autouse=True)
+def production_artifact():
+    """Build the bundled ``.gcm`` from the checked-in pickle, as a deploy would."""
+    from artifact import ensure_artifact
+
+    return ensure_artifact(
+        MODEL_DIR / "production_model.pkl",
+        MODEL_DIR / "production_model.gcm",
+        MODEL_DIR / "production_metadata.json",
+    )
+
+
+@pytest.fixture(scope="session")
+def client(tmp_path_factory):
+    """The service in-process, started once with an empty model version directory."""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("GEOCLUSTER_MODEL_DIR", str(tmp_path_factory.mktemp("model_versions")))
+        # The bundled model is loaded from paths relative to the model directory
+        mp.chdir(MODEL_DIR)
+        from fastapi.testclient import TestClient
+        from services.geoclustering import app
+
+        with TestClient(app) as test_client:
+            yield test_client
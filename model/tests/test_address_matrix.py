@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from address_matrix import AddressMatrix, build_address_matrix
+from route_generator import GeoClustering
+
+
+def _addresses(n=40, seed=0):
+    return np.random.default_rng(seed).uniform((73.10, 22.25), (73.30, 22.40), (n, 2))
+
+
+def test_tiled_matrix_gathers_the_same_distances(tmp_path):
+    coords = _addresses()
+    ids = [f"a{i}" for i in range(len(coords))]
+    matrix = AddressMatrix(build_address_matrix(coords, tmp_path / "m", ids, detour_factor=1.2, tile=16))
+    expected = 1.2 * GeoClustering.haversine_many_to_many(coords, dtype=np.float32)
+
+    assert len(matrix) == 40
+    assert np.allclose(matrix.submatrix(np.arange(40)), expected, atol=1e-5)
+    rows, cols = [39, 0, 17], [5, 16, 31, 15]
+    assert np.allclose(matrix.distances([ids[i] for i in rows], [ids[j] for j in cols]), expected[np.ix_(rows, cols)])
+    blocks = list(matrix.iter_submatrix_blocks(np.arange(40), max_block_bytes=40 * 4 * 8))
+    assert len(blocks) == 5
+    assert np.array_equal(np.vstack(blocks), matrix.submatrix(np.arange(40)))
+    with pytest.raises(KeyError):
+        matrix.positions(["missing"])
+
+
+def test_match_coordinates_needs_every_point_known(tmp_path):
+    coords = _addresses()
+    matrix = AddressMatrix(build_address_matrix(coords, tmp_path / "m", tile=16))
+
+    picks = np.array([7, 3, 3, 39, 0])
+    assert np.array_equal(matrix.match_coordinates(coords[picks] + 1e-9), picks)
+    assert matrix.match_coordinates(np.vstack((coords[:3], [[73.0, 22.0]]))) is None
+    assert matrix.match_coordinates(np.empty((0, 2))).shape == (0,)
+    assert matrix.match_coordinates([[np.nan, 22.3]]) is None
+
+
+def test_repeated_address_matches_its_first_listing(tmp_path):
+    coords = _addresses(10)
+    coords[6] = coords[2]
+    matrix = AddressMatrix(build_address_matrix(coords, tmp_path / "m"))
+    assert matrix.match_coordinates(coords[[6, 2, 9]]).tolist() == [2, 2, 9]
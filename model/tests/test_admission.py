@@ -0,0 +1,65 @@
+import asyncio
+import threading
+
+import pytest
+
+from admission import AdmissionController, ComputeTimeout, Overloaded
+
+
+def test_full_pool_rejects_and_slow_calls_time_out():
+    async def scenario():
+        controller = AdmissionController(max_workers=1, max_queue=0, timeout=0.05)
+        gate = threading.Event()
+        slow = asyncio.ensure_future(controller.run(gate.wait, 5))
+        await asyncio.sleep(0.01)
+
+        with pytest.raises(Overloaded):
+            await controller.run(lambda: None)
+        with pytest.raises(ComputeTimeout):
+            await slow
+        # The timed-out call still holds its slot until the work finishes
+        assert controller.stats()["in_flight"] == 1
+        gate.set()
+        await asyncio.sleep(0.05)
+        assert await controller.run(lambda: 42) == 42
+        return controller.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["rejected"] == 1
+    assert stats["timed_out"] == 1
+    assert stats["in_flight"] == 0
+
+
+def test_stream_holds_one_slot_and_produces_chunks_on_the_pool():
+    async def scenario():
+        controller = AdmissionController(max_workers=1, max_queue=0, timeout=1.0)
+        chunks = await controller.stream(threading.current_thread().name for _ in range(3))
+        with pytest.raises(Overloaded):
+            await controller.run(lambda: None)
+        names = [name async for name in chunks]
+        return names, controller.stats()["in_flight"]
+
+    names, in_flight = asyncio.run(scenario())
+    assert len(names) == 3
+    assert all(name.startswith("compute") for name in names)
+    assert in_flight == 0
+
+
+def test_service_maps_overload_to_429_and_timeouts_to_504(client, monkeypatch):
+    from fastapi import HTTPException
+
+    import services.geoclustering as service
+
+    async def status_of(controller, fn):
+        monkeypatch.setattr(service, "compute", controller)
+        with pytest.raises(HTTPException) as excinfo:
+            await service.run_compute(fn)
+        return excinfo.value.status_code
+
+    busy = AdmissionController(max_workers=1, max_queue=0, timeout=None)
+    busy._admit()
+    assert asyncio.run(status_of(busy, lambda: None)) == 429
+
+    gate = threading.Event()
+    assert asyncio.run(status_of(AdmissionController(1, 0, timeout=0.01), lambda: gate.wait(5))) == 504
+    gate.set()
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from artifact import read_artifact, read_core_points, write_artifact
+from route_generator import GeoClustering
+
+
+def test_centers_and_metadata_round_trip(tmp_path):
+    centers = np.random.default_rng(0).uniform((73.1, 22.2), (73.3, 22.4), (7, 2))
+    metadata = {"cluster_method": "kmeans", "n_clusters": 7, "cluster_sizes": [1, 2, 3, 4, 5, 6, 7]}
+    write_artifact(tmp_path / "m.gcm", centers, metadata)
+
+    for mmap in (True, False):
+        read, header = read_artifact(tmp_path / "m.gcm", mmap=mmap)
+        assert np.array_equal(read, centers)
+        assert header["format"] == 1
+        assert header["metadata"] == metadata
+        assert read_core_points(tmp_path / "m.gcm", header, mmap=mmap) is None
+    assert not (tmp_path / "m.gcm.tmp").exists()
+
+
+def test_core_points_round_trip(tmp_path):
+    rng = np.random.default_rng(1)
+    core = rng.uniform((73.1, 22.2), (73.3, 22.4), (11, 2))
+    labels = rng.integers(0, 3, 11)
+    write_artifact(tmp_path / "m.gcm", core[:3], {"cluster_method": "dbscan"}, core, labels)
+
+    for mmap in (True, False):
+        _, header = read_artifact(tmp_path / "m.gcm", mmap=mmap)
+        points, read_labels = read_core_points(tmp_path / "m.gcm", header, mmap=mmap)
+        assert header["format"] == 2
+        assert np.array_equal(points, core)
+        assert np.array_equal(read_labels, labels)
+
+
+def test_rejects_files_that_are_not_artifacts(tmp_path):
+    (tmp_path / "m.gcm").write_bytes(b"NOTGEOCL" + bytes(8))
+    with pytest.raises(ValueError):
+        read_artifact(tmp_path / "m.gcm")
+
+
+def test_models_predict_the_same_after_save_and_load_artifact(tmp_path):
+    rng = np.random.default_rng(2)
+    pts = np.vstack([rng.normal((73.18, 22.30), 0.002, (200, 2)), rng.normal((73.23, 22.35), 0.002, (200, 2))])
+    queries = np.vstack([pts[::7], [(72.5, 21.5)]])
+    for method, kwargs in [("kmeans", {"n_clusters": 3}), ("dbscan", {"eps_km": 0.5, "min_samples": 5})]:
+        model = GeoClustering(method)
+        model.cluster_coordinates(pts, **kwargs)
+        model.save_artifact(tmp_path / f"{method}.gcm")
+
+        loaded = GeoClustering()
+        loaded.load_artifact(tmp_path / f"{method}.gcm")
+        assert loaded.cluster_method == method
+        assert loaded.model_version == model.model_version
+        assert np.array_equal(loaded.predict_cluster(queries), model.predict_cluster(queries))
+
+
+def test_convert_cli_builds_the_bundled_artifact_once(tmp_path):
+    import os
+    import shutil
+    import subprocess
+    import sys
+
+    from artifact import ensure_artifact
+    from conftest import MODEL_DIR
+
+    for name in ("production_model.pkl", "production_metadata.json"):
+        shutil.copy(MODEL_DIR / name, tmp_path / name)
+    subprocess.run(
+        [sys.executable, "-m", "artifact", "convert", "production_model.pkl", "out.gcm", "production_metadata.json"],
+        cwd=tmp_path, env={**os.environ, "PYTHONPATH": str(MODEL_DIR)}, check=True, capture_output=True,
+    )
+    centers, header = read_artifact(tmp_path / "out.gcm")
+    assert header["metadata"]["cluster_method"] == "kmeans"
+    assert len(centers) == header["n_clusters"]
+
+    built = ensure_artifact(tmp_path / "production_model.pkl", metadata_path=tmp_path / "production_metadata.json")
+    mtime = built.stat().st_mtime_ns
+    assert ensure_artifact(tmp_path / "production_model.pkl") == built
+    assert built.stat().st_mtime_ns == mtime
@@ -0,0 +1,40 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+import bench_suite  # noqa: E402
+
+
+def test_orders_are_seeded_and_near_the_residential_areas():
+    orders = bench_suite.vadodara_orders(500, seed=3)
+    assert orders.shape == (500, 2)
+    assert np.array_equal(orders, bench_suite.vadodara_orders(500, seed=3))
+    assert not np.array_equal(orders, bench_suite.vadodara_orders(500, seed=4))
+
+    areas = np.array([(lon, lat) for _, lat, lon in bench_suite.RESIDENTIAL_AREAS])
+    offset = np.abs(orders[:, None, :] - areas[None, :, :]).max(axis=2).min(axis=1)
+    assert (offset <= 0.01).all()
+
+
+def test_compare_flags_only_slowdowns_beyond_the_threshold(capsys):
+    def run(commit, seconds):
+        return {
+            "environment": {"commit": commit},
+            "results": [{"case": case, "n": 1000, "best_seconds": s} for case, s in seconds.items()]
+            + [{"case": "skipped_case", "n": 1000, "skipped": "above the case limit"}],
+        }
+
+    old = run("old", {"a": 1.0, "b": 1.0, "c": 1.0})
+    new = run("new", {"a": 1.05, "b": 1.5, "c": 0.5})
+    assert bench_suite.compare(old, new, threshold=0.1) == 1
+    assert "REGRESSION" in capsys.readouterr().out
+    assert bench_suite.compare(old, new, threshold=0.6) == 0
+
+
+def test_measure_stops_at_the_repeat_count_or_budget():
+    calls = []
+    assert len(bench_suite.measure(lambda: calls.append(1), repeat=3, budget=10)) == 3
+    assert len(bench_suite.measure(lambda: calls.append(1), repeat=100, budget=0)) == 0
+    assert len(calls) == 3
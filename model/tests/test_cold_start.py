@@ -0,0 +1,51 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+MODEL_DIR = Path(__file__).parent.parent
+
+# Budgets are generous so only a real regression (e.g. an eager sklearn
+# import) fails; benchmarks/bench_cold_start.py holds the tight ones
+IMPORT_BUDGET_MS = 5000.0
+FIRST_REQUEST_BUDGET_MS = 1000.0
+
+CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+from services.geoclustering import app
+imported = time.perf_counter()
+heavy_after_import = sorted({m.split(".")[0] for m in sys.modules} & {"sklearn", "scipy", "uvicorn"})
+
+from fastapi.testclient import TestClient
+with TestClient(app) as client:
+    body = {"coordinates": [{"lon": 73.18, "lat": 22.30}, {"lon": 72.85, "lat": 21.17}]}
+    t0 = time.perf_counter()
+    status = client.post("/predict", json=body).status_code
+    t1 = time.perf_counter()
+
+print(json.dumps({
+    "import_ms": (imported - start) * 1e3,
+    "first_request_ms": (t1 - t0) * 1e3,
+    "status": status,
+    "heavy_after_import": heavy_after_import,
+    "heavy_after_request": sorted({m.split(".")[0] for m in sys.modules} & {"sklearn", "scipy", "uvicorn"}),
+}))
+"""
+
+
+def _cold_start():
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD], cwd=MODEL_DIR, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def test_predict_path_stays_lazy_and_fast_from_cold():
+    run = _cold_start()
+
+    assert run["heavy_after_import"] == []
+    assert run["status"] == 200
+    assert run["heavy_after_request"] == []
+    assert run["import_ms"] < IMPORT_BUDGET_MS
+    assert run["first_request_ms"] < FIRST_REQUEST_BUDGET_MS
@@ -0,0 +1,55 @@
+import numpy as np
+from sklearn.cluster import DBSCAN
+from sklearn.metrics import silhouette_score
+
+from dbscan_sweep import RadiusGraph, sweep_dbscan
+from route_generator import EARTH_RADIUS_KM
+
+
+def _orders(seed=3):
+    rng = np.random.default_rng(seed)
+    return np.vstack([
+        rng.normal((73.18, 22.30), 0.004, (800, 2)),
+        rng.normal((73.20, 22.32), 0.003, (400, 2)),
+        rng.uniform((73.10, 22.20), (73.30, 22.40), (300, 2)),
+        np.repeat([[73.19, 22.31]], 5, axis=0),
+    ])
+
+
+def test_labels_match_sklearn_dbscan():
+    pts = _orders()
+    graph = RadiusGraph(pts, 0.5)
+    rad = np.radians(pts[:, ::-1])
+    for eps, min_samples in [(0.1, 3), (0.2, 5), (0.3, 10), (0.5, 20)]:
+        ref = DBSCAN(eps=eps / EARTH_RADIUS_KM, min_samples=min_samples, metric="haversine").fit_predict(rad)
+        assert np.array_equal(graph.labels(eps, min_samples), ref)
+
+
+def test_silhouette_matches_sklearn_on_all_points():
+    pts = _orders()
+    graph = RadiusGraph(pts, 0.3)
+    labels = graph.labels(0.2, 5)
+    clustered = labels >= 0
+    ref = silhouette_score(np.radians(pts[clustered, ::-1]), labels[clustered], metric="haversine")
+    assert np.isclose(graph.silhouette(labels, sample_size=None), ref)
+
+
+def test_sample_with_one_dominant_cluster_scores_none():
+    rng = np.random.default_rng(0)
+    pts = np.vstack([
+        rng.normal((73.18, 22.30), 0.01, (5000, 2)),
+        rng.normal((73.40, 22.60), 0.0001, (5, 2)),
+    ])
+    graph = RadiusGraph(pts, 0.8)
+    labels = graph.labels(0.8, 5)
+    assert labels.max() == 1
+
+    sample = graph.silhouette_sample(200, random_state=2)
+    # The small cluster is not in the sample, so there is nothing to compare against
+    assert len(np.unique(labels[sample.idx])) == 1
+    assert graph.silhouette(labels, 200, random_state=2) is None
+
+    sweep = sweep_dbscan(pts, [0.8], [5], silhouette_sample_size=200, random_state=2, graph=graph)
+    assert sweep["results"][0]["n_clusters"] == 2
+    assert sweep["results"][0]["silhouette"] is None
+    assert sweep["best"] is None
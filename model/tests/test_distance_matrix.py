@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from distance_matrix import calibrate_detour_factor, distance_matrix, iter_distance_blocks
+from route_generator import GeoClustering
+
+
+def _points(n, seed=0):
+    return np.random.default_rng(seed).uniform((73.10, 22.25), (73.30, 22.40), (n, 2))
+
+
+def test_blocks_stay_within_budget_and_concatenate_to_the_matrix():
+    src, dst = _points(100), _points(37, seed=1)
+    expected = GeoClustering.haversine_many_to_many(src, dst)
+    blocks = list(iter_distance_blocks(src, dst, dtype=np.float64, max_block_bytes=37 * 8 * 16))
+
+    assert len(blocks) == 7
+    assert all(block.nbytes <= 37 * 8 * 16 and block.flags.c_contiguous for block in blocks)
+    assert np.allclose(np.vstack(blocks), expected)
+    # float32 (the default) is good to a few metres
+    assert np.allclose(distance_matrix(src, dst, detour_factor=1.3, max_block_bytes=1024), 1.3 * expected, atol=0.01)
+    assert distance_matrix(src).shape == (100, 100)
+
+
+def test_calibrated_factor_recovers_a_constant_detour():
+    straight = np.array([1.0, 2.0, 0.0, 4.0, np.nan])
+    road = np.array([1.4, 2.8, 0.5, 5.6, 3.0])
+    assert np.isclose(calibrate_detour_factor(straight, road), 1.4)
+    with pytest.raises(ValueError):
+        calibrate_detour_factor([0.0], [1.0])
+
+
+def test_binary_matrix_matches_json(client):
+    body = {"sources": _points(30).tolist(), "destinations": _points(20, seed=2).tolist(), "dtype": "float64"}
+    as_json = client.post("/matrix", json=body)
+    as_binary = client.post("/matrix?format=binary", json=body)
+
+    assert as_json.status_code == as_binary.status_code == 200
+    assert (as_binary.headers["x-matrix-rows"], as_binary.headers["x-matrix-cols"]) == ("30", "20")
+    matrix = np.frombuffer(as_binary.content, dtype=as_binary.headers["x-matrix-dtype"]).reshape(30, 20)
+    assert np.array_equal(matrix, np.array(as_json.json()["distances"]))
@@ -0,0 +1,54 @@
+import numpy as np
+
+from incremental import IncrementalClusterers
+from route_generator import GeoClustering
+
+
+def _model():
+    rng = np.random.default_rng(0)
+    model = GeoClustering()
+    model.cluster_coordinates(rng.uniform((73.10, 22.25), (73.25, 22.40), (600, 2)), n_clusters=5)
+    return model
+
+
+def test_clients_keep_separate_incremental_state():
+    model = _model()
+    rng = np.random.default_rng(1)
+    orders_a = rng.uniform((73.10, 22.25), (73.25, 22.40), (300, 2))
+    orders_b = rng.uniform((73.10, 22.25), (73.25, 22.40), (300, 2))
+    slots = IncrementalClusterers()
+
+    a = slots.get("a", model, 20)
+    a.sync(orders_a)
+    first_a = a.clusters()
+    slots.get("b", model, 20).sync(orders_b)
+
+    # Client b's orders did not disturb a: resending a's set changes nothing
+    assert slots.get("a", model, 20) is a
+    recomputed = a.stats()["parts_recomputed"]
+    assert a.sync(orders_a) == (0, 0)
+    assert a.clusters() == first_a
+    assert a.stats()["parts_recomputed"] == recomputed
+    assert all(len(c["coordinates"]) <= 20 for c in first_a)
+
+
+def test_changes_keep_the_cap_and_reuse_far_away_clusters():
+    model = _model()
+    rng = np.random.default_rng(2)
+    orders = rng.uniform((73.10, 22.25), (73.25, 22.40), (1000, 2))
+    clusterer = IncrementalClusterers().get("client", model, 30)
+    clusterer.sync(orders)
+    clusterer.clusters()
+    recomputed = clusterer.stats()["parts_recomputed"]
+
+    changed = np.vstack((orders[1:], [[73.101, 22.251]]))
+    assert clusterer.sync(changed) == (1, 1)
+    clusters = clusterer.clusters()
+
+    members = sorted((p["lon"], p["lat"]) for c in clusters for p in c["coordinates"])
+    assert members == sorted(map(tuple, changed.tolist()))
+    assert max(len(c["coordinates"]) for c in clusters) <= 30
+    assert [c["cluster_id"] for c in clusters] == list(range(len(clusters)))
+    stats = clusterer.stats()
+    assert stats["parts_reused"] > 0
+    assert stats["parts_recomputed"] - recomputed < stats["clusters"]
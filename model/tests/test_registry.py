@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from registry import ModelRegistry
+from route_generator import GeoClustering
+
+
+def _model(shift):
+    model = GeoClustering()
+    model.cluster_centers = [(73.18 + shift, 22.30), (73.23 + shift, 22.35)]
+    model.model_metadata = {"cluster_method": "kmeans", "n_clusters": 2}
+    return model
+
+
+def test_activate_rollback_and_restart_on_the_active_version(tmp_path):
+    registry = ModelRegistry(tmp_path)
+    first = registry.save(_model(0.0))
+    second = registry.save(_model(0.01))
+    assert registry.active_version == second
+
+    assert registry.rollback() == first
+    assert registry.active is registry.get(first)
+    with pytest.raises(LookupError):
+        registry.rollback()
+
+    restarted = ModelRegistry(tmp_path)
+    assert sorted(restarted.scan(activate_new=False)) == sorted([first, second])
+    assert restarted.restore_active()
+    assert restarted.active_version == first
+
+
+def test_eviction_keeps_active_and_rollback_target(tmp_path):
+    registry = ModelRegistry(tmp_path, max_versions=2)
+    evicted = []
+    registry.on_evict = evicted.append
+    versions = [registry.register(_model(0.01 * i), activate=True) for i in range(4)]
+
+    assert evicted == versions[:2]
+    assert [d["version"] for d in registry.describe()] == versions[2:]
+    assert registry.rollback() == versions[2]
+
+
+def test_scan_picks_up_new_artifacts_once(tmp_path):
+    registry = ModelRegistry(tmp_path)
+    assert registry.scan() == []
+    dropped = _model(0.02)
+    dropped.save_artifact(tmp_path / "dropped.gcm")
+
+    assert registry.scan() == [dropped.model_version]
+    assert registry.scan() == []
+    assert registry.active_version == dropped.model_version
+    coords = np.array([[73.20, 22.30], [73.25, 22.36]])
+    assert np.array_equal(registry.active.predict_cluster(coords), dropped.predict_cluster(coords))
@@ -0,0 +1,67 @@
+import time
+
+import numpy as np
+import orjson
+
+from result_cache import ResultCache, coordinates_digest
+
+
+def test_entries_expire_after_the_ttl():
+    cache = ResultCache(max_entries=8, max_bytes=1024, ttl=0.05)
+
+    cache.put("a", b"x" * 10)
+    assert cache.get("a") == b"x" * 10
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["expirations"] == 1
+    assert stats["entries"] == 0 and stats["bytes"] == 0
+
+
+def test_byte_cap_evicts_least_recently_used_first():
+    cache = ResultCache(max_entries=8, max_bytes=100)
+    cache.put("a", b"a" * 40)
+    cache.put("b", b"b" * 40)
+    assert cache.get("a") is not None
+    cache.put("c", b"c" * 40)
+
+    # "b" was least recently used, so it goes to make room for "c"
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["bytes"] == 80
+
+    # Larger than the whole cache: never stored, nothing evicted for it
+    cache.put("d", ("wrapper",), size=101)
+    assert cache.get("d") is None
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entry_cap_and_discard():
+    cache = ResultCache(max_entries=2, max_bytes=1024)
+    for key in [("predict", "v1", 1), ("predict", "v2", 1), ("predict", "v2", 2)]:
+        cache.put(key, b"x")
+    assert cache.get(("predict", "v1", 1)) is None
+    assert cache.discard(lambda key: key[1] == "v2") == 2
+    assert cache.stats()["entries"] == 0
+    assert not ResultCache(max_entries=0, max_bytes=1024).enabled
+
+
+def test_digest_depends_on_values_and_order_only():
+    coords = np.array([[73.18, 22.30], [73.20, 22.31]])
+    assert coordinates_digest(coords) == coordinates_digest(coords.astype(">f8"))
+    assert coordinates_digest(coords) == coordinates_digest(np.asfortranarray(coords))
+    assert coordinates_digest(coords) != coordinates_digest(coords[::-1])
+
+
+def test_streamed_and_plain_predict_share_one_cache_entry(client):
+    from services.geoclustering import result_cache as service_cache
+
+    coords = np.random.default_rng(7).uniform((73.10, 22.25), (73.30, 22.40), (50, 2))
+    body = {"coordinates": [{"lon": lon, "lat": lat} for lon, lat in coords.tolist()]}
+    hits = service_cache.stats()["hits"]
+
+    streamed = client.post("/predict?stream=true", json=body)
+    plain = client.post("/predict", json=body)
+    assert service_cache.stats()["hits"] == hits + 1
+    assert [orjson.loads(line) for line in streamed.content.splitlines()] == plain.json()["clusters"]
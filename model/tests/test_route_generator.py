@@ -0,0 +1,131 @@
+import numpy as np
+
+from route_generator import GeoClustering
+
+
+def _two_blobs(seed=0):
+    rng = np.random.default_rng(seed)
+    return np.vstack([
+        rng.normal((73.18, 22.30), 0.002, (200, 2)),
+        rng.normal((73.23, 22.35), 0.002, (200, 2)),
+    ])
+
+
+def test_dbscan_model_round_trips_through_save_model(tmp_path):
+    model = GeoClustering("dbscan")
+    model.cluster_coordinates(_two_blobs(), eps_km=0.5, min_samples=5)
+    model.save_model(tmp_path / "model.pkl")
+
+    loaded = GeoClustering()
+    loaded.load_model(tmp_path / "model.pkl")
+
+    assert loaded.cluster_method == "dbscan"
+    far = [(72.5, 21.5)]
+    assert loaded.predict_cluster(far).tolist() == [-1]
+    near = [(73.18, 22.30), (73.23, 22.35)]
+    assert loaded.predict_cluster(near).tolist() == model.predict_cluster(near).tolist()
+
+
+def test_distance_model_round_trips_through_save_model(tmp_path):
+    model = GeoClustering("distance")
+    model.cluster_coordinates(_two_blobs(), max_distance_km=1.0)
+    model.save_model(tmp_path / "model.pkl")
+
+    loaded = GeoClustering()
+    loaded.load_model(tmp_path / "model.pkl")
+
+    assert loaded.cluster_method == "distance"
+    assert loaded.predict_cluster([(72.5, 21.5)]).tolist() == [-1]
+
+
+def test_haversine_kernels_match_scalar_distance():
+    rng = np.random.default_rng(1)
+    a = rng.uniform((72.5, 21.0), (73.5, 22.5), (20, 2))
+    b = rng.uniform((72.5, 21.0), (73.5, 22.5), (30, 2))
+    expected = np.array([[GeoClustering.haversine_distance(p, q) for q in b] for p in a])
+
+    assert np.allclose(GeoClustering.haversine_many_to_many(a, b, block_size=7), expected)
+    assert np.allclose(GeoClustering.haversine_one_to_many(a[0], b), expected[0])
+    assert np.allclose(GeoClustering.haversine_rowwise(a, b[:20]), np.diag(expected[:, :20]))
+    square = GeoClustering.haversine_many_to_many(a)
+    assert np.allclose(np.diag(square), 0.0)
+    assert np.allclose(GeoClustering.haversine_many_to_many(a, dtype=np.float32), square, atol=1e-3)
+
+
+def test_distance_clusters_stay_within_radius_of_their_seed():
+    pts = _two_blobs()
+    model = GeoClustering("distance")
+    labels, centers = model.cluster_coordinates(pts, max_distance_km=0.3)
+
+    assert labels.min() == 0 and labels.max() == len(centers) - 1
+    seeds = np.asarray(model.core_points)[labels]
+    assert (GeoClustering.haversine_rowwise(pts, seeds) <= 0.3 + 1e-9).all()
+    seed_dist = GeoClustering.haversine_many_to_many(model.core_points)
+    np.fill_diagonal(seed_dist, np.inf)
+    assert (seed_dist > 0.3).all()
+
+
+def test_auto_k_picks_the_same_k_inline_and_in_parallel():
+    rng = np.random.default_rng(2)
+    pts = np.vstack([rng.normal(c, 0.003, (800, 2)) for c in [(73.10, 22.25), (73.20, 22.35), (73.30, 22.25)]])
+
+    inline = GeoClustering()
+    labels, centers = inline.cluster_coordinates(pts, auto=True, max_k=6, n_jobs=1, silhouette_sample_size=500)
+    parallel = GeoClustering()
+    parallel.cluster_coordinates(pts, auto=True, max_k=6, n_jobs=2, silhouette_sample_size=500)
+
+    assert len(centers) == 3
+    assert inline.model_metadata["auto_k"]["chosen_k"] == 3
+    assert parallel.model_metadata["auto_k"]["workers"] == 2
+    assert parallel.model_metadata["auto_k"]["chosen_k"] == 3
+    assert np.allclose(sorted(parallel.cluster_centers), sorted(centers))
+
+
+def test_partial_fit_keeps_ids_and_accumulates_sizes():
+    model = GeoClustering()
+    model.cluster_coordinates(_two_blobs(), n_clusters=2)
+    before = np.asarray(model.cluster_centers)
+    sizes = model.model_metadata["cluster_sizes"]
+
+    new = np.random.default_rng(5).normal((73.18, 22.30), 0.002, (100, 2))
+    labels, centers = model.partial_fit(new, batch_size=32)
+
+    # New points near center 0 keep its id, and only that center moves
+    home = int(np.argmin(GeoClustering.haversine_one_to_many((73.18, 22.30), before)))
+    assert (labels == home).all()
+    assert model.model_metadata["cluster_sizes"][home] == sizes[home] + 100
+    assert model.model_metadata["cluster_sizes"][1 - home] == sizes[1 - home]
+    drift = model.model_metadata["incremental"]["center_drift_km"]
+    assert drift[1 - home] == 0.0
+    assert drift[home] < 0.5
+    assert model.model_metadata["incremental"]["points_seen"] == 100
+
+
+def test_capacity_constrained_clusters_respect_the_cap():
+    pts = np.random.default_rng(3).uniform((73.10, 22.25), (73.30, 22.40), (1003, 2))
+    labels, centers = GeoClustering().capacity_constrained_clusters(pts, 50)
+
+    sizes = np.bincount(labels)
+    assert len(sizes) == len(centers)
+    assert sizes.max() <= 50
+    assert sizes.min() > 0
+    assert sizes.sum() == len(pts)
+    assert len(centers) >= int(np.ceil(len(pts) / 50))
+    again, _ = GeoClustering().capacity_constrained_clusters(pts, 50)
+    assert np.array_equal(again, labels)
+
+
+def test_nearest_center_matches_kmeans_predict():
+    from sklearn.cluster import KMeans
+
+    from route_generator import KDTREE_MIN_CENTERS
+
+    rng = np.random.default_rng(4)
+    pts = rng.uniform((73.10, 22.25), (73.30, 22.40), (3000, 2))
+    queries = rng.uniform((73.05, 22.20), (73.35, 22.45), (2000, 2))
+    for k in (8, KDTREE_MIN_CENTERS + 44):
+        kmeans = KMeans(n_clusters=k, n_init=1, random_state=0).fit(pts)
+        model = GeoClustering()
+        model.cluster_centers = [tuple(c) for c in kmeans.cluster_centers_]
+        assert (model._get_center_index()[1] is not None) == (k >= KDTREE_MIN_CENTERS)
+        assert np.array_equal(model.nearest_center(queries), kmeans.predict(queries))
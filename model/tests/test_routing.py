@@ -0,0 +1,50 @@
+import time
+
+import numpy as np
+
+from route_generator import GeoClustering
+from routing import nearest_neighbour_tour, solve_tour
+
+DEPOT = (73.19, 22.31)
+
+
+def _stops(n, seed=0):
+    return np.random.default_rng(seed).uniform((73.10, 22.25), (73.30, 22.40), (n, 2))
+
+
+def test_construction_past_deadline_still_returns_a_full_tour():
+    dist = GeoClustering.haversine_many_to_many(_stops(50))
+    tour = nearest_neighbour_tour(dist, deadline=time.time() - 1)
+    assert tour[0] == 0
+    assert sorted(tour.tolist()) == list(range(50))
+
+    result = solve_tour(_stops(50), DEPOT, deadline=time.time() - 1)
+    assert sorted(result["order"]) == list(range(50))
+
+
+def test_two_opt_and_or_opt_never_lengthen_a_tour():
+    from routing import or_opt, tour_length, two_opt
+
+    rng = np.random.default_rng(1)
+    for n in (3, 4, 5, 12, 60):
+        dist = GeoClustering.haversine_many_to_many(_stops(n, seed=n))
+        start = np.concatenate(([0], rng.permutation(np.arange(1, n))))
+        for move in (two_opt, or_opt):
+            tour, changed = move(dist, start)
+            assert tour[0] == 0
+            assert sorted(tour.tolist()) == list(range(n))
+            assert tour_length(dist, tour) <= tour_length(dist, start) + 1e-9
+            assert changed == (not np.array_equal(tour, start))
+
+
+def test_solve_tour_improves_on_nearest_neighbour():
+    from routing import RoutePlanner
+
+    result = solve_tour(_stops(80), DEPOT)
+    assert sorted(result["order"]) == list(range(80))
+    assert result["distance_km"] <= result["initial_distance_km"]
+
+    clusters = [_stops(20, seed=2), _stops(1, seed=3), _stops(0)]
+    tours = RoutePlanner(1).solve(clusters, DEPOT, time_limit=5)
+    assert [sorted(t["order"]) for t in tours] == [list(range(20)), [0], []]
+    assert tours[2]["distance_km"] == 0.0
@@ -0,0 +1,83 @@
+import numpy as np
+import orjson
+import pytest
+
+from route_generator import GeoClustering
+
+
+def _orders(n=300, seed=0):
+    return np.random.default_rng(seed).uniform((73.10, 22.25), (73.30, 22.40), (n, 2))
+
+
+def _points(coords):
+    return [{"lon": lon, "lat": lat} for lon, lat in coords.tolist()]
+
+
+def test_predict_response_matches_the_response_model(client):
+    from services.geoclustering import PredictionResponse, registry
+
+    coords = _orders()
+    response = client.post("/predict", json={"coordinates": _points(coords)})
+    assert response.status_code == 200
+    body = PredictionResponse.model_validate(response.json())
+
+    assert body.total_points == len(coords)
+    assert body.total_clusters == len(body.clusters)
+    labels = registry.active.predict_cluster(coords)
+    for cluster in body.clusters:
+        members = coords[labels == cluster.cluster_id]
+        assert [(p["lon"], p["lat"]) for p in cluster.coordinates] == [tuple(p) for p in members.tolist()]
+
+
+def test_parse_coordinate_body_accepts_pairs_columns_and_packed_floats():
+    from fastapi import HTTPException
+    from services.geoclustering import parse_coordinate_body
+
+    coords = _orders(10)
+    pairs = parse_coordinate_body(orjson.dumps(coords.tolist()), "application/json")
+    columns = parse_coordinate_body(
+        orjson.dumps({"lon": coords[:, 0].tolist(), "lat": coords[:, 1].tolist()}), "application/json; charset=utf-8"
+    )
+    packed = parse_coordinate_body(coords.astype("<f8").tobytes(), "application/octet-stream")
+    for parsed in (pairs, columns, packed):
+        assert parsed.dtype == np.float64
+        assert np.array_equal(parsed, coords)
+    assert parse_coordinate_body(b"[]", "application/json").shape == (0, 2)
+
+    for body, content_type in [
+        (b"\x00" * 15, "application/octet-stream"),
+        (b"{not json", "application/json"),
+        (b'{"lon": [1, 2], "lat": [1]}', "application/json"),
+        (b"[[1, 2, 3]]", "application/json"),
+        (b'[[1, "NaN"]]', "application/json"),
+    ]:
+        with pytest.raises(HTTPException) as excinfo:
+            parse_coordinate_body(body, content_type)
+        assert excinfo.value.status_code == 400
+
+
+def test_predict_batch_formats_give_the_same_clusters(client):
+    coords = _orders()
+    responses = [
+        client.post("/predict-batch", json=coords.tolist()),
+        client.post("/predict-batch", json={"lon": coords[:, 0].tolist(), "lat": coords[:, 1].tolist()}),
+        client.post(
+            "/predict-batch", content=coords.astype("<f8").tobytes(), headers={"content-type": "application/octet-stream"}
+        ),
+    ]
+    assert [r.status_code for r in responses] == [200, 200, 200]
+    clusters = [r.json()["clusters"] for r in responses]
+    assert clusters[0] == clusters[1] == clusters[2]
+
+
+def test_streamed_predict_lists_the_same_clusters_one_per_line(client):
+    coords = _orders(seed=1)
+    body = {"coordinates": _points(coords), "max_points_per_cluster": 40}
+    plain = client.post("/predict", json=body)
+    streamed = client.post("/predict?stream=true", json=body)
+
+    assert streamed.status_code == 200
+    assert streamed.headers["content-type"] == "application/x-ndjson"
+    lines = streamed.content.splitlines()
+    assert [orjson.loads(line) for line in lines] == plain.json()["clusters"]
+    assert all(len(orjson.loads(line)["coordinates"]) <= 40 for line in lines)
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from route_generator import GeoClustering
+from session import ClusterSession, SessionStore
+
+
+def _model():
+    model = GeoClustering()
+    model.cluster_centers = [(73.15, 22.30), (73.25, 22.35)]
+    return model
+
+
+def _orders(n, seed=0):
+    return np.random.default_rng(seed).uniform((73.10, 22.25), (73.30, 22.40), (n, 2))
+
+
+def test_add_and_remove_keep_counts_and_centers():
+    session = ClusterSession(_model())
+    orders = _orders(200)
+    ids = session.add_orders(orders)
+    assert ids.tolist() == list(range(200))
+    labels = session.labels_of(ids)
+    assert np.array_equal(labels, _model().nearest_center(orders))
+
+    session.remove_orders(ids[:50])
+    assert len(session) == 150
+    assert (session.labels_of(ids[:50]) == -1).all()
+    for lbl in (0, 1):
+        alive = orders[50:][labels[50:] == lbl]
+        assert np.allclose(session.centers[lbl], alive.mean(axis=0))
+
+    # Ids are never reused, and removed ids cannot be removed again
+    assert session.add_orders(orders[:1]).tolist() == [200]
+    with pytest.raises(KeyError):
+        session.remove_orders([0])
+    with pytest.raises(KeyError):
+        session.remove_orders([999])
+
+
+def test_overflowing_cluster_is_rebalanced_under_the_cap():
+    session = ClusterSession(_model(), max_points_per_cluster=25)
+    for seed in range(8):
+        session.add_orders(_orders(20, seed))
+    summary = session.summary()
+
+    assert summary["total_orders"] == 160
+    assert summary["max_cluster_size"] <= 25
+    assert summary["rebalances"] > 0
+    snapshot = session.snapshot()
+    assert sum(len(c["order_ids"]) for c in snapshot["clusters"]) == 160
+
+
+def test_store_evicts_the_least_recently_used_session():
+    store = SessionStore(max_sessions=2, ttl=None)
+    first, _ = store.create(_model())
+    second, _ = store.create(_model())
+    store.get(first)
+    store.create(_model())
+
+    assert store.get(first) is not None
+    with pytest.raises(KeyError):
+        store.get(second)
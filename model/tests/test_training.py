@@ -0,0 +1,19 @@
+import training
+from training import TrainingJobManager
+
+
+def test_history_trim_keeps_live_jobs(monkeypatch):
+    monkeypatch.setattr(training, "JOB_HISTORY_LIMIT", 3)
+    manager = TrainingJobManager(on_success=lambda model, spec: {}, current_model=lambda: None)
+    for job_id, status in [("a", "running"), ("b", "succeeded"), ("c", "queued"), ("d", "failed"), ("e", "queued")]:
+        manager._jobs[job_id] = {"job_id": job_id, "status": status}
+        manager._futures[job_id] = None
+
+    manager._trim()
+    assert list(manager._jobs) == ["a", "c", "e"]
+    assert list(manager._futures) == ["a", "c", "e"]
+
+    manager._jobs["f"] = {"job_id": "f", "status": "queued"}
+    manager._trim()
+    # Everything left is live, so the history grows past the limit
+    assert list(manager._jobs) == ["a", "c", "e", "f"]
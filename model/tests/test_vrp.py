@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from vrp import solve_cvrp
+
+DEPOT = (73.19, 22.31)
+
+
+def _orders(n, seed=0):
+    return np.random.default_rng(seed).uniform((73.10, 22.25), (73.30, 22.40), (n, 2))
+
+
+def test_routes_respect_capacity_and_serve_every_order_once():
+    orders = _orders(400)
+    demands = np.random.default_rng(1).integers(1, 6, 400).astype(float)
+    plan = solve_cvrp(orders, DEPOT, capacity=40, demands=demands, time_limit=2, n_jobs=1)
+
+    stops = [stop for route in plan["routes"] for stop in route["stops"]]
+    assert sorted(stops) == list(range(400))
+    assert plan["unassigned"] == []
+    for route in plan["routes"]:
+        assert route["load"] == demands[route["stops"]].sum()
+        assert route["load"] <= 40
+    assert plan["total_distance_km"] <= plan["initial_distance_km"] + 1e-9
+    assert np.isclose(plan["total_distance_km"], sum(r["distance_km"] for r in plan["routes"]))
+
+
+def test_invalid_demands_are_rejected():
+    with pytest.raises(ValueError):
+        solve_cvrp(_orders(3), DEPOT, capacity=5, demands=[1, 2])
+    with pytest.raises(ValueError):
+        solve_cvrp(_orders(3), DEPOT, capacity=5, demands=[1, 6, 1])
+
+
+def test_route_too_heavy_to_merge_is_split_across_spare_capacity():
+    from vrp import _Distances, _reduce_fleet
+
+    nodes = np.vstack(([DEPOT], _orders(4)))
+    demands = np.array([0.0, 3.0, 3.0, 1.0, 1.0])
+    # [3, 4] fits into neither route whole, but each stop fits into one
+    routes, unassigned = _reduce_fleet(_Distances(nodes), [[1], [2], [3, 4]], demands, capacity=4, n_vehicles=2)
+
+    assert unassigned == []
+    assert sorted(node for route in routes for node in route) == [1, 2, 3, 4]
+    assert all(demands[route].sum() <= 4 for route in routes)
+
+
+def test_small_fleet_fills_its_capacity_before_leaving_orders_out():
+    orders = _orders(300, seed=2)
+    demands = np.random.default_rng(3).integers(1, 10, 300).astype(float)
+    plan = solve_cvrp(orders, DEPOT, capacity=200, n_vehicles=5, demands=demands, time_limit=1, n_jobs=1)
+
+    served = [stop for route in plan["routes"] for stop in route["stops"]]
+    assert sorted(served + plan["unassigned"]) == list(range(300))
+    assert len(plan["routes"]) <= 5
+    assert all(route["load"] <= 200 for route in plan["routes"])
+    # Whatever is left out could not have fit: every route is nearly full
+    assert all(route["load"] > 200 - demands[plan["unassigned"]].min() for route in plan["routes"])
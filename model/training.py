@@ -0,0 +1,191 @@
+"""
+Background training jobs for the GeoClustering service.
+
+Each job trains a fresh `GeoClustering` (or folds new points into the
+current one) in a separate worker process, so the API's event loop keeps
+serving predictions. Jobs run one at a time in submission order; progress
+messages stream back over a pipe and the finished model is handed to an
+``on_success`` callback, which is where the service persists it and swaps
+it in.
+"""
+
+from __future__ import annotations
+
+import multiprocessing as mp
+import queue
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Any, Callable, Dict
+
+import numpy as np
+
+from route_generator import GeoClustering
+
+JOB_HISTORY_LIMIT = 100
+FINISHED_STATUSES = ("succeeded", "failed")
+
+
+def run_training_job(spec: Dict[str, Any], conn: Any) -> None:
+    """Worker-process entry point: train according to *spec* and report over *conn*.
+
+    Sends ``("progress", fraction)`` messages while training and finishes
+    with either ``("done", model)`` or ``("error", message)``.
+    """
+    try:
+        def report(done: int, total: int) -> None:
+            conn.send(("progress", done / max(total, 1)))
+
+        coords = np.asarray(spec["coordinates"], dtype=float)
+        if spec["mode"] == "incremental":
+            model: GeoClustering = spec["base_model"]
+            model.partial_fit(coords, batch_size=spec["batch_size"], progress=report)
+        else:
+            model = GeoClustering(cluster_method="kmeans")
+            model.cluster_coordinates(coords, auto=True, max_k=spec["max_k"], progress=report)
+        conn.send(("done", model))
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+class TrainingJobManager:
+    """Queue of training jobs executed sequentially in spawned worker processes.
+
+    Parameters
+    ----------
+    on_success : callable
+        Called in the manager thread with the trained `GeoClustering` and the
+        job spec; it should persist the model and install it. Its return
+        value (a dict) is stored as the job's ``result``.
+    current_model : callable
+        Returns the serving model. Incremental jobs read it when they start,
+        not when they are submitted, so they build on any job queued ahead.
+    """
+
+    def __init__(
+        self,
+        on_success: Callable[[GeoClustering, Dict[str, Any]], Dict[str, Any]],
+        current_model: Callable[[], GeoClustering | None],
+    ) -> None:
+        self._on_success = on_success
+        self._current_model = current_model
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[tuple[str, Dict[str, Any]]]" = queue.Queue()
+        self._thread: threading.Thread | None = None
+
+    # ------------------------------------------------------------------
+    def submit(self, spec: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue a job described by *spec* and return its initial status."""
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "mode": spec["mode"],
+            "status": "queued",
+            "progress": 0.0,
+            "n_points": len(spec["coordinates"]),
+            "created": datetime.now().isoformat(),
+            "started": None,
+            "finished": None,
+            "result": None,
+            "error": None,
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._futures[job_id] = Future()
+            self._trim()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="training-jobs", daemon=True)
+                self._thread.start()
+        self._queue.put((job_id, spec))
+        return dict(job)
+
+    def get(self, job_id: str) -> Dict[str, Any] | None:
+        """Return a snapshot of the job's status, or ``None`` if unknown."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def future(self, job_id: str) -> Future:
+        """Return a future resolved with the final job status."""
+        with self._lock:
+            return self._futures[job_id]
+
+    # ------------------------------------------------------------------
+    def _trim(self) -> None:
+        """Forget the oldest finished jobs beyond `JOB_HISTORY_LIMIT` (lock held).
+
+        Queued and running jobs are never dropped, so their futures still
+        resolve; the history only grows past the limit while all of it is live.
+        """
+        excess = len(self._jobs) - JOB_HISTORY_LIMIT
+        if excess <= 0:
+            return
+        finished = [job_id for job_id, job in self._jobs.items() if job["status"] in FINISHED_STATUSES]
+        for job_id in finished[:excess]:
+            del self._jobs[job_id]
+            self._futures.pop(job_id, None)
+
+    def _update(self, job_id: str, **fields: Any) -> None:
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def _run(self) -> None:
+        while True:
+            job_id, spec = self._queue.get()
+            try:
+                self._execute(job_id, spec)
+            except Exception as e:
+                self._update(job_id, status="failed", error=f"{type(e).__name__}: {e}")
+            finally:
+                self._update(job_id, finished=datetime.now().isoformat())
+                with self._lock:
+                    fut = self._futures.get(job_id)
+                    snapshot = dict(self._jobs.get(job_id, {}))
+                    self._trim()
+                if fut is not None and not fut.done():
+                    fut.set_result(snapshot)
+
+    def _execute(self, job_id: str, spec: Dict[str, Any]) -> None:
+        self._update(job_id, status="running", started=datetime.now().isoformat())
+        if spec["mode"] == "incremental":
+            base_model = self._current_model()
+            if base_model is None:
+                raise ValueError("No model loaded to update incrementally")
+            # Pickled into the worker, so the serving instance is never mutated
+            spec = {**spec, "base_model": base_model}
+
+        # spawn rather than fork: the API process runs threads and an event loop
+        ctx = mp.get_context("spawn")
+        recv_conn, send_conn = ctx.Pipe(duplex=False)
+        proc = ctx.Process(target=run_training_job, args=(spec, send_conn), name=f"train-{job_id[:8]}")
+        proc.start()
+        send_conn.close()
+
+        outcome: tuple[str, Any] | None = None
+        while outcome is None:
+            try:
+                kind, payload = recv_conn.recv()
+            except EOFError:
+                break
+            if kind == "progress":
+                self._update(job_id, progress=round(float(payload), 4))
+            else:
+                outcome = (kind, payload)
+        recv_conn.close()
+        proc.join()
+
+        if outcome is None:
+            self._update(job_id, status="failed", error=f"Training worker exited with code {proc.exitcode}")
+        elif outcome[0] == "error":
+            self._update(job_id, status="failed", error=outcome[1])
+        else:
+            self._update(job_id, status="saving", progress=1.0)
+            result = self._on_success(outcome[1], spec)
+            self._update(job_id, status="succeeded", result=result)
@@ -0,0 +1,432 @@
+"""
+Capacitated vehicle routing (CVRP) for whole-day dispatch.
+
+`solve_cvrp` turns a day's orders, one depot and a homogeneous fleet into
+complete vehicle routes:
+
+1. Clarke-Wright savings construction. Savings are computed at once for
+   each stop and its nearest neighbours, not for all ``n^2`` pairs, and
+   merged in descending order under the capacity limit.
+2. Routes are merged further if there are more of them than vehicles;
+   a route too heavy to merge whole has its stops inserted one by one.
+3. Anytime local search until the time limit:
+
+   * inter-route relocate and swap moves, scored for every stop and
+     candidate neighbour in one vectorized pass split across threads;
+   * intra-route 2-opt / Or-opt (see routing.py) on the routes that
+     changed, run on `RoutePlanner` worker processes.
+
+Memory stays ``O(n * n_neighbours)``: distances are computed for the index
+pairs being scored, with no full distance matrix.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from route_generator import EARTH_RADIUS_KM, CoordinateArray, CoordinateTuple
+from routing import RoutePlanner
+
+# Candidate neighbours per stop for savings and inter-route moves.
+VRP_NEIGHBOURS = 30
+# Stops per thread when scoring inter-route moves.
+VRP_EVAL_CHUNK = 2048
+# Moves must shorten the plan by more than this (km) to count.
+VRP_IMPROVEMENT_EPS = 1e-9
+
+
+class _Distances:
+    """Haversine distances between node indices, computed on demand.
+
+    Node 0 is the depot and nodes ``1..n`` are the stops.
+    """
+
+    def __init__(self, nodes: np.ndarray) -> None:
+        rad = np.radians(nodes)
+        self.lon = rad[:, 0]
+        self.lat = rad[:, 1]
+        self.cos_lat = np.cos(self.lat)
+
+    def __call__(self, a: Any, b: Any) -> np.ndarray:
+        h = (
+            np.sin((self.lat[b] - self.lat[a]) / 2) ** 2
+            + self.cos_lat[a] * self.cos_lat[b] * np.sin((self.lon[b] - self.lon[a]) / 2) ** 2
+        )
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+
+def _neighbour_lists(nodes: np.ndarray, k: int) -> np.ndarray:
+    """Return the *k* nearest stops of every stop, as ``(n, k)`` node ids."""
+    from scipy.spatial import cKDTree
+
+    stops = nodes[1:]
+    # Equirectangular projection is accurate enough to rank neighbours in a city
+    xy = np.column_stack((stops[:, 0] * np.cos(np.radians(stops[:, 1].mean())), stops[:, 1]))
+    k = min(k, len(stops) - 1)
+    _, idx = cKDTree(xy).query(xy, k=k + 1)
+    return idx.reshape(len(stops), k + 1)[:, 1:] + 1
+
+
+def _route_length(dist: _Distances, route: Sequence[int]) -> float:
+    if not route:
+        return 0.0
+    path = np.concatenate(([0], route, [0]))
+    return float(dist(path[:-1], path[1:]).sum())
+
+
+# ----------------------------------------------------------------------
+# Construction
+# ----------------------------------------------------------------------
+def clarke_wright(
+    dist: _Distances, neighbours: np.ndarray, demands: np.ndarray, capacity: float
+) -> List[List[int]]:
+    """Parallel savings construction restricted to *neighbours* pairs.
+
+    *demands* is indexed by node id (``demands[0]`` is the depot). Returns
+    routes as lists of node ids, without the depot.
+    """
+    n = len(neighbours)
+    i = np.repeat(np.arange(1, n + 1), neighbours.shape[1])
+    j = neighbours.ravel()
+    keep = i < j
+    i, j = i[keep], j[keep]
+    savings = dist(0, i) + dist(0, j) - dist(i, j)
+    order = np.argsort(-savings, kind="stable")
+    order = order[savings[order] > 0]
+
+    routes: Dict[int, List[int]] = {node: [node] for node in range(1, n + 1)}
+    route_of = list(range(n + 1))
+    load = demands.astype(float).tolist()
+    for a, b in zip(i[order].tolist(), j[order].tolist()):
+        ra, rb = route_of[a], route_of[b]
+        if ra == rb or load[ra] + load[rb] > capacity:
+            continue
+        route_a, route_b = routes[ra], routes[rb]
+        if route_a[-1] == a and route_b[0] == b:
+            merged = route_a + route_b
+        elif route_a[0] == a and route_b[-1] == b:
+            merged = route_b + route_a
+        elif route_a[-1] == a and route_b[-1] == b:
+            merged = route_a + route_b[::-1]
+        elif route_a[0] == a and route_b[0] == b:
+            merged = route_a[::-1] + route_b
+        else:
+            continue
+        if len(route_a) < len(route_b):
+            ra, rb, route_b = rb, ra, route_a
+        for node in route_b:
+            route_of[node] = ra
+        routes[ra] = merged
+        load[ra] += load[rb]
+        del routes[rb]
+    return list(routes.values())
+
+
+def _insert_cheapest(
+    dist: _Distances, routes: List[List[int]], node: int, demands: np.ndarray, capacity: float
+) -> bool:
+    """Insert *node* where it lengthens a route with room for it least.
+
+    Every position of every such route is scored at once per route.
+    Returns whether the node fit anywhere.
+    """
+    best = None
+    for idx, route in enumerate(routes):
+        if demands[route].sum() + demands[node] > capacity:
+            continue
+        path = np.concatenate(([0], route, [0]))
+        delta = dist(path[:-1], node) + dist(node, path[1:]) - dist(path[:-1], path[1:])
+        pos = int(delta.argmin())
+        if best is None or delta[pos] < best[0]:
+            best = (delta[pos], idx, pos)
+    if best is None:
+        return False
+    _, idx, pos = best
+    routes[idx].insert(pos, node)
+    return True
+
+
+def _reduce_fleet(
+    dist: _Distances, routes: List[List[int]], demands: np.ndarray, capacity: float, n_vehicles: int
+) -> Tuple[List[List[int]], List[int]]:
+    """Merge routes until at most *n_vehicles* remain.
+
+    The lightest route is joined end-to-end, in the cheapest orientation, to
+    a route with room for it. A route that fits nowhere whole is split up:
+    its stops, heaviest first, are inserted one at a time where they add
+    the least distance to a route with spare capacity. Only stops that fit
+    nowhere are returned as unassigned.
+    """
+    routes = sorted(routes, key=lambda r: demands[r].sum())
+    unassigned: List[int] = []
+    while len(routes) > n_vehicles:
+        light = routes.pop(0)
+        light_load = demands[light].sum()
+        best = None
+        for idx, other in enumerate(routes):
+            if demands[other].sum() + light_load > capacity:
+                continue
+            for merged in (other + light, light + other, other + light[::-1], light[::-1] + other):
+                cost = _route_length(dist, merged) - _route_length(dist, other) - _route_length(dist, light)
+                if best is None or cost < best[0]:
+                    best = (cost, idx, merged)
+        if best is None:
+            for node in sorted(light, key=lambda v: -demands[v]):
+                if not _insert_cheapest(dist, routes, node, demands, capacity):
+                    unassigned.append(node)
+            routes.sort(key=lambda r: demands[r].sum())
+            continue
+        _, idx, merged = best
+        routes[idx] = merged
+        routes.sort(key=lambda r: demands[r].sum())
+    return routes, unassigned
+
+
+# ----------------------------------------------------------------------
+# Local search
+# ----------------------------------------------------------------------
+class _Plan:
+    """Routes plus the per-node arrays inter-route moves are scored from."""
+
+    def __init__(self, routes: List[List[int]], demands: np.ndarray) -> None:
+        self.routes = [list(r) for r in routes]
+        self.demands = demands
+        n_nodes = len(demands)
+        self.pred = np.zeros(n_nodes, dtype=np.intp)
+        self.succ = np.zeros(n_nodes, dtype=np.intp)
+        self.route_of = np.full(n_nodes, -1, dtype=np.intp)
+        self.load = np.zeros(len(self.routes))
+        for r in range(len(self.routes)):
+            self.refresh(r)
+
+    def refresh(self, r: int) -> None:
+        arr = np.asarray(self.routes[r], dtype=np.intp)
+        self.load[r] = self.demands[arr].sum() if len(arr) else 0.0
+        if len(arr):
+            self.pred[arr] = np.concatenate(([0], arr[:-1]))
+            self.succ[arr] = np.concatenate((arr[1:], [0]))
+            self.route_of[arr] = r
+
+
+def _score_moves(
+    plan: _Plan, dist: _Distances, neighbours: np.ndarray, capacity: float, stops: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Best inter-route move for each node in *stops*.
+
+    Returns ``(delta, kind, target)``: the change in km, the move
+    (0 relocate after target, 1 relocate before target, 2 swap with
+    target) and the neighbour node it involves.
+    """
+    i = stops[:, None]
+    j = neighbours[stops - 1]
+    p_i, s_i = plan.pred[i], plan.succ[i]
+    p_j, s_j = plan.pred[j], plan.succ[j]
+    q_i, q_j = plan.demands[i], plan.demands[j]
+    r_i, r_j = plan.route_of[i], plan.route_of[j]
+    # Unassigned neighbours have no route
+    other = (r_i != r_j) & (r_j >= 0)
+
+    d_pi_i, d_i_si = dist(p_i, i), dist(i, s_i)
+    d_pj_j, d_j_sj = dist(p_j, j), dist(j, s_j)
+    removal = d_pi_i + d_i_si - dist(p_i, s_i)
+    fits = other & (plan.load[r_j] + q_i <= capacity)
+
+    after = dist(j, i) + dist(i, s_j) - d_j_sj - removal
+    before = dist(p_j, i) + dist(i, j) - d_pj_j - removal
+    swap = (
+        dist(p_i, j) + dist(j, s_i) - d_pi_i - d_i_si
+        + dist(p_j, i) + dist(i, s_j) - d_pj_j - d_j_sj
+    )
+    swap_fits = (
+        other
+        & (plan.load[r_i] - q_i + q_j <= capacity)
+        & (plan.load[r_j] - q_j + q_i <= capacity)
+    )
+
+    moves = np.stack((
+        np.where(fits, after, np.inf),
+        np.where(fits, before, np.inf),
+        np.where(swap_fits, swap, np.inf),
+    ))  # (3, len(stops), k)
+    flat = moves.reshape(3, len(stops), -1).transpose(1, 0, 2).reshape(len(stops), -1)
+    best = flat.argmin(axis=1)
+    rows = np.arange(len(stops))
+    kind, col = np.divmod(best, j.shape[1])
+    return flat[rows, best], kind, j[rows, col]
+
+
+def _apply_move(plan: _Plan, node: int, kind: int, target: int) -> Tuple[int, int]:
+    r_i, r_j = int(plan.route_of[node]), int(plan.route_of[target])
+    route_i, route_j = plan.routes[r_i], plan.routes[r_j]
+    if kind == 2:
+        a, b = route_i.index(node), route_j.index(target)
+        route_i[a], route_j[b] = target, node
+    else:
+        route_i.remove(node)
+        pos = route_j.index(target) + (1 if kind == 0 else 0)
+        route_j.insert(pos, node)
+    plan.refresh(r_i)
+    plan.refresh(r_j)
+    return r_i, r_j
+
+
+def _inter_route_round(
+    plan: _Plan,
+    dist: _Distances,
+    neighbours: np.ndarray,
+    capacity: float,
+    executor: ThreadPoolExecutor | None,
+) -> Tuple[set, int]:
+    """Apply non-conflicting improving moves; return the routes they touched
+    and the number of moves."""
+    stops = np.arange(1, len(plan.demands), dtype=np.intp)
+    stops = stops[plan.route_of[stops] >= 0]
+    chunks = [stops[s:s + VRP_EVAL_CHUNK] for s in range(0, len(stops), VRP_EVAL_CHUNK)]
+    if executor is not None and len(chunks) > 1:
+        parts = list(executor.map(lambda c: _score_moves(plan, dist, neighbours, capacity, c), chunks))
+    else:
+        parts = [_score_moves(plan, dist, neighbours, capacity, c) for c in chunks]
+    delta = np.concatenate([p[0] for p in parts])
+    kind = np.concatenate([p[1] for p in parts])
+    target = np.concatenate([p[2] for p in parts])
+
+    touched: set = set()
+    moves = 0
+    improving = np.flatnonzero(delta < -VRP_IMPROVEMENT_EPS)
+    for idx in improving[np.argsort(delta[improving], kind="stable")].tolist():
+        node, tgt = int(stops[idx]), int(target[idx])
+        routes = {int(plan.route_of[node]), int(plan.route_of[tgt])}
+        # Scores are stale once either route has changed
+        if routes & touched:
+            continue
+        touched |= set(_apply_move(plan, node, int(kind[idx]), tgt))
+        moves += 1
+    return touched, moves
+
+
+# ----------------------------------------------------------------------
+# Entry point
+# ----------------------------------------------------------------------
+def solve_cvrp(
+    orders: CoordinateArray,
+    depot: CoordinateTuple,
+    capacity: float,
+    n_vehicles: int | None = None,
+    demands: Sequence[float] | None = None,
+    time_limit: float = 10.0,
+    planner: RoutePlanner | None = None,
+    n_jobs: int | None = None,
+    n_neighbours: int = VRP_NEIGHBOURS,
+) -> Dict[str, Any]:
+    """Plan vehicle routes for *orders* from *depot* under *capacity*.
+
+    Parameters
+    ----------
+    orders : CoordinateArray
+        Stop ``(lon, lat)`` pairs.
+    depot : CoordinateTuple
+        Start and end of every route.
+    capacity : float
+        Capacity of each vehicle, in the units of *demands*.
+    n_vehicles : int, optional
+        Fleet size; unlimited if omitted. Stops that cannot be served
+        by the fleet are reported in ``unassigned``.
+    demands : sequence of float, optional
+        Demand per order; defaults to 1 each.
+    time_limit : float
+        Seconds for the whole solve. Construction always finishes; local
+        search stops at the limit.
+    planner : RoutePlanner, optional
+        Runs intra-route improvement on its worker processes; by default it
+        runs in the calling thread.
+    n_jobs : int, optional
+        Threads used to score inter-route moves (defaults to the CPU count).
+
+    Returns
+    -------
+    dict
+        ``routes`` (``stops`` as indices into *orders*, ``load``,
+        ``distance_km``), ``total_distance_km``, ``initial_distance_km``
+        (after construction), ``unassigned`` and ``stats``.
+    """
+    start = time.time()
+    deadline = start + time_limit
+    coords = np.asarray(orders, dtype=np.float64).reshape(-1, 2)
+    n = len(coords)
+    demand = np.ones(n) if demands is None else np.asarray(demands, dtype=float).reshape(-1)
+    if len(demand) != n:
+        raise ValueError("demands must have one value per order")
+    if (demand > capacity).any():
+        raise ValueError("An order's demand exceeds the vehicle capacity")
+    node_demand = np.concatenate(([0.0], demand))
+    nodes = np.vstack((np.asarray(depot, dtype=np.float64).reshape(1, 2), coords))
+    dist = _Distances(nodes)
+    planner = planner or RoutePlanner(1)
+    stats: Dict[str, Any] = {"inter_route_moves": 0, "rounds": 0}
+
+    if n == 0:
+        routes: List[List[int]] = []
+        unassigned: List[int] = []
+        neighbours = np.empty((0, 0), dtype=np.intp)
+    elif n == 1:
+        routes, unassigned, neighbours = [[1]], [], np.empty((1, 0), dtype=np.intp)
+    else:
+        neighbours = _neighbour_lists(nodes, n_neighbours)
+        routes = clarke_wright(dist, neighbours, node_demand, capacity)
+        unassigned = []
+        if n_vehicles is not None and len(routes) > n_vehicles:
+            routes, unassigned = _reduce_fleet(dist, routes, node_demand, capacity, n_vehicles)
+    stats["construction_seconds"] = round(time.time() - start, 4)
+    initial_distance = sum(_route_length(dist, r) for r in routes)
+
+    plan = _Plan(routes, node_demand)
+    workers = n_jobs if n_jobs is not None else (os.cpu_count() or 1)
+    executor = ThreadPoolExecutor(workers) if workers > 1 else None
+    try:
+        dirty = set(range(len(plan.routes)))
+        while dirty and time.time() < deadline:
+            # Intra-route: sequence every changed route in parallel
+            changed = sorted(r for r in dirty if len(plan.routes[r]) > 2)
+            if changed:
+                tours = planner.solve(
+                    [coords[np.asarray(plan.routes[r]) - 1] for r in changed],
+                    depot,
+                    max(deadline - time.time(), 0.0),
+                    initial_orders=[list(range(len(plan.routes[r]))) for r in changed],
+                )
+                for r, tour in zip(changed, tours):
+                    plan.routes[r] = [plan.routes[r][k] for k in tour["order"]]
+                    plan.refresh(r)
+            if neighbours.shape[1] == 0 or time.time() >= deadline:
+                break
+            # Inter-route: relocate / swap stops between routes
+            dirty, moves = _inter_route_round(plan, dist, neighbours, capacity, executor)
+            stats["rounds"] += 1
+            stats["inter_route_moves"] += moves
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    result_routes = []
+    for route in plan.routes:
+        if not route:
+            continue
+        result_routes.append({
+            "vehicle": len(result_routes),
+            "stops": [node - 1 for node in route],
+            "load": float(node_demand[route].sum()),
+            "distance_km": _route_length(dist, route),
+        })
+    stats["seconds"] = round(time.time() - start, 4)
+    return {
+        "routes": result_routes,
+        "total_distance_km": sum(r["distance_km"] for r in result_routes),
+        "initial_distance_km": initial_distance,
+        "unassigned": sorted(node - 1 for node in unassigned),
+        "stats": stats,
+    }
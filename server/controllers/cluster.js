@@ -1,5 +1,6 @@
 // In server/controllers/cluster.js (create if needed)
 import axios from "axios";
+import readline from "readline";
 import Order from "../models/order.js";
 
 const FASTAPI_BASE_URL = process.env.FASTAPI_BASE_URL;
@@ -54,16 +55,27 @@ export const predictClustersFromOrders = async (req, res) => {
       });
     }
 
-    const response = await axios.post(`${FASTAPI_BASE_URL}/predict`, {
-      coordinates: coords,
-      max_points_per_cluster: maxPoints,
-    });
-    const rawResponse = response.data;
-
-    const clusters = rawResponse.clusters.map((cluster) =>
-      cluster.coordinates.map((point) => [point.lon, point.lat])
+    // Stream NDJSON so each cluster is processed as soon as it arrives
+    const response = await axios.post(
+      `${FASTAPI_BASE_URL}/predict?stream=true`,
+      {
+        coordinates: coords,
+        max_points_per_cluster: maxPoints,
+      },
+      { responseType: "stream" }
     );
 
+    const clusters = [];
+    const lines = readline.createInterface({
+      input: response.data,
+      crlfDelay: Infinity,
+    });
+    for await (const line of lines) {
+      if (!line) continue;
+      const cluster = JSON.parse(line);
+      clusters.push(cluster.coordinates.map((point) => [point.lon, point.lat]));
+    }
+
     console.log(clusters);
     res.json(clusters);
   } catch (error) {